@@ -0,0 +1,6 @@
+"""
+Jeux de données synthétiques et mesures de performance des fonctions de l'application.
+À lancer depuis la racine du projet :
+    python -m benchmarks.generate_data --ventes 100000 --out /tmp/ferme/data
+    python -m benchmarks.run_benchmarks --sizes 1000 100000 1000000 --output resultats.json
+"""
@@ -0,0 +1,248 @@
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+from storage_utils import TABLES
+
+NOMS = ["Martin", "Bernard", "Thomas", "Petit", "Robert", "Richard", "Durand", "Dubois", "Moreau", "Laurent",
+        "Simon", "Michel", "Lefèvre", "Leroy", "Roux", "David", "Bertrand", "Morel", "Fournier", "Girard",
+        "Bonnet", "Dupont", "Lambert", "Fontaine", "Rousseau", "Vincent", "Muller", "Lefebvre", "Faure", "André",
+        "Mercier", "Blanc", "Guérin", "Boyer", "Garnier", "Chevalier", "François", "Legrand", "Gauthier", "Garcia"]
+PRENOMS = ["Jean", "Marie", "Pierre", "Anne", "Michel", "Isabelle", "Philippe", "Catherine", "Alain", "Sylvie",
+           "Nicolas", "Nathalie", "Patrick", "Christine", "Julien", "Sophie", "Laurent", "Céline", "François", "Julie",
+           "Thomas", "Camille", "Olivier", "Élodie", "Antoine", "Léa", "Hélène", "Louis", "Chloé", "Hugo"]
+# Légumes vendus : (nom, prix au kg, mois de pleine saison)
+LEGUMES = [("Tomate", 3.5, 8), ("Courgette", 2.2, 7), ("Aubergine", 3.2, 8), ("Poivron", 4.0, 8),
+           ("Concombre", 2.0, 7), ("Haricot vert", 6.5, 7), ("Salade", 1.5, 5), ("Radis", 2.5, 4),
+           ("Carotte", 1.8, 9), ("Pomme de terre", 1.4, 9), ("Oignon", 1.9, 9), ("Ail", 9.0, 7),
+           ("Échalote", 6.0, 8), ("Poireau", 2.6, 11), ("Chou", 1.7, 11), ("Chou-fleur", 2.8, 10),
+           ("Brocoli", 3.5, 10), ("Épinard", 4.5, 4), ("Blette", 2.9, 6), ("Betterave", 2.3, 10),
+           ("Navet", 2.1, 11), ("Céleri", 2.7, 11), ("Potiron", 1.9, 10), ("Butternut", 2.4, 10),
+           ("Fenouil", 3.8, 6), ("Petit pois", 7.0, 6), ("Fève", 5.0, 5), ("Asperge", 11.0, 5),
+           ("Fraise", 9.5, 6), ("Melon", 3.0, 8), ("Framboise", 16.0, 7), ("Mâche", 12.0, 1),
+           ("Panais", 3.1, 12), ("Topinambour", 3.3, 1), ("Persil", 8.0, 6), ("Basilic", 14.0, 8)]
+# Dépenses : (nom, montant médian d'une ligne, mois le plus fréquent)
+POSTES = [("graines", 25.0, 3), ("plants", 60.0, 4), ("engrais", 45.0, 3), ("terreau", 30.0, 2),
+          ("eau", 35.0, 7), ("carburant", 55.0, 6), ("outil", 80.0, 2), ("emballages", 20.0, 6),
+          ("réparation", 120.0, 11), ("bâche", 90.0, 10)]
+# Jours de marché (lundi = 0) : mercredi et samedi
+JOURS_MARCHE = (2, 5)
+# Nombre moyen de produits par vente et de lignes par dépense
+LIGNES_PAR_VENTE = 3
+LIGNES_PAR_DEPENSE = 2
+DEFAULT_YEARS = 3
+# Taille maximale (lignes × choix) des clés tirées en une fois pour les tirages sans remise
+TIRAGE_BLOC = 4_000_000
+DEFAULT_END = "2025-12-31"
+
+def _saison(months, peak, strength):
+    # Poids d'un mois selon son écart au mois de pleine saison (1 à 12, circulaire)
+    return np.exp(strength * np.cos(2 * np.pi * (months - peak) / 12))
+
+def _lignes_par_groupe(total, moyenne, maximum, rng):
+    # Découpe `total` lignes en groupes (ventes ou dépenses) de 1 à `maximum` lignes, de taille moyenne `moyenne`
+    counts = np.minimum(1 + rng.poisson(moyenne - 1, size=total), maximum)
+    cumul = np.cumsum(counts)
+    n = int(np.searchsorted(cumul, total)) + 1
+    counts = counts[:n]
+    counts[-1] -= cumul[n - 1] - total
+    return counts
+
+def _tirage_sans_remise(counts, months, weights_by_month, rng):
+    # Pour chaque groupe, counts[i] choix distincts (un produit ou un poste au plus une fois par ticket),
+    # pondérés par les poids du mois du groupe : on garde les counts[i] plus grandes clés log(p) + Gumbel
+    weights = np.array(weights_by_month, dtype="float64")
+    log_p = np.log(weights / weights.sum(axis=1, keepdims=True))
+    k = log_p.shape[1]
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    choices = np.empty(offsets[-1], dtype="int64")
+    step = max(1, TIRAGE_BLOC // k)
+    for first in range(0, len(counts), step):
+        last = min(first + step, len(counts))
+        keys = log_p[months[first:last] - 1] + rng.gumbel(size=(last - first, k))
+        order = np.argsort(-keys, axis=1)
+        # Lecture ligne par ligne : les choix de chaque groupe restent contigus et dans l'ordre des groupes
+        choices[offsets[first]:offsets[last]] = order[np.arange(k) < counts[first:last, None]]
+    return choices
+
+def _suffixe(generation):
+    # Deuxième, troisième... série de noms quand la liste de base est épuisée
+    return np.where(generation > 0, np.char.add(" ", (generation + 1).astype(str)), "")
+
+def generate_clients(n, rng):
+    """
+    Génère n clients aux noms et prénoms distincts, avec un email et un téléphone le plus souvent renseignés.
+    Args:
+        n (int): Nombre de clients.
+        rng (np.random.Generator): Générateur aléatoire.
+    Returns:
+        pd.DataFrame: Table au format de clients.csv.
+    """
+    combos = len(NOMS) * len(PRENOMS)
+    index = np.arange(n)
+    combo = rng.permutation(combos)[index % combos]
+    noms = np.char.add(np.array(NOMS)[combo // len(PRENOMS)], _suffixe(index // combos))
+    prenoms = np.array(PRENOMS)[combo % len(PRENOMS)]
+    clients = pd.DataFrame({"Client_ID": index + 1, "Nom": noms, "Prénom": prenoms})
+    ascii_noms = (clients["Prénom"] + "." + clients["Nom"].str.replace(" ", "")).str.lower()
+    ascii_noms = ascii_noms.str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    clients["Email"] = (ascii_noms + "@exemple.fr").where(rng.random(n) < 0.7)
+    numeros = rng.integers(0, 10 ** 8, size=n)
+    telephones = [f"0{6 + num % 2} {num // 10 ** 6 % 100:02d} {num // 10 ** 4 % 100:02d} {num // 100 % 100:02d} {num % 100:02d}"
+                  for num in numeros]
+    clients["Téléphone"] = pd.Series(telephones).where(rng.random(n) < 0.8)
+    return clients[TABLES["clients"]["columns"]]
+
+def generate_produits(m, rng):
+    """
+    Génère m produits ; au-delà de la liste de légumes, les noms reçoivent un numéro de variété.
+    Args:
+        m (int): Nombre de produits.
+        rng (np.random.Generator): Générateur aléatoire.
+    Returns:
+        tuple: (pd.DataFrame au format de produits.csv, np.ndarray des mois de pleine saison).
+    """
+    index = np.arange(m)
+    base = index % len(LEGUMES)
+    noms = np.char.add(np.array([nom for nom, _, _ in LEGUMES])[base], _suffixe(index // len(LEGUMES)))
+    prix = np.array([prix for _, prix, _ in LEGUMES])[base] * rng.uniform(0.85, 1.15, size=m)
+    produits = pd.DataFrame({"Produit_ID": index + 1, "Nom": noms, "Prix (au Kg)": prix.round(2)})
+    return produits, np.array([mois for _, _, mois in LEGUMES])[base]
+
+def generate_ventes(lignes, clients, produits, peaks, start, end, rng):
+    """
+    Génère les lignes de vente des jours de marché, plus nombreuses en été et d'une année sur l'autre.
+    Chaque vente regroupe quelques produits de saison distincts pour un client ; les clients fidèles reviennent souvent.
+    Args:
+        lignes (int): Nombre de lignes de vente (taille de ventes.csv).
+        clients (pd.DataFrame): Clients générés.
+        produits (pd.DataFrame): Produits générés.
+        peaks (np.ndarray): Mois de pleine saison de chaque produit.
+        start, end (pd.Timestamp): Période couverte.
+        rng (np.random.Generator): Générateur aléatoire.
+    Returns:
+        pd.DataFrame: Table au format de ventes.csv, triée par Vente_ID.
+    """
+    days = pd.date_range(start, end, freq="D")
+    days = days[days.dayofweek.isin(JOURS_MARCHE)]
+    years = (days.year - days.year.min()).to_numpy()
+    weights = _saison(days.month.to_numpy(), 7, 0.6) * (1 + 0.15 * years)
+    counts = _lignes_par_groupe(lignes, LIGNES_PAR_VENTE, len(produits), rng)
+    dates = np.sort(rng.choice(days.to_numpy(), size=len(counts), p=weights / weights.sum()))
+    fidelite = 1 / (1 + rng.permutation(len(clients))) ** 0.7
+    client_ids = clients["Client_ID"].to_numpy()[rng.choice(len(clients), size=len(counts), p=fidelite / fidelite.sum())]
+
+    ticket = np.repeat(np.arange(len(counts)), counts)
+    line_dates = pd.DatetimeIndex(dates[ticket])
+    popularite = rng.uniform(0.3, 1.0, size=len(produits))
+    by_month = [popularite * _saison(month, peaks, 1.2) for month in range(1, 13)]
+    produit = _tirage_sans_remise(counts, pd.DatetimeIndex(dates).month.to_numpy(), by_month, rng)
+    quantites = (rng.gamma(2.0, 0.6, size=lignes) + 0.2).round(1)
+    prix = (quantites * produits["Prix (au Kg)"].to_numpy()[produit]).round(2)
+    return pd.DataFrame({
+        "Vente_ID": ticket + 1,
+        "Date": line_dates.strftime("%Y-%m-%d"),
+        "Client_ID": client_ids[ticket],
+        "Produit_ID": produits["Produit_ID"].to_numpy()[produit],
+        "Quantité": quantites,
+        "Prix": prix,
+    })
+
+def generate_depenses(lignes, start, end, rng):
+    """
+    Génère les dépenses de l'exploitation (graines et plants au printemps, eau l'été, réparations l'hiver...),
+    chaque poste figurant au plus une fois par dépense.
+    Args:
+        lignes (int): Nombre de lignes de dépense (taille de depenses.csv).
+        start, end (pd.Timestamp): Période couverte.
+        rng (np.random.Generator): Générateur aléatoire.
+    Returns:
+        pd.DataFrame: Table au format de depenses.csv, triée par Depense_ID.
+    """
+    days = pd.date_range(start, end, freq="D")
+    counts = _lignes_par_groupe(lignes, LIGNES_PAR_DEPENSE, len(POSTES), rng)
+    weights = _saison(days.month.to_numpy(), 4, 0.4)
+    dates = np.sort(rng.choice(days.to_numpy(), size=len(counts), p=weights / weights.sum()))
+    ticket = np.repeat(np.arange(len(counts)), counts)
+    line_dates = pd.DatetimeIndex(dates[ticket])
+    peaks = np.array([mois for _, _, mois in POSTES])
+    poste = _tirage_sans_remise(counts, pd.DatetimeIndex(dates).month.to_numpy(),
+                                [_saison(month, peaks, 1.0) for month in range(1, 13)], rng)
+    montants = np.array([montant for _, montant, _ in POSTES])[poste] * rng.lognormal(0.0, 0.5, size=lignes)
+    return pd.DataFrame({
+        "Depense_ID": ticket + 1,
+        "Date": line_dates.strftime("%Y-%m-%d"),
+        "Nom": np.array([nom for nom, _, _ in POSTES])[poste],
+        "Prix": montants.round(2),
+    })
+
+def generate_farm(ventes=1000, clients=None, produits=None, depenses=None, years=DEFAULT_YEARS, end=DEFAULT_END, seed=0):
+    """
+    Génère les quatre tables d'une exploitation maraîchère fictive, reproductible pour une même graine.
+    Args:
+        ventes (int): Nombre de lignes de vente.
+        clients (int): Nombre de clients ; par défaut un client pour 200 lignes de vente (entre 30 et 5000).
+        produits (int): Nombre de produits ; par défaut la liste des légumes.
+        depenses (int): Nombre de lignes de dépense ; par défaut une pour 40 lignes de vente (au moins 10).
+        years (int): Nombre d'années couvertes, jusqu'à `end`.
+        end (str): Dernier jour couvert (YYYY-MM-DD).
+        seed (int): Graine du générateur aléatoire.
+    Returns:
+        dict: Nom de table -> pd.DataFrame aux colonnes de TABLES.
+    """
+    rng = np.random.default_rng(seed)
+    clients = clients or min(max(ventes // 200, 30), 5000)
+    produits = produits or len(LEGUMES)
+    depenses = depenses or max(ventes // 40, 10)
+    end = pd.Timestamp(end)
+    start = end - pd.DateOffset(years=years) + pd.Timedelta(days=1)
+    clients_df = generate_clients(clients, rng)
+    produits_df, peaks = generate_produits(produits, rng)
+    return {
+        "clients": clients_df,
+        "produits": produits_df,
+        "ventes": generate_ventes(ventes, clients_df, produits_df, peaks, start, end, rng),
+        "depenses": generate_depenses(depenses, start, end, rng),
+    }
+
+def write_farm(tables, data_dir):
+    """
+    Écrit les tables générées au format CSV de l'application (noms de fichiers de TABLES).
+    Args:
+        tables (dict): Tables retournées par generate_farm.
+        data_dir (str): Dossier de destination (ex. 'data').
+    Returns:
+        dict: Nom de table -> chemin du fichier écrit.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    paths = {}
+    for name, df in tables.items():
+        paths[name] = os.path.join(data_dir, os.path.basename(TABLES[name]["file"]))
+        df[TABLES[name]["columns"]].to_csv(paths[name], index=False)
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère une exploitation maraîchère fictive au format CSV de l'application.")
+    parser.add_argument("--ventes", type=int, default=1000, help="nombre de lignes de vente")
+    parser.add_argument("--clients", type=int, help="nombre de clients")
+    parser.add_argument("--produits", type=int, help="nombre de produits")
+    parser.add_argument("--depenses", type=int, help="nombre de lignes de dépense")
+    parser.add_argument("--years", type=int, default=DEFAULT_YEARS, help="nombre d'années couvertes")
+    parser.add_argument("--end", default=DEFAULT_END, help="dernier jour couvert (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=0, help="graine du générateur aléatoire")
+    parser.add_argument("--out", required=True, help="dossier de destination des CSV")
+    parser.add_argument("--force", action="store_true", help="remplacer des CSV existants")
+    args = parser.parse_args(argv)
+
+    existing = [name for name, table in TABLES.items()
+                if os.path.exists(os.path.join(args.out, os.path.basename(table["file"])))]
+    if existing and not args.force:
+        parser.error(f"{args.out} contient déjà {', '.join(existing)} (utiliser --force pour les remplacer)")
+    tables = generate_farm(args.ventes, args.clients, args.produits, args.depenses, args.years, args.end, args.seed)
+    for name, path in write_farm(tables, args.out).items():
+        print(f"{path} : {len(tables[name])} lignes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,461 @@
+import argparse
+import datetime
+import importlib
+import inspect
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+from benchmarks.generate_data import generate_farm, write_farm
+
+try:
+    import resource
+except ImportError:  # Windows : pas de mesure de la mémoire maximale
+    resource = None
+
+# Modules dont toutes les fonctions publiques sont mesurées
+MODULES = ["client_fonction", "produit_fonction", "depenses_fonction", "ventes_fonction", "statistiques_fonction"]
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_BACKENDS = ["csv"]
+DEFAULT_REPEAT = 5
+# Taille des fichiers téléversés (ventes.csv, depenses.csv) et des ventes du jour importées en une fois
+UPLOAD_ROWS = 1_000
+BATCH_ROWS = 200
+# Durée maximale d'un processus de mesure (une taille, un moteur)
+WORKER_TIMEOUT = 6 * 3600
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- Cas mesurés : (module, fonction, variante, type, préparation) -------------------------------
+# La préparation, non chronométrée, reçoit le contexte et retourne (args, kwargs) ; une lecture est
+# mesurée une fois à froid (caches en mémoire vidés, comme après un redémarrage) puis à chaud.
+
+def _no_args(ctx):
+    return (), {}
+
+def _page(ctx):
+    return (), {"page": 1, "page_size": 50}
+
+def _page_ventes_filtree(ctx):
+    return (), {"page": 1, "page_size": 50, "start_date": ctx["start"], "end_date": ctx["end"],
+                "client_id": ctx["client_id"], "sort_by": "Total", "ascending": False}
+
+def _page_depenses_filtree(ctx):
+    return (), {"page": 1, "page_size": 50, "start_date": ctx["start"], "end_date": ctx["end"],
+                "sort_by": "Total", "ascending": False}
+
+def _page_apres_vente(ctx):
+    # Une vente enregistrée juste avant : mesure la mise à jour incrémentale des vues
+    ctx["modules"]["ventes_fonction"].save_vente(*_vente(ctx)[0])
+    return _page(ctx)
+
+def _apres_vente(ctx):
+    ctx["modules"]["ventes_fonction"].save_vente(*_vente(ctx)[0])
+    return _no_args(ctx)
+
+def _periode(ctx):
+    return (), {"start_date": ctx["start"], "end_date": ctx["end"]}
+
+def _mois(ctx):
+    return (ctx["months"][:3],), {}
+
+def _format_mois(ctx):
+    return (ctx["months"][0],), {}
+
+def _vente_id(ctx):
+    return (ctx["vente_id"],), {}
+
+def _depense_id(ctx):
+    return (ctx["depense_id"],), {}
+
+def _max_id(ctx, table, column):
+    return int(ctx["get_table"](table, [column])[column].max())
+
+def _nouveau_client(ctx):
+    nom = f"Banc {next(ctx['counter'])}"
+    ctx["bench_clients"].append(nom)
+    return (nom, "Test", "banc@exemple.fr", "06 00 00 00 00"), {}
+
+def _client_a_supprimer(ctx):
+    return (ctx["bench_clients"].pop(), "Test"), {}
+
+def _nouveau_produit(ctx):
+    nom = f"Légume banc {next(ctx['counter'])}"
+    ctx["bench_produits"].append(nom)
+    return (nom, 2.5), {}
+
+def _produit_a_supprimer(ctx):
+    return (ctx["bench_produits"].pop(),), {}
+
+def _nouveau_prix(ctx):
+    return (ctx["produits"][0], 2.0 + next(ctx["counter"]) % 2 * 0.5), {}
+
+def _vente(ctx):
+    return (ctx["end"], ctx["client"][0], ctx["client"][1], ctx["produits"], [1.0, 2.0, 0.5], [3.0, 4.0, 1.5]), {}
+
+def _derniere_vente(ctx):
+    return (_max_id(ctx, "ventes", "Vente_ID"),), {}
+
+def _depense(ctx):
+    return (ctx["end"], ["graines", "eau"], [12.5, 3.0]), {}
+
+def _derniere_depense(ctx):
+    return (_max_id(ctx, "depenses", "Depense_ID"),), {}
+
+def _batch_text(ctx):
+    return (ctx["batch_csv"],), {}
+
+def _batch_rows(ctx):
+    return (pd.read_csv(io.StringIO(ctx["batch_csv"]), dtype="string"),), {}
+
+def _csv_file(key):
+    return lambda ctx: ((io.StringIO(ctx[key]),), {})
+
+def _nouvelles_lignes(table, column):
+    # Fichier de UPLOAD_ROWS lignes aux identifiants nouveaux (toutes insérées)
+    def prepare(ctx):
+        rows = ctx["templates"][table]
+        first = _max_id(ctx, table, column) + 1
+        rows = rows.assign(**{column: rows[column] - rows[column].min() + first})
+        return (io.StringIO(rows.to_csv(index=False, date_format="%Y-%m-%d")),), {}
+    return prepare
+
+CASES = [
+    ("client_fonction", "load_clients_cache", None, "read", _no_args),
+    ("client_fonction", "save_client", None, "write", _nouveau_client),
+    ("client_fonction", "delete_client", None, "write", _client_a_supprimer),
+    ("client_fonction", "upload_clients", None, "write", _csv_file("clients_csv")),
+    ("produit_fonction", "load_produits_cache", None, "read", _no_args),
+    ("produit_fonction", "save_produit", None, "write", _nouveau_produit),
+    ("produit_fonction", "modificate_price", None, "write", _nouveau_prix),
+    ("produit_fonction", "delete_produit", None, "write", _produit_a_supprimer),
+    ("produit_fonction", "upload_produits", None, "write", _csv_file("produits_csv")),
+    ("depenses_fonction", "load_depenses_cache", None, "read", _no_args),
+    ("depenses_fonction", "get_depenses_affichage", None, "read", _page),
+    ("depenses_fonction", "get_depenses_affichage", "filtres", "read", _page_depenses_filtree),
+    ("depenses_fonction", "get_depense_details", None, "read", _depense_id),
+    ("depenses_fonction", "save_depense", None, "write", _depense),
+    ("depenses_fonction", "delete_depense", None, "write", _derniere_depense),
+    ("depenses_fonction", "upload_depenses", None, "write", _nouvelles_lignes("depenses", "Depense_ID")),
+    ("ventes_fonction", "load_ventes_cache", None, "read", _no_args),
+    ("ventes_fonction", "get_ventes_affichage", None, "read", _page),
+    ("ventes_fonction", "get_ventes_affichage", "filtres", "read", _page_ventes_filtree),
+    ("ventes_fonction", "get_ventes_affichage", "après vente", "read", _page_apres_vente),
+    ("ventes_fonction", "get_vente_details", None, "read", _vente_id),
+    ("ventes_fonction", "save_vente", None, "write", _vente),
+    ("ventes_fonction", "delete_vente", None, "write", _derniere_vente),
+    ("ventes_fonction", "read_ventes_batch", None, "read", _batch_text),
+    ("ventes_fonction", "save_ventes_batch", None, "write", _batch_rows),
+    ("ventes_fonction", "upload_ventes", None, "write", _nouvelles_lignes("ventes", "Vente_ID")),
+    ("statistiques_fonction", "get_benefice_par_date", None, "read", _no_args),
+    ("statistiques_fonction", "get_benefice_par_date", "après vente", "read", _apres_vente),
+    ("statistiques_fonction", "get_dernier_benefice", None, "read", _no_args),
+    ("statistiques_fonction", "get_chiffre_affaires_total", None, "read", _no_args),
+    ("statistiques_fonction", "plot_benefice_evolution", None, "read", _no_args),
+    ("statistiques_fonction", "format_mois", None, "read", _format_mois),
+    ("statistiques_fonction", "get_mois_disponibles", None, "read", _no_args),
+    ("statistiques_fonction", "get_chiffre_affaires_et_depenses_par_mois", None, "read", _no_args),
+    ("statistiques_fonction", "get_chiffre_affaires_et_depenses_par_mois", "3 mois", "read", _mois),
+    ("statistiques_fonction", "plot_chiffre_affaires_vs_depenses", None, "read", _no_args),
+    ("statistiques_fonction", "get_chiffre_affaires_par_produit", None, "read", _no_args),
+    ("statistiques_fonction", "get_chiffre_affaires_par_produit", "période", "read", _periode),
+    ("statistiques_fonction", "plot_chiffre_affaires_per_product", None, "read", _no_args),
+    ("statistiques_fonction", "get_chiffre_affaires_per_client", None, "read", _no_args),
+    ("statistiques_fonction", "get_chiffre_affaires_per_client", "période", "read", _periode),
+    ("statistiques_fonction", "plot_chiffre_affaires_per_client", None, "read", _no_args),
+    ("statistiques_fonction", "get_depenses_per_name", None, "read", _no_args),
+    ("statistiques_fonction", "get_depenses_per_name", "période", "read", _periode),
+    ("statistiques_fonction", "plot_depenses_per_name", None, "read", _no_args),
+]
+
+def case_label(module, function, variant=None):
+    """Libellé d'un cas dans les résultats (ex. 'ventes_fonction.get_ventes_affichage[filtres]')."""
+    return f"{module}.{function}" + (f"[{variant}]" if variant else "")
+
+def public_functions(modules):
+    """
+    Retourne les fonctions publiques définies dans les modules (hors fonctions importées).
+    Args:
+        modules (dict): Nom -> module importé.
+    Returns:
+        list: Libellés 'module.fonction', triés.
+    """
+    return sorted(f"{name}.{func_name}" for name, module in modules.items()
+                  for func_name, func in inspect.getmembers(module, inspect.isfunction)
+                  if not func_name.startswith("_") and func.__module__ == name)
+
+# --- Processus de mesure : lancé dans le dossier de travail d'un jeu de données -----------------
+
+def _context(modules, get_table):
+    ventes = get_table("ventes")
+    depenses = get_table("depenses", ["Depense_ID", "Date"])
+    clients = get_table("clients", ["Client_ID", "Nom", "Prénom"])
+    produits = get_table("produits")
+    last = ventes["Date"].max()
+    months = (ventes["Date"].dt.year * 12 + ventes["Date"].dt.month - 1).drop_duplicates().sort_values(ascending=False)
+    client = clients.iloc[0]
+
+    rng = np.random.default_rng(0)
+    ticket = np.arange(BATCH_ROWS) // 3
+    acheteurs = clients.iloc[rng.integers(len(clients), size=ticket[-1] + 1)[ticket]]
+    batch = pd.DataFrame({
+        "Ticket": ticket + 1,
+        "Date": last.strftime("%Y-%m-%d"),
+        "Nom": acheteurs["Nom"].astype(str).to_numpy(),
+        "Prénom": acheteurs["Prénom"].astype(str).to_numpy(),
+        "Produit": produits["Nom"].astype(str).to_numpy()[rng.integers(len(produits), size=BATCH_ROWS)],
+        "Quantité": (rng.gamma(2.0, 0.6, size=BATCH_ROWS) + 0.2).round(1),
+    })
+    return {
+        "modules": modules,
+        "get_table": get_table,
+        "vente_id": int(ventes["Vente_ID"].iloc[len(ventes) // 2]),
+        "depense_id": int(depenses["Depense_ID"].iloc[len(depenses) // 2]),
+        "start": (last - pd.DateOffset(months=3)).date(),
+        "end": last.date(),
+        "months": [int(month) for month in months],
+        "client": (str(client["Nom"]), str(client["Prénom"])),
+        "client_id": int(client["Client_ID"]),
+        "produits": produits["Nom"].astype(str).tolist()[:3],
+        "clients_csv": get_table("clients").to_csv(index=False),
+        "produits_csv": produits.to_csv(index=False),
+        "batch_csv": batch.to_csv(index=False),
+        "templates": {"ventes": ventes.tail(UPLOAD_ROWS), "depenses": get_table("depenses").tail(UPLOAD_ROWS)},
+        "counter": itertools.count(1),
+        "bench_clients": [],
+        "bench_produits": [],
+    }
+
+def _summary(times):
+    return {"runs": len(times), "min_s": min(times), "median_s": statistics.median(times),
+            "mean_s": statistics.fmean(times), "max_s": max(times)}
+
+def _measure(func, prepare, kind, ctx, repeat, messages):
+    first_message = len(messages)
+    failures = 0
+
+    def call(cold=False):
+        nonlocal failures
+        args, kwargs = prepare(ctx)
+        if cold:
+            st.cache_resource.clear()
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        if result is None or result is False:
+            failures += 1
+        return elapsed
+
+    measures = {"kind": kind}
+    if kind == "read":
+        measures["cold_s"] = call(cold=True)
+    measures.update(_summary([call() for _ in range(repeat)]))
+    measures["failures"] = failures
+    # Messages affichés par la fonction (st.error, st.warning) : une erreur rend la mesure suspecte
+    measures["messages"] = messages[first_message:][:5]
+    return measures
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilo-octets sous Linux, octets sous macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def run_worker(repeat, output):
+    """
+    Mesure toutes les fonctions sur le dossier data/ du répertoire courant, synchronisation GitHub désactivée.
+    Doit être appelée pendant l'exécution d'un script Streamlit (voir _worker_script).
+    Args:
+        repeat (int): Nombre d'appels mesurés par fonction (à chaud pour les lectures).
+        output (str): Fichier JSON où écrire les résultats.
+    """
+    messages = []
+    st.error = lambda body, *args, **kwargs: messages.append(f"erreur : {body}")
+    st.warning = lambda body, *args, **kwargs: messages.append(f"avertissement : {body}")
+    modules = {name: importlib.import_module(name) for name in MODULES}
+    sync_utils = importlib.import_module("sync_utils")
+    sync_calls = []
+
+    def no_sync(file_path, commit_message):
+        sync_calls.append(file_path)
+        return True
+
+    for module in [sync_utils, *modules.values()]:
+        if hasattr(module, "enqueue_push"):
+            module.enqueue_push = no_sync
+    storage_utils = importlib.import_module("storage_utils")
+
+    start = time.perf_counter()
+    storage_utils.get_storage()
+    setup = {"storage_init_s": time.perf_counter() - start}
+    start = time.perf_counter()
+    ctx = _context(modules, storage_utils.get_table)
+    setup["context_s"] = time.perf_counter() - start
+
+    functions = {}
+    for module, function, variant, kind, prepare in CASES:
+        label = case_label(module, function, variant)
+        functions[label] = _measure(getattr(modules[module], function), prepare, kind, ctx, repeat, messages)
+        timing = functions[label].get("cold_s", functions[label]["median_s"])
+        print(f"    {label:<70} {timing * 1000:10.1f} ms", flush=True)
+
+    covered = {case_label(module, function) for module, function, _, _, _ in CASES}
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"setup": setup, "functions": functions,
+                   "missing": [label for label in public_functions(modules) if label not in covered],
+                   "sync_calls": len(sync_calls), "max_rss_mb": _max_rss_mb()}, f, ensure_ascii=False, indent=1)
+
+def _worker_script(repeat, output):
+    # Exécuté par AppTest : hors d'un script Streamlit, st.cache_resource ne garde rien et chaque
+    # appel reconstruirait les tables et les vues partagées
+    from benchmarks.run_benchmarks import run_worker
+    run_worker(repeat, output)
+
+def _run_worker_app(backend, repeat, output):
+    app = AppTest.from_function(_worker_script, default_timeout=WORKER_TIMEOUT, args=(repeat, output))
+    app.secrets["storage"] = {"backend": backend}
+    app.run()
+    for exception in app.exception:
+        print(exception.message, "\n".join(exception.stack_trace), file=sys.stderr)
+    return 1 if app.exception else 0
+
+# --- Orchestration : un jeu de données par taille, un processus par moteur de stockage ---------
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def _metadata(args):
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "streamlit": st.__version__,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "years": args.years,
+    }
+
+def _run_size(size, backends, args, work_root):
+    start = time.perf_counter()
+    tables = generate_farm(size, years=args.years, seed=args.seed)
+    source = os.path.join(work_root, f"source_{size}")
+    write_farm(tables, source)
+    generate_s = time.perf_counter() - start
+    rows = {name: len(df) for name, df in tables.items()}
+    del tables
+
+    runs = []
+    for backend in backends:
+        print(f"{size} ventes, moteur {backend}", flush=True)
+        work = os.path.join(work_root, f"{backend}_{size}")
+        shutil.copytree(source, os.path.join(work, "data"))
+        output = os.path.join(work, "resultats.json")
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get("PYTHONPATH")])))
+        process = subprocess.run([sys.executable, "-m", "benchmarks.run_benchmarks", "--worker", output,
+                                  "--backend", backend, "--repeat", str(args.repeat)],
+                                 cwd=work, env=env, stderr=subprocess.PIPE, text=True)
+        run = {"size": size, "backend": backend, "rows": rows, "generate_s": generate_s}
+        if process.returncode == 0:
+            with open(output, encoding="utf-8") as f:
+                run.update(json.load(f))
+        else:
+            run["error"] = process.stderr[-4000:]
+            print(process.stderr[-4000:], file=sys.stderr)
+        runs.append(run)
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+    return runs
+
+def _timing(measures):
+    return measures.get("median_s"), measures.get("cold_s")
+
+def compare(baseline, results):
+    """
+    Compare deux fichiers de résultats : médiane à chaud (et premier appel à froid) de chaque fonction.
+    Args:
+        baseline (dict): Résultats de référence.
+        results (dict): Nouveaux résultats.
+    Returns:
+        list: Lignes (taille, moteur, libellé, médiane avant, médiane après, rapport, froid avant, froid après).
+    """
+    before = {(run["size"], run["backend"], label): measures for run in baseline["runs"]
+              for label, measures in run.get("functions", {}).items()}
+    lines = []
+    for run in results["runs"]:
+        for label, measures in run.get("functions", {}).items():
+            old = before.get((run["size"], run["backend"], label))
+            if old is None:
+                continue
+            (old_median, old_cold), (new_median, new_cold) = _timing(old), _timing(measures)
+            lines.append((run["size"], run["backend"], label, old_median, new_median,
+                          new_median / old_median if old_median else None, old_cold, new_cold))
+    return lines
+
+def _print_comparison(lines):
+    def ms(value):
+        return f"{value * 1000:10.1f}" if value is not None else " " * 10
+    print(f"{'taille':>9} {'moteur':<7} {'fonction':<70} {'avant ms':>10} {'après ms':>10} {'rapport':>8}"
+          f" {'froid av.':>10} {'froid ap.':>10}")
+    for size, backend, label, old, new, ratio, old_cold, new_cold in lines:
+        print(f"{size:>9} {backend:<7} {label:<70} {ms(old)} {ms(new)} {ratio or 0:8.2f} {ms(old_cold)} {ms(new_cold)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure les fonctions de chargement, d'enregistrement et de statistiques.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="nombres de lignes de vente")
+    parser.add_argument("--backends", nargs="+", default=DEFAULT_BACKENDS, choices=["csv", "sqlite", "arrow"],
+                        help="moteurs de stockage mesurés")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="appels mesurés par fonction")
+    parser.add_argument("--years", type=int, default=3, help="années couvertes par les données générées")
+    parser.add_argument("--seed", type=int, default=0, help="graine du générateur de données")
+    parser.add_argument("--output", default="benchmark_results.json", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="résultats précédents à comparer aux nouveaux")
+    parser.add_argument("--keep", action="store_true", help="garder les dossiers de travail")
+    parser.add_argument("--worker", metavar="OUTPUT", help=argparse.SUPPRESS)
+    parser.add_argument("--backend", default="csv", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        return _run_worker_app(args.backend, args.repeat, args.worker)
+
+    results = {"meta": _metadata(args), "runs": []}
+    work_root = tempfile.mkdtemp(prefix="maraichage_bench_")
+    try:
+        for size in args.sizes:
+            results["runs"].extend(_run_size(size, args.backends, args, work_root))
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_root, ignore_errors=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=1)
+    print(f"Résultats écrits dans {args.output}")
+
+    for run in results["runs"]:
+        if run.get("missing"):
+            print(f"Fonctions non mesurées : {', '.join(run['missing'])}", file=sys.stderr)
+            break
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            _print_comparison(compare(json.load(f), results))
+    return 1 if any("error" in run for run in results["runs"]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import pandas as pd
+import streamlit as st
+from storage_utils import get_table, table_version
+from journal_utils import JOURNAL_MAX_BYTES, append_journal, discard_journal, read_journal
+from perf_utils import instrument, record_cache
+
+# Journal du bénéfice par jour, tenu à jour à chaque écriture de vente ou de dépense.
+# La première ligne du fichier donne les versions des tables qu'il reflète. Chaque écriture ajoute
+# ses écarts par date (et les nouvelles versions) à benefice.csv.journal ; le fichier n'est réécrit
+# que lorsque ce journal devient trop gros. Il n'est relu que si les versions sont toujours à jour,
+# sinon il est reconstruit depuis les tables.
+LEDGER_FILE = "data/benefice.csv"
+LEDGER_TABLES = ("ventes", "depenses")
+LEDGER_COLUMNS = ["Date", "Ventes", "Dépenses", "Lignes", "Benefice_Cumule"]
+# Colonne du journal alimentée par chaque table
+AMOUNT_COLUMNS = {"ventes": "Ventes", "depenses": "Dépenses"}
+
+_lock = threading.Lock()
+
+@st.cache_resource(show_spinner=False)
+def _ledgers():
+    return {}
+
+def _par_date(rows, column):
+    # Montant et nombre de lignes par jour ; les dates invalides sont ignorées, comme avant.
+    # Même lecture des dates que apply_schema (ISO8601, heure éventuelle ramenée au jour)
+    dates = pd.to_datetime(rows["Date"], format="ISO8601", errors="coerce").dt.normalize()
+    amounts = pd.DataFrame({"Date": dates, column: rows["Prix"].astype("float64"), "Lignes": 1}).dropna(subset=["Date"])
+    return amounts.groupby("Date")[[column, "Lignes"]].sum()
+
+@instrument("index")
+def _build_ledger():
+    ventes = _par_date(get_table("ventes", ["Date", "Prix"]), "Ventes")
+    depenses = _par_date(get_table("depenses", ["Date", "Prix"]), "Dépenses")
+    ledger = ventes.join(depenses, how="outer", lsuffix="_v", rsuffix="_d").fillna(0)
+    ledger["Lignes"] = ledger.pop("Lignes_v") + ledger.pop("Lignes_d")
+    ledger = ledger.reindex(columns=["Ventes", "Dépenses", "Lignes"], fill_value=0.0).sort_index()
+    ledger["Benefice_Cumule"] = (ledger["Ventes"] - ledger["Dépenses"]).cumsum()
+    ledger.index.name = "Date"
+    return ledger
+
+def _save(ledger, versions):
+    tmp_file = f"{LEDGER_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+        f.write(json.dumps(versions) + "\n")
+        ledger.reset_index()[LEDGER_COLUMNS].to_csv(f, index=False, date_format="%Y-%m-%d")
+    os.replace(tmp_file, LEDGER_FILE)
+    discard_journal(LEDGER_FILE)
+
+def _append(ledger, deltas, versions):
+    # Écarts d'une écriture ajoutés au journal du fichier ; repli dans le fichier au-delà de JOURNAL_MAX_BYTES
+    if not os.path.exists(LEDGER_FILE):
+        _save(ledger, versions)
+        return
+    rows = deltas.reset_index()
+    rows["Date"] = rows["Date"].dt.strftime("%Y-%m-%d")
+    if append_journal(LEDGER_FILE, {"op": "deltas", "versions": versions, "rows": rows}) > JOURNAL_MAX_BYTES:
+        _save(ledger, versions)
+
+def _discard():
+    try:
+        os.remove(LEDGER_FILE)
+    except FileNotFoundError:
+        pass
+    discard_journal(LEDGER_FILE)
+
+def _load(versions):
+    # Journal enregistré, seulement s'il correspond exactement aux versions attendues
+    try:
+        entries = read_journal(LEDGER_FILE)
+        with open(LEDGER_FILE, "r", encoding="utf-8") as f:
+            saved = json.loads(f.readline())
+            if (entries[-1]["versions"] if entries else saved) != versions:
+                return None
+            ledger = pd.read_csv(f, parse_dates=["Date"], date_format="%Y-%m-%d")
+        ledger = ledger.set_index("Date")[LEDGER_COLUMNS[1:]].astype("float64")
+        for entry in entries:
+            deltas = pd.DataFrame.from_records(entry["rows"])
+            deltas["Date"] = pd.to_datetime(deltas["Date"], format="%Y-%m-%d")
+            ledger = _apply(ledger, deltas.set_index("Date"))
+    except FileNotFoundError:
+        return None
+    except Exception:
+        _discard()
+        return None
+    return _entry(ledger, dict(versions))
+
+def _current_versions():
+    return {name: table_version(name) for name in LEDGER_TABLES}
+
+def _entry(ledger, versions):
+    return {"versions": versions, "ledger": ledger}
+
+def _get_entry():
+    versions = _current_versions()
+    with _lock:
+        entry = _ledgers().get("benefice")
+        if entry is None or entry["versions"] != versions:
+            # Journal relu depuis le fichier s'il est à jour : compté comme un succès, sans reconstruction
+            entry = _load(versions)
+            if entry is not None:
+                _ledgers()["benefice"] = entry
+        record_cache("benefice", entry is not None)
+        if entry is not None:
+            return entry
+    entry = _entry(_build_ledger(), versions)
+    with _lock:
+        if entry["versions"] == _current_versions():
+            _ledgers()["benefice"] = entry
+            _save(entry["ledger"], entry["versions"])
+    return entry
+
+def _apply(ledger, deltas):
+    # Reporte les montants par date ; seul le cumul des dates postérieures est décalé
+    ledger = ledger.copy()
+    for date, row in deltas.iterrows():
+        delta = row.get("Ventes", 0.0) - row.get("Dépenses", 0.0)
+        if date in ledger.index:
+            for col in ("Ventes", "Dépenses", "Lignes"):
+                ledger.loc[date, col] += row.get(col, 0.0)
+            if ledger.loc[date, "Lignes"] <= 0:
+                ledger = ledger.drop(date)
+        elif row["Lignes"] > 0:
+            previous = ledger.loc[:date, "Benefice_Cumule"]
+            ledger.loc[date] = pd.Series({"Ventes": row.get("Ventes", 0.0), "Dépenses": row.get("Dépenses", 0.0),
+                                          "Lignes": row["Lignes"],
+                                          "Benefice_Cumule": previous.iloc[-1] if len(previous) else 0.0})
+            if not ledger.index.is_monotonic_increasing:
+                ledger = ledger.sort_index()
+        else:
+            continue
+        ledger.loc[ledger.index >= date, "Benefice_Cumule"] += delta
+    return ledger
+
+def _update_ledger(name, old_version, rows, sign):
+    new_version = table_version(name)
+    with _lock:
+        entry = _ledgers().get("benefice")
+        if entry is None:
+            # Pas encore de journal en mémoire : le fichier convient s'il décrit l'état précédant l'écriture
+            entry = _load({other: old_version if other == name else table_version(other) for other in LEDGER_TABLES})
+        others_current = entry is not None and all(
+            entry["versions"][other] == table_version(other) for other in LEDGER_TABLES if other != name)
+        if entry is None or not others_current or entry["versions"][name] != old_version or new_version != old_version + 1:
+            _ledgers().pop("benefice", None)
+            return
+        deltas = _par_date(rows, AMOUNT_COLUMNS[name]) * sign
+        entry["ledger"] = _apply(entry["ledger"], deltas)
+        entry["versions"][name] = new_version
+        _ledgers()["benefice"] = entry
+        _append(entry["ledger"], deltas, entry["versions"])
+
+def benefice_rows_added(name, old_version, rows):
+    """
+    Reporte dans le journal des lignes ajoutées à une table.
+    Args:
+        name (str): 'ventes' ou 'depenses'.
+        old_version (int): Version de la table avant l'écriture.
+        rows (pd.DataFrame): Lignes ajoutées (colonnes Date et Prix).
+    """
+    _update_ledger(name, old_version, rows, 1)
+
+def benefice_rows_removed(name, old_version, rows):
+    """Retire du journal des lignes supprimées d'une table (mêmes arguments que benefice_rows_added)."""
+    _update_ledger(name, old_version, rows, -1)
+
+def get_benefice_journalier():
+    """
+    Retourne le journal du bénéfice : une ligne par date avec les ventes, les dépenses et le bénéfice cumulé.
+    Returns:
+        pd.DataFrame: Colonnes Date, Ventes, Dépenses, Benefice_Cumule (triées par date).
+    """
+    ledger = _get_entry()["ledger"]
+    return ledger.reset_index()[["Date", "Ventes", "Dépenses", "Benefice_Cumule"]]
+
+def get_dernier_benefice_journal():
+    """
+    Retourne le bénéfice cumulé à la dernière date du journal et cette date, sans parcourir le journal.
+    Returns:
+        tuple: (bénéfice cumulé, date) ou (0.0, None) si le journal est vide.
+    """
+    ledger = _get_entry()["ledger"]
+    if ledger.empty:
+        return 0.0, None
+    return ledger["Benefice_Cumule"].iat[-1], ledger.index[-1]
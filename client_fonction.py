@@ -1,79 +1,78 @@
 import pandas as pd
 import streamlit as st
-import os
-from github_utils import push_to_github
+from sync_utils import enqueue_push
+from storage_utils import TABLES, get_table, table_version, next_id, insert_rows, delete_rows
+from index_utils import find_client_ids, index_inserted, index_deleted
+from upsert_utils import upsert_rows
+from vue_utils import vue_noms_changed
+from memo_utils import skip_memo
+from perf_utils import instrument
 
-# Créer le dossier data/ s'il n'existe pas
-os.makedirs("data", exist_ok=True)
-CLIENTS_FILE = "data/clients.csv"
+CLIENTS_FILE = TABLES["clients"]["file"]
+CLIENTS_COLUMNS = TABLES["clients"]["columns"]
 
-@st.cache_data
-def load_clients_cache(_invalidate=False):
+@instrument("chargement")
+def load_clients_cache(columns=None):
     try:
-        return pd.read_csv(CLIENTS_FILE)
-    except FileNotFoundError:
-        return pd.DataFrame(columns=["Client_ID", "Nom", "Prénom", "Email", "Téléphone"])
+        return get_table("clients", columns)
     except Exception as e:
         st.error(f"Erreur lors du chargement des clients : {e}")
-        return pd.DataFrame(columns=["Client_ID", "Nom", "Prénom", "Email", "Téléphone"])
+        skip_memo()
+        return pd.DataFrame(columns=columns or CLIENTS_COLUMNS)
 
+@instrument("écriture")
 def save_client(nom, prenom, email, telephone):
     try:
-        clients = load_clients_cache(_invalidate=True)
-        new_id = clients["Client_ID"].max() + 1 if not clients.empty else 1
         new_client = pd.DataFrame([{
-            "Client_ID": new_id,
+            "Client_ID": next_id("clients"),
             "Nom": nom,
             "Prénom": prenom,
             "Email": email,
             "Téléphone": telephone
         }])
-        clients = pd.concat([clients, new_client], ignore_index=True)
-        clients.to_csv(CLIENTS_FILE, index=False)
-        with open(CLIENTS_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/clients.csv", content, f"Ajout/modification de client {nom} {prenom}")
-        load_clients_cache.clear()
+        version = table_version("clients")
+        insert_rows("clients", new_client)
+        index_inserted("clients", version, new_client)
+        vue_noms_changed("clients", version, new_client["Client_ID"].tolist())
+        enqueue_push(CLIENTS_FILE, f"Ajout/modification de client {nom} {prenom}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de l’enregistrement du client : {e}")
         return False
 
+@instrument("écriture")
 def delete_client(nom, prenom):
     try:
-        clients = load_clients_cache(_invalidate=True)
-        if clients[(clients["Nom"].str.lower() == nom.lower()) & (clients["Prénom"].str.lower() == prenom.lower())].empty:
+        client_ids = find_client_ids(nom, prenom)
+        if not client_ids:
             return False
-        clients = clients[~((clients["Nom"].str.lower() == nom.lower()) & (clients["Prénom"].str.lower() == prenom.lower()))]
-        clients.to_csv(CLIENTS_FILE, index=False)
-        with open(CLIENTS_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/clients.csv", content, f"Suppression du client {nom} {prenom}")
-        load_clients_cache.clear()
+        version = table_version("clients")
+        delete_rows("clients", "Client_ID", client_ids)
+        index_deleted("clients", version, (nom, prenom))
+        vue_noms_changed("clients", version, client_ids)
+        enqueue_push(CLIENTS_FILE, f"Suppression du client {nom} {prenom}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de la suppression du client : {e}")
         return False
 
+@instrument("écriture")
 def upload_clients(file):
+    """
+    Fusionne un CSV de clients dans la table sans changer les identifiants existants.
+    Args:
+        file: Fichier CSV téléversé (mêmes colonnes que clients.csv).
+    Returns:
+        dict: {inserted, updated, remap} (voir upsert_rows) ou None en cas d'erreur.
+    """
     try:
-        uploaded_clients = pd.read_csv(file)
-        current_clients = load_clients_cache(_invalidate=True)
-        expected_columns = ["Client_ID", "Nom", "Prénom", "Email", "Téléphone"]
-        if not all(col in uploaded_clients.columns for col in expected_columns):
-            return False
-        if not current_clients.empty:
-            merged_clients = pd.concat([current_clients, uploaded_clients], ignore_index=True)
-            merged_clients = merged_clients.drop_duplicates(subset=["Nom", "Prénom"], keep="last")
-        else:
-            merged_clients = uploaded_clients
-        merged_clients["Client_ID"] = range(1, len(merged_clients) + 1)
-        merged_clients.to_csv(CLIENTS_FILE, index=False)
-        with open(CLIENTS_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/clients.csv", content, "Upload de clients.csv")
-        load_clients_cache.clear()
-        return True
+        uploaded_clients = pd.read_csv(file, dtype="string")
+        if not all(col in uploaded_clients.columns for col in CLIENTS_COLUMNS):
+            st.error("Colonnes manquantes dans le fichier CSV.")
+            return None
+        result = upsert_rows("clients", uploaded_clients)
+        enqueue_push(CLIENTS_FILE, "Upload de clients.csv")
+        return result
     except Exception as e:
         st.error(f"Erreur lors du chargement de clients.csv : {e}")
-        return False
\ No newline at end of file
+        return None
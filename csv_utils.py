@@ -0,0 +1,103 @@
+import codecs
+import gzip
+import os
+import shutil
+
+# Encodages reconnus par leur BOM (les CSV d'origine du dépôt sont en UTF-16)
+BOM_ENCODINGS = [(codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")]
+# Encodage d'un CSV sans BOM qui n'est pas en UTF-8 (export d'un tableur sous Windows)
+FALLBACK_ENCODING = "cp1252"
+
+def restore_from_gzip(file_path):
+    """
+    Recrée le CSV local depuis "<fichier>.gz" (format des gros fichiers dans le dépôt GitHub)
+    lorsque le CSV est absent ou plus ancien que l'archive.
+    """
+    gz_path = file_path + ".gz"
+    try:
+        gz_mtime = os.path.getmtime(gz_path)
+    except OSError:
+        return
+    if os.path.exists(file_path) and os.path.getmtime(file_path) >= gz_mtime:
+        return
+    with gzip.open(gz_path, "rb") as src, open(file_path + ".tmp", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(file_path + ".tmp", file_path)
+
+def can_append(file_path, columns):
+    """
+    Vérifie si des lignes peuvent être ajoutées à la fin du fichier CSV.
+    Le fichier doit exister, être encodé en UTF-8 et avoir l'en-tête attendu.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            header = f.readline()
+    except FileNotFoundError:
+        return False
+    try:
+        header = header.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        return False
+    return header == ",".join(columns)
+
+def append_rows(file_path, rows, columns):
+    """
+    Ajoute des lignes à la fin d'un fichier CSV existant sans le réécrire.
+    Args:
+        file_path (str): Chemin du fichier CSV.
+        rows (pd.DataFrame): Lignes à ajouter.
+        columns (list): Ordre des colonnes du fichier.
+    """
+    with open(file_path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    rows[columns].to_csv(file_path, mode="a", header=False, index=False)
+
+def bom_encoding(file_path):
+    """
+    Retourne l'encodage indiqué par le BOM d'un fichier CSV.
+    Returns:
+        str: 'utf-8-sig' ou 'utf-16', ou None si le fichier n'a pas de BOM (ou n'existe pas).
+    """
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(4)
+    except FileNotFoundError:
+        return None
+    for bom, encoding in BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+def is_utf8(file_path):
+    """Indique si un fichier se décode entièrement en UTF-8 (lu par blocs)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                decoder.decode(block)
+        decoder.decode(b"", final=True)
+        return True
+    except FileNotFoundError:
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def decode_csv(data):
+    """
+    Décode le contenu d'un fichier CSV : selon son BOM, sinon en UTF-8, sinon en FALLBACK_ENCODING.
+    Args:
+        data (bytes): Contenu brut du fichier.
+    Returns:
+        str: Contenu décodé, sans BOM.
+    """
+    for bom, encoding in BOM_ENCODINGS:
+        if data.startswith(bom):
+            return data.decode(encoding)
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode(FALLBACK_ENCODING, errors="replace")
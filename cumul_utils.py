@@ -0,0 +1,130 @@
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from storage_utils import get_table, table_version
+from perf_utils import instrument, record_cache
+
+# Index de sommes cumulées par jour : nom -> (table, colonne de regroupement)
+RANGE_INDEXES = {
+    "ventes_produit": ("ventes", "Produit_ID"),
+    "ventes_client": ("ventes", "Client_ID"),
+    "depenses_nom": ("depenses", "Nom"),
+}
+
+_lock = threading.Lock()
+
+@st.cache_resource(show_spinner=False)
+def _range_indexes():
+    return {}
+
+@instrument("index")
+def _build_range_index(table, key):
+    # Sommes par couple (clé, jour) présent dans la table, triées par clé puis par jour, et leurs sommes
+    # cumulées : le total d'une clé sur une période est la différence des cumuls aux deux bornes.
+    # La mémoire suit le nombre de couples présents (au plus le nombre de lignes), pas jours x clés.
+    df = get_table(table, ["Date", key, "Prix"])
+    dates = df["Date"]
+    valid = dates.notna().to_numpy()
+    if not valid.any():
+        return {"first": None, "n_days": 0, "keys": pd.Index([]), "cells": np.zeros(0, dtype=np.int64),
+                "sums": np.zeros(1), "counts": np.zeros(1, dtype=np.int64)}
+    dates = dates[valid].dt.normalize()
+    first = dates.min()
+    days = (dates - first).dt.days.to_numpy()
+    codes, keys = pd.factorize(df[key][valid], use_na_sentinel=False)
+    n_days = int(days.max()) + 1
+    # Cellule = clé * (n_days + 1) + jour : les bornes 0..n_days d'une clé ne débordent pas sur la suivante
+    cells, inverse = np.unique(codes.astype(np.int64) * (n_days + 1) + days, return_inverse=True)
+    prices = df["Prix"][valid].astype("float64").fillna(0.0).to_numpy()
+    sums = np.concatenate([[0.0], np.cumsum(np.bincount(inverse, weights=prices))])
+    counts = np.concatenate([[0], np.cumsum(np.bincount(inverse))])
+    return {"first": first, "n_days": n_days, "keys": pd.Index(keys), "cells": cells, "sums": sums, "counts": counts}
+
+@instrument("index")
+def _build_month_index(table):
+    # Montant et nombre de lignes par mois, indexés par la clé numérique du mois (année * 12 + mois - 1)
+    df = get_table(table, ["Date", "Prix"]).dropna(subset=["Date"])
+    if df.empty:
+        return {"first": 0, "sums": np.zeros(0), "counts": np.zeros(0, dtype=np.int64)}
+    keys = month_key(df["Date"]).to_numpy()
+    first = int(keys.min())
+    prices = df["Prix"].astype("float64").fillna(0.0).to_numpy()
+    return {"first": first,
+            "sums": np.bincount(keys - first, weights=prices),
+            "counts": np.bincount(keys - first)}
+
+def _get_index(name, table, build):
+    version = table_version(table)
+    with _lock:
+        entry = _range_indexes().get(name)
+        hit = entry is not None and entry["version"] == version
+        record_cache(f"cumul.{name}", hit)
+        if hit:
+            return entry
+    # Construction une seule fois par version de la table
+    entry = build()
+    entry["version"] = version
+    with _lock:
+        _range_indexes()[name] = entry
+    return entry
+
+def _get_range_index(name):
+    table, key = RANGE_INDEXES[name]
+    return _get_index(name, table, lambda: _build_range_index(table, key))
+
+def _get_month_index(table):
+    return _get_index(f"{table}_mois", table, lambda: _build_month_index(table))
+
+def month_key(dates):
+    """Clé numérique du mois (année * 12 + mois - 1) d'une série de dates datetime64."""
+    return dates.dt.year.astype("int64") * 12 + dates.dt.month.astype("int64") - 1
+
+def distinct_months(table):
+    """Retourne les clés des mois ayant au moins une ligne dans la table, triées."""
+    entry = _get_month_index(table)
+    return (np.flatnonzero(entry["counts"]) + entry["first"]).tolist()
+
+def month_totals(table, months=None):
+    """
+    Retourne le total des montants par mois, seulement pour les mois demandés.
+    Args:
+        table (str): 'ventes' ou 'depenses'.
+        months (list): Clés des mois (voir month_key) ; tous les mois si None.
+    Returns:
+        pd.Series: Montant par clé de mois, limité aux mois ayant au moins une ligne.
+    """
+    entry = _get_month_index(table)
+    if months is None:
+        positions = np.flatnonzero(entry["counts"])
+    else:
+        positions = np.asarray(sorted(set(months)), dtype=np.int64) - entry["first"]
+        positions = positions[(positions >= 0) & (positions < len(entry["counts"]))]
+        positions = positions[entry["counts"][positions] > 0]
+    return pd.Series(entry["sums"][positions], index=positions + entry["first"], dtype="float64")
+
+def _day_offset(entry, date):
+    offset = (pd.Timestamp(date).normalize() - entry["first"]).days
+    return min(max(offset, 0), entry["n_days"])
+
+def range_totals(name, start_date=None, end_date=None):
+    """
+    Retourne le total des montants par clé sur une période, à partir des sommes cumulées par jour.
+    Args:
+        name (str): Nom de l'index (voir RANGE_INDEXES).
+        start_date, end_date: Bornes incluses de la période ; toutes les dates si l'une manque.
+    Returns:
+        pd.Series: Montant par clé, limité aux clés ayant au moins une ligne dans la période.
+    """
+    entry = _get_range_index(name)
+    start, stop = 0, entry["n_days"]
+    if start_date and end_date and entry["first"] is not None:
+        start = _day_offset(entry, start_date)
+        stop = max(start, _day_offset(entry, pd.Timestamp(end_date) + pd.Timedelta(days=1)))
+    # Première cellule de chaque clé à partir du jour start, puis du jour stop (exclu)
+    base = np.arange(len(entry["keys"]), dtype=np.int64) * (entry["n_days"] + 1)
+    lo = np.searchsorted(entry["cells"], base + start)
+    hi = np.searchsorted(entry["cells"], base + stop)
+    totals = entry["sums"][hi] - entry["sums"][lo]
+    present = (entry["counts"][hi] - entry["counts"][lo]) > 0
+    return pd.Series(totals[present], index=entry["keys"][present], dtype="float64")
@@ -1,24 +1,28 @@
 import pandas as pd
 import streamlit as st
-import os
-from github_utils import push_to_github
+from sync_utils import enqueue_push
+from storage_utils import TABLES, get_table, table_version, next_id, insert_rows, delete_rows, upload_new_rows
+from benefice_utils import benefice_rows_added, benefice_rows_removed
+from memo_utils import memoize, skip_memo
+from vue_utils import filter_dates, page_rows
+from perf_utils import instrument
 
-# Créer le dossier data/ s'il n’existe pas
-os.makedirs("data", exist_ok=True)
-DEPENSES_FILE = "data/depenses.csv"
+DEPENSES_FILE = TABLES["depenses"]["file"]
+DEPENSES_COLUMNS = TABLES["depenses"]["columns"]
 
-@st.cache_data
-def load_depenses_cache(_invalidate=False):
+@instrument("chargement")
+def load_depenses_cache(columns=None):
     try:
-        return pd.read_csv(DEPENSES_FILE)
-    except FileNotFoundError:
-        return pd.DataFrame(columns=["Depense_ID", "Date", "Nom", "Prix"])
+        return get_table("depenses", columns)
     except Exception as e:
         st.error(f"Erreur lors du chargement des dépenses : {e}")
-        return pd.DataFrame(columns=["Depense_ID", "Date", "Nom", "Prix"])
+        skip_memo()
+        return pd.DataFrame(columns=columns or DEPENSES_COLUMNS)
 
-def get_depenses_affichage():
-    depenses = load_depenses_cache(_invalidate=True)
+@memoize("depenses")
+def _depenses_resume():
+    # Regroupement fait une seule fois par version de la table, puis réutilisé pour chaque page
+    depenses = load_depenses_cache()
     if depenses.empty:
         return pd.DataFrame(columns=["Depense_ID", "Date", "Noms", "Total"])
     # Regrouper par Depense_ID et Date
@@ -29,20 +33,46 @@ def get_depenses_affichage():
     grouped = grouped.rename(columns={"Nom": "Noms", "Prix": "Total"})
     return grouped[["Depense_ID", "Date", "Noms", "Total"]]
 
+@instrument("chargement")
+def get_depenses_affichage(page=1, page_size=None, start_date=None, end_date=None,
+                           sort_by="Depense_ID", ascending=True):
+    """
+    Retourne une page de la liste des dépenses (une ligne par dépense), filtrée et triée côté serveur.
+    Args:
+        page (int): Numéro de la page, à partir de 1.
+        page_size (int): Nombre de dépenses par page ; toutes les dépenses si None.
+        start_date, end_date: Période des dépenses (bornes incluses) ; toutes les dates si absentes.
+        sort_by (str): Colonne de tri (Depense_ID, Date ou Total).
+        ascending (bool): Ordre croissant ou décroissant.
+    Returns:
+        tuple: (pd.DataFrame de la page, nombre total de dépenses correspondant aux filtres).
+    """
+    try:
+        depenses = _depenses_resume()
+        if start_date or end_date:
+            depenses = filter_dates(depenses, start_date, end_date)
+        # Le regroupement est déjà trié par Depense_ID
+        if sort_by == "Depense_ID" and ascending:
+            sort_by = None
+        return page_rows(depenses, page, page_size, sort_by, ascending)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des dépenses : {e}")
+        return pd.DataFrame(columns=["Depense_ID", "Date", "Noms", "Total"]), 0
+
+@instrument("chargement")
 def get_depense_details(depense_id):
-    depenses = load_depenses_cache(_invalidate=True)
-    if depenses[depenses["Depense_ID"] == depense_id].empty:
+    depenses = load_depenses_cache(["Depense_ID", "Date", "Nom", "Prix"])
+    details = depenses[depenses["Depense_ID"] == depense_id]
+    if details.empty:
         return pd.DataFrame()
-    return depenses[depenses["Depense_ID"] == depense_id][["Date", "Nom", "Prix"]]
+    return details[["Date", "Nom", "Prix"]]
 
+@instrument("écriture")
 def save_depense(date, noms, prix_list):
     try:
-        depenses = load_depenses_cache(_invalidate=True)
-        new_depense_id = int(depenses["Depense_ID"].max() + 1 if not depenses.empty else 1)
         new_depenses = []
         for nom, prix in zip(noms, prix_list):
             new_depenses.append({
-                "Depense_ID": new_depense_id,
                 "Date": date,
                 "Nom": nom,
                 "Prix": prix
@@ -50,55 +80,51 @@ def save_depense(date, noms, prix_list):
         if not new_depenses:
             st.error("Aucune dépense valide à enregistrer.")
             return False
+        new_depense_id = next_id("depenses")
         new_depenses_df = pd.DataFrame(new_depenses)
-        depenses = pd.concat([depenses, new_depenses_df], ignore_index=True)
-        depenses.to_csv(DEPENSES_FILE, index=False)
-        with open(DEPENSES_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/depenses.csv", content, f"Ajout de la dépense ID {new_depense_id}")
-        load_depenses_cache.clear()
+        new_depenses_df["Depense_ID"] = new_depense_id
+        version = table_version("depenses")
+        insert_rows("depenses", new_depenses_df)
+        benefice_rows_added("depenses", version, new_depenses_df)
+        enqueue_push(DEPENSES_FILE, f"Ajout de la dépense ID {new_depense_id}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de l’enregistrement de la dépense : {e}")
         return False
 
+@instrument("écriture")
 def delete_depense(depense_id):
     try:
-        depenses = load_depenses_cache(_invalidate=True)
-        if depenses[depenses["Depense_ID"] == depense_id].empty:
+        depenses = load_depenses_cache()
+        lignes = depenses[depenses["Depense_ID"] == depense_id]
+        if lignes.empty:
             st.error("Dépense non trouvée.")
             return False
-        depenses = depenses[depenses["Depense_ID"] != depense_id]
-        depenses.to_csv(DEPENSES_FILE, index=False)
-        with open(DEPENSES_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/depenses.csv", content, f"Suppression de la dépense ID {depense_id}")
-        load_depenses_cache.clear()
+        version = table_version("depenses")
+        delete_rows("depenses", "Depense_ID", [depense_id])
+        benefice_rows_removed("depenses", version, lignes)
+        enqueue_push(DEPENSES_FILE, f"Suppression de la dépense ID {depense_id}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de la suppression de la dépense : {e}")
         return False
 
-def upload_depenses(file):
+@instrument("écriture")
+def upload_depenses(file, progress=None):
+    """
+    Ajoute les dépenses d'un CSV (même format que depenses.csv), lu par morceaux.
+    Une ligne dont la clé (Depense_ID, Date, Nom) existe déjà est ignorée.
+    Args:
+        file: Fichier CSV téléversé.
+        progress (callable): Appelé après chaque morceau avec les compteurs courants.
+    Returns:
+        dict: {inserted, skipped, invalid} ou None en cas d'erreur.
+    """
     try:
-        uploaded_depenses = pd.read_csv(file)
-        current_depenses = load_depenses_cache(_invalidate=True)
-        expected_cols = ["Depense_ID", "Date", "Nom", "Prix"]
-        if not all(col in uploaded_depenses.columns for col in expected_cols):
-            st.error("Colonnes manquantes dans le fichier CSV.")
-            return False
-        if not current_depenses.empty:
-            merged_depenses = pd.concat([current_depenses, uploaded_depenses], ignore_index=True)
-            merged_depenses = merged_depenses.drop_duplicates(subset=["Depense_ID", "Date", "Nom"], keep="last")
-        else:
-            merged_depenses = uploaded_depenses
-        merged_depenses["Depense_ID"] = merged_depenses.groupby(["Depense_ID"]).ngroup() + 1
-        merged_depenses.to_csv(DEPENSES_FILE, index=False)
-        with open(DEPENSES_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/depenses.csv", content, "Upload de depenses.csv")
-        load_depenses_cache.clear()
-        return True
+        counts = upload_new_rows("depenses", file, ["Depense_ID", "Date", "Nom"], progress)
+        if counts["inserted"]:
+            enqueue_push(DEPENSES_FILE, "Upload de depenses.csv")
+        return counts
     except Exception as e:
         st.error(f"Erreur lors du chargement de depenses.csv : {e}")
-        return False
\ No newline at end of file
+        return None
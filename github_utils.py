@@ -1,7 +1,273 @@
 import streamlit as st
-from github import Github
+from concurrent.futures import ThreadPoolExecutor
 import base64
-import os
+import gzip
+import threading
+import time
+from csv_utils import decode_csv
+from perf_utils import instrument, timed
+
+BRANCH = "master"
+
+# SHA du dernier blob connu pour chaque fichier : évite un get_contents avant chaque mise à jour
+_blob_shas = {}
+_stats = {"requests_made": 0, "requests_saved": 0}
+_stats_lock = threading.Lock()
+_push_lock = threading.Lock()
+MAX_UPLOAD_WORKERS = 8
+# Au-delà, l'API contents ne sait plus lire le fichier : il est envoyé compressé ("<fichier>.gz") via l'API Git Data
+LARGE_FILE_THRESHOLD = 1_000_000
+# Fichiers dont la version distante est compressée. Un fichier absent de cet ensemble et de
+# _blob_shas n'est pas encore connu du processus (ex. après un redémarrage) : le dépôt est consulté
+_compressed_paths = set()
+
+def _github():
+    # PyGithub n'est importé qu'au premier appel à l'API, pas au démarrage de l'application
+    import github
+    return github
+
+class _TokenBucket:
+    """
+    Limiteur de débit local, recalé sur les en-têtes X-RateLimit-* de GitHub.
+    """
+    def __init__(self, limit=5000):
+        self.capacity = limit
+        self.rate = limit / 3600.0
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            wait = max(0.0, self.blocked_until - time.time())
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                wait = max(wait, (1 - self.tokens) / self.rate)
+            self.tokens -= 1
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(self, remaining, limit, reset_time):
+        if limit <= 0:
+            return
+        with self.lock:
+            self.capacity = limit
+            self.rate = limit / 3600.0
+            self.tokens = min(self.tokens, float(remaining))
+            self.blocked_until = reset_time if remaining == 0 else 0.0
+
+def _github_settings():
+    # Récupérer les secrets (sans fichier de secrets, st.secrets afficherait une erreur sur la page)
+    if not st.secrets.load_if_toml_exists():
+        raise RuntimeError("aucun fichier de secrets, [github] token et repo sont nécessaires")
+    # "api_url" permet de viser un faux serveur GitHub local (tests)
+    return {"token": st.secrets["github"]["token"], "repo": st.secrets["github"]["repo"],
+            "api_url": st.secrets["github"].get("api_url")}
+
+def _make_repo(settings):
+    # Le dépôt est chargé paresseusement (aucune requête)
+    github = _github()
+    auth = github.Auth.Token(settings["token"])
+    api_url = settings.get("api_url")
+    g = github.Github(auth=auth, base_url=api_url) if api_url else github.Github(auth=auth)
+    return g.get_repo(settings["repo"], lazy=True)
+
+class _Client:
+    """
+    Connexion au dépôt pour tout le processus : client PyGithub, limiteur de débit et pool
+    d'envoi des blobs. Une connexion PyGithub ne se partage pas entre threads : chaque thread
+    du pool crée la sienne au premier envoi et la garde ensuite.
+    """
+    def __init__(self, settings):
+        self.settings = settings
+        self.repo = _make_repo(settings)
+        self.bucket = _TokenBucket()
+        self.pool = ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS, thread_name_prefix="github-upload")
+        self.local = threading.local()
+
+    def thread_repo(self):
+        if not hasattr(self.local, "repo"):
+            self.local.repo = _make_repo(self.settings)
+        return self.local.repo
+
+@st.cache_resource
+def _get_client():
+    # Client unique pour le processus
+    return _Client(_github_settings())
+
+def _call(bucket, repo, method, *args, **kwargs):
+    bucket.acquire()
+    with _stats_lock:
+        _stats["requests_made"] += 1
+    try:
+        with timed(f"github.{method.__name__}", "github"):
+            return method(*args, **kwargs)
+    finally:
+        # En-têtes de la dernière réponse, lus sans requête supplémentaire
+        remaining, limit = repo._requester.rate_limiting
+        bucket.update(remaining, limit, repo._requester.rate_limiting_resettime)
+
+def _request_saved():
+    # Lecture (GET) évitée parce que la réponse est déjà connue du processus
+    with _stats_lock:
+        _stats["requests_saved"] += 1
+
+def _get_remote_sha(bucket, repo, file_path):
+    try:
+        return _call(bucket, repo, repo.get_contents, file_path, ref=BRANCH).sha
+    except _github().UnknownObjectException:
+        return None
+
+def _push_file(file_path, content, commit_message, client=None):
+    """
+    Pousse un fichier vers le dépôt GitHub et lève une exception en cas d'échec.
+    Utilisé par la file de synchronisation, qui gère elle-même les erreurs.
+    """
+    client = client or _get_client()
+    repo, bucket = client.repo, client.bucket
+    with _push_lock:
+        sha = _blob_shas.get(file_path)
+        if sha is None:
+            sha = _get_remote_sha(bucket, repo, file_path)
+        else:
+            _request_saved()
+        try:
+            if sha:
+                result = _call(bucket, repo, repo.update_file, path=file_path, message=commit_message,
+                               content=content, sha=sha, branch=BRANCH)
+            else:
+                result = _call(bucket, repo, repo.create_file, path=file_path, message=commit_message,
+                               content=content, branch=BRANCH)
+        except _github().GithubException as e:
+            # 409/422 : SHA périmé ou fichier créé ailleurs, on relit le SHA et on réessaie une fois
+            if e.status not in (409, 422):
+                _blob_shas.pop(file_path, None)
+                raise
+            sha = _get_remote_sha(bucket, repo, file_path)
+            if sha is None:
+                # Fichier retiré (ou compressé par un autre serveur) : il sera revérifié au prochain envoi
+                _blob_shas.pop(file_path, None)
+                raise
+            result = _call(bucket, repo, repo.update_file, path=file_path, message=commit_message,
+                           content=content, sha=sha, branch=BRANCH)
+        _blob_shas[file_path] = result["content"].sha
+
+def _is_large(content):
+    return len(content.encode("utf-8")) > LARGE_FILE_THRESHOLD
+
+def _upload_blob(client, content, compress):
+    repo = client.thread_repo()
+    if compress:
+        payload = base64.b64encode(gzip.compress(content.encode("utf-8"))).decode("ascii")
+        return _call(client.bucket, repo, repo.create_git_blob, payload, "base64").sha
+    return _call(client.bucket, repo, repo.create_git_blob, content, "utf-8").sha
+
+def _get_tree_entries(bucket, repo, tree_sha):
+    tree = _call(bucket, repo, repo.get_git_tree, tree_sha, recursive=True)
+    return {element.path: element.sha for element in tree.tree}
+
+def _commit_files(files, commit_message, client=None):
+    """
+    Crée un seul commit contenant tous les fichiers via l'API Git Data
+    (blobs envoyés en parallèle, un arbre, un commit, un déplacement de la branche).
+    Les gros fichiers sont envoyés compressés sous "<fichier>.gz" et leur version
+    non compressée est retirée de l'arbre (et inversement quand un fichier redevient petit).
+    Lève une exception en cas d'échec ; la branche n'est alors pas modifiée.
+    """
+    client = client or _get_client()
+    repo, bucket = client.repo, client.bucket
+    paths = list(files)
+    compress = {path: _is_large(files[path]) for path in paths}
+    blob_shas = list(client.pool.map(lambda path: _upload_blob(client, files[path], compress[path]), paths))
+    remote_paths = [path + ".gz" if compress[path] else path for path in paths]
+    elements = [_github().InputGitTreeElement(remote, "100644", "blob", sha=sha) for remote, sha in zip(remote_paths, blob_shas)]
+    # L'arbre est lu s'il peut contenir l'autre version d'un fichier (compressée ou non)
+    check_tree = any(compress.values()) or any(path in _compressed_paths or path not in _blob_shas for path in paths)
+    with _push_lock:
+        for attempt in range(3):
+            ref = _call(bucket, repo, repo.get_git_ref, f"heads/{BRANCH}")
+            parent = _call(bucket, repo, repo.get_git_commit, ref.object.sha)
+            removals = []
+            if check_tree:
+                entries = _get_tree_entries(bucket, repo, parent.tree.sha)
+                for path in paths:
+                    other = path if compress[path] else path + ".gz"
+                    if other in entries:
+                        removals.append(_github().InputGitTreeElement(other, "100644", "blob", sha=None))
+            else:
+                _request_saved()
+            tree = _call(bucket, repo, repo.create_git_tree, elements + removals, parent.tree)
+            commit = _call(bucket, repo, repo.create_git_commit, commit_message, tree, [parent])
+            try:
+                _call(bucket, repo, ref.edit, commit.sha)
+                break
+            except _github().GithubException as e:
+                # 422 : la branche a avancé entre-temps, on recommence sur le nouveau parent
+                if e.status != 422 or attempt == 2:
+                    raise
+        for path, sha in zip(paths, blob_shas):
+            if compress[path]:
+                _compressed_paths.add(path)
+                _blob_shas.pop(path, None)
+            else:
+                _compressed_paths.discard(path)
+                _blob_shas[path] = sha
+
+def _is_compressed_remote(file_path, client=None):
+    # Version distante compressée ? Vérifiée dans le dépôt si le processus ne la connaît pas,
+    # sinon un fichier redevenu petit passerait par l'API contents et son "<fichier>.gz" resterait
+    if file_path not in _compressed_paths and file_path not in _blob_shas:
+        client = client or _get_client()
+        if _get_remote_sha(client.bucket, client.repo, file_path + ".gz") is not None:
+            _compressed_paths.add(file_path)
+    else:
+        _request_saved()
+    return file_path in _compressed_paths
+
+@instrument("github")
+def _push_files(files, commit_message, client=None):
+    """
+    Pousse plusieurs fichiers en un seul commit et lève une exception en cas d'échec.
+    Un petit fichier seul passe par l'API contents, qui demande moins de requêtes.
+    Args:
+        files (dict): Chemin du fichier -> contenu.
+        commit_message (str): Message du commit.
+        client (_Client): Client de _get_client(), résolu par l'appelant quand il n'a pas de
+            ScriptRunContext (thread de synchronisation) ; par défaut celui du processus.
+    """
+    if len(files) == 1:
+        file_path, content = next(iter(files.items()))
+        if not _is_large(content) and not _is_compressed_remote(file_path, client):
+            _push_file(file_path, content, commit_message, client)
+            return
+    _commit_files(files, commit_message, client)
+
+@instrument("github")
+def _pull_file(file_path, client=None):
+    """
+    Télécharge la dernière version d'un fichier depuis la branche via l'API Git Data,
+    qui accepte les blobs au-delà de la limite de l'API contents.
+    Returns:
+        str: Contenu du fichier, ou None s'il n'existe pas dans le dépôt.
+    """
+    client = client or _get_client()
+    repo, bucket = client.repo, client.bucket
+    ref = _call(bucket, repo, repo.get_git_ref, f"heads/{BRANCH}")
+    commit = _call(bucket, repo, repo.get_git_commit, ref.object.sha)
+    entries = _get_tree_entries(bucket, repo, commit.tree.sha)
+    if file_path + ".gz" in entries:
+        blob = _call(bucket, repo, repo.get_git_blob, entries[file_path + ".gz"])
+        _compressed_paths.add(file_path)
+        return decode_csv(gzip.decompress(base64.b64decode(blob.content)))
+    if file_path in entries:
+        blob = _call(bucket, repo, repo.get_git_blob, entries[file_path])
+        _compressed_paths.discard(file_path)
+        _blob_shas[file_path] = entries[file_path]
+        return decode_csv(base64.b64decode(blob.content))
+    return None
 
 def push_to_github(file_path, content, commit_message):
     """
@@ -14,34 +280,54 @@ def push_to_github(file_path, content, commit_message):
         bool: True si succès, False sinon.
     """
     try:
-        # Récupérer les secrets
-        github_token = st.secrets["github"]["token"]
-        repo_name = st.secrets["github"]["repo"]
-
-        # Initialiser le client GitHub
-        g = Github(github_token)
-        repo = g.get_repo(repo_name)
+        _push_files({file_path: content}, commit_message)
+        return True
+    except Exception as e:
+        st.error(f"Erreur lors du push vers GitHub : {e}")
+        return False
 
-        # Vérifier si le fichier existe dans le dépôt
-        try:
-            file = repo.get_contents(file_path)
-            # Mettre à jour le fichier
-            repo.update_file(
-                path=file_path,
-                message=commit_message,
-                content=content,
-                sha=file.sha,
-                branch="master"
-            )
-        except:
-            # Créer le fichier s'il n'existe pas
-            repo.create_file(
-                path=file_path,
-                message=commit_message,
-                content=content,
-                branch="master"
-            )
+def push_files_to_github(files, commit_message):
+    """
+    Pousse plusieurs fichiers modifiés vers le dépôt GitHub en un seul commit.
+    Args:
+        files (dict): Chemin du fichier -> contenu (ex. {'data/ventes.csv': '...'}).
+        commit_message (str): Message du commit.
+    Returns:
+        bool: True si succès, False sinon.
+    """
+    try:
+        _push_files(files, commit_message)
         return True
     except Exception as e:
         st.error(f"Erreur lors du push vers GitHub : {e}")
-        return False
\ No newline at end of file
+        return False
+
+def pull_from_github(file_path):
+    """
+    Remplace le fichier local par sa version du dépôt GitHub (compressée ou non).
+    Args:
+        file_path (str): Chemin du fichier (ex. 'data/ventes.csv').
+    Returns:
+        bool: True si le fichier a été récupéré, False sinon.
+    """
+    try:
+        content = _pull_file(file_path)
+        if content is None:
+            st.warning(f"Fichier {file_path} absent du dépôt GitHub.")
+            return False
+        with open(file_path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        return True
+    except Exception as e:
+        st.error(f"Erreur lors de la récupération depuis GitHub : {e}")
+        return False
+
+def get_github_stats():
+    """
+    Retourne les compteurs d'appels à l'API GitHub.
+    Returns:
+        dict: requests_made (requêtes envoyées), requests_saved (lectures évitées
+            parce que le SHA ou l'arbre du fichier était déjà connu).
+    """
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,84 @@
+import threading
+import streamlit as st
+from storage_utils import get_table, table_version
+from perf_utils import instrument, record_cache
+
+# Index par nom normalisé : table -> (colonnes de la clé, colonne d'identifiant)
+INDEXED_TABLES = {
+    "clients": (["Nom", "Prénom"], "Client_ID"),
+    "produits": (["Nom"], "Produit_ID"),
+}
+
+_lock = threading.Lock()
+
+def normalize(value):
+    """Forme normalisée d'un nom pour les recherches (insensible à la casse et aux espaces autour)."""
+    return str(value).strip().lower()
+
+@st.cache_resource(show_spinner=False)
+def _indexes():
+    return {}
+
+@instrument("index")
+def _build_index(name):
+    key_columns, id_column = INDEXED_TABLES[name]
+    df = get_table(name, [id_column] + key_columns)
+    index = {}
+    keys = zip(*(df[col].astype("string").fillna("").str.strip().str.lower() for col in key_columns))
+    for key, row_id in zip(keys, df[id_column]):
+        index.setdefault(tuple(key), []).append(int(row_id))
+    return index
+
+def _get_index(name):
+    version = table_version(name)
+    with _lock:
+        entry = _indexes().get(name)
+        hit = entry is not None and entry["version"] == version
+        record_cache(f"index.{name}", hit)
+        if hit:
+            return entry["index"]
+    # Construction une seule fois par version de la table
+    index = _build_index(name)
+    with _lock:
+        _indexes()[name] = {"version": version, "index": index}
+    return index
+
+def _update_index(name, old_version, apply):
+    # L'index n'est mis à jour sur place que s'il reflétait exactement la version précédant
+    # l'écriture ; sinon (écriture concurrente, index absent) il sera reconstruit à la demande
+    new_version = table_version(name)
+    with _lock:
+        entry = _indexes().get(name)
+        if entry is None:
+            return
+        if entry["version"] == old_version and new_version == old_version + 1:
+            apply(entry["index"])
+            entry["version"] = new_version
+        else:
+            del _indexes()[name]
+
+def find_client_ids(nom, prenom):
+    """Retourne les Client_ID correspondant au nom et prénom (liste vide si aucun)."""
+    return list(_get_index("clients").get((normalize(nom), normalize(prenom)), []))
+
+def find_produit_ids(nom):
+    """Retourne les Produit_ID correspondant au nom du produit (liste vide si aucun)."""
+    return list(_get_index("produits").get((normalize(nom),), []))
+
+def index_inserted(name, old_version, rows):
+    """Ajoute à l'index les lignes insérées dans la table (rows : DataFrame)."""
+    key_columns, id_column = INDEXED_TABLES[name]
+    def apply(index):
+        for _, row in rows.iterrows():
+            index.setdefault(tuple(normalize(row[col]) for col in key_columns), []).append(int(row[id_column]))
+    _update_index(name, old_version, apply)
+
+def index_deleted(name, old_version, key):
+    """Retire de l'index la clé (nom, ou nom et prénom) dont toutes les lignes ont été supprimées."""
+    def apply(index):
+        index.pop(tuple(normalize(value) for value in key), None)
+    _update_index(name, old_version, apply)
+
+def index_unchanged(name, old_version):
+    """Signale une écriture qui ne touche pas aux noms (ex. changement de prix)."""
+    _update_index(name, old_version, lambda index: None)
@@ -0,0 +1,158 @@
+import json
+import os
+import pandas as pd
+
+# Taille du journal d'une table au-delà de laquelle il est replié dans le CSV
+JOURNAL_MAX_BYTES = 256 * 1024
+
+def journal_path(file_path):
+    """Chemin du journal des modifications d'un fichier CSV."""
+    return file_path + ".journal"
+
+def _snapshot_stamp(file_path):
+    # Identifie le CSV sur lequel le journal s'applique : un CSV remplacé (repli, upload,
+    # restauration) a une autre taille, date ou inode, et l'ancien journal est alors ignoré
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+def _json_value(value):
+    # Valeurs numpy/pandas passées par les appelants (identifiants, prix)
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+def _read_lines(file_path):
+    try:
+        with open(journal_path(file_path), "r", encoding="utf-8") as f:
+            return f.read().split("\n")
+    except FileNotFoundError:
+        return []
+
+def read_journal(file_path):
+    """
+    Retourne les modifications journalisées d'un CSV, dans l'ordre d'écriture.
+    Le journal d'un autre état du CSV est ignoré ; une dernière ligne incomplète
+    (écriture interrompue) n'est pas rejouée.
+    Args:
+        file_path (str): Chemin du fichier CSV.
+    Returns:
+        list: Entrées {op, ...} à rejouer (liste vide si aucun journal valide).
+    """
+    lines = _read_lines(file_path)
+    # Le dernier élément est vide si la dernière ligne est complète, sinon c'est une écriture interrompue
+    complete = lines[:-1]
+    if not complete:
+        return []
+    try:
+        if json.loads(complete[0]).get("snapshot") != _snapshot_stamp(file_path):
+            return []
+    except ValueError:
+        return []
+    entries = []
+    for line in complete[1:]:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break
+    return entries
+
+def has_journal(file_path):
+    """Indique si le CSV a des modifications journalisées à rejouer."""
+    return bool(read_journal(file_path))
+
+def _journal_state(file_path, stamp):
+    # (journal valide pour ce CSV, journal terminé par une ligne complète)
+    try:
+        with open(journal_path(file_path), "rb") as f:
+            header = f.readline()
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - 1, 0))
+            complete = f.read(1) == b"\n"
+    except FileNotFoundError:
+        return False, False
+    try:
+        return header.endswith(b"\n") and json.loads(header).get("snapshot") == stamp, complete
+    except ValueError:
+        return False, complete
+
+def append_journal(file_path, entry):
+    """
+    Ajoute une modification au journal d'un CSV (ajout, modification ou suppression de lignes).
+    La ligne est écrite en une fois et forcée sur le disque avant de rendre la main.
+    Args:
+        file_path (str): Chemin du fichier CSV.
+        entry (dict): {op: 'insert', rows} | {op: 'update', column, values, changes} | {op: 'delete', column, values}.
+    Returns:
+        int: Taille du journal en octets.
+    """
+    path = journal_path(file_path)
+    stamp = _snapshot_stamp(file_path)
+    if "rows" in entry:
+        entry = dict(entry, rows=json.loads(entry["rows"].to_json(orient="records", force_ascii=False)))
+    line = json.dumps(entry, ensure_ascii=False, default=_json_value) + "\n"
+    current, complete = _journal_state(file_path, stamp)
+    if current and complete:
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        # Nouveau journal, journal d'un ancien état du CSV, ou fin interrompue à retirer
+        lines = _read_lines(file_path)[:-1] if current else [json.dumps({"snapshot": stamp})]
+        with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+            f.write("\n".join(lines) + "\n" + line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+    return os.path.getsize(path)
+
+def discard_journal(file_path):
+    """Supprime le journal d'un CSV (après un repli ou un remplacement complet du fichier)."""
+    try:
+        os.remove(journal_path(file_path))
+    except FileNotFoundError:
+        pass
+
+def replay_journal(df, entries, columns):
+    """
+    Rejoue des modifications journalisées sur le contenu du CSV.
+    Les suppressions successives sur une même colonne sont appliquées en une seule passe.
+    Args:
+        df (pd.DataFrame): Contenu du CSV (toutes les colonnes).
+        entries (list): Entrées retournées par read_journal.
+        columns (list): Colonnes de la table.
+    Returns:
+        pd.DataFrame: Contenu à jour.
+    """
+    inserted = []
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        if entry["op"] == "insert":
+            # Champs vides lus comme manquants, comme dans le CSV
+            inserted.append(pd.DataFrame.from_records(entry["rows"], columns=columns).replace({"": None}))
+            i += 1
+            continue
+        # Les ajouts en attente sont intégrés avant une modification ou une suppression qui peut les viser
+        if inserted:
+            df = pd.concat([df] + inserted, ignore_index=True) if not df.empty else pd.concat(inserted, ignore_index=True)
+            inserted = []
+        if entry["op"] == "delete":
+            values = list(entry["values"])
+            while i + 1 < len(entries) and entries[i + 1]["op"] == "delete" and entries[i + 1]["column"] == entry["column"]:
+                i += 1
+                values.extend(entries[i]["values"])
+            df = df[~df[entry["column"]].isin(values)].reset_index(drop=True)
+        elif entry["op"] == "update":
+            mask = df[entry["column"]].isin(entry["values"])
+            for col, value in entry["changes"].items():
+                if isinstance(df[col].dtype, pd.CategoricalDtype):
+                    df[col] = df[col].astype(object)
+                df.loc[mask, col] = value
+        i += 1
+    if inserted:
+        df = pd.concat([df] + inserted, ignore_index=True) if not df.empty else pd.concat(inserted, ignore_index=True)
+    return df
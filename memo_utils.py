@@ -0,0 +1,113 @@
+import functools
+import threading
+from collections import OrderedDict
+import pandas as pd
+import streamlit as st
+from storage_utils import table_version
+from perf_utils import record_cache
+
+# Nombre maximal de résultats gardés par fonction (modifiable dans les secrets : [stats] cache_size = 256)
+DEFAULT_MEMO_SIZE = 64
+
+_lock = threading.Lock()
+# Indique, pour le calcul en cours sur ce thread, qu'une valeur de repli a été retournée après une erreur
+_state = threading.local()
+
+@st.cache_resource(show_spinner=False)
+def _memo_caches():
+    return {}
+
+def _get_memo_size():
+    try:
+        if not st.secrets.load_if_toml_exists():
+            return DEFAULT_MEMO_SIZE
+        return int(st.secrets["stats"]["cache_size"])
+    except Exception:
+        return DEFAULT_MEMO_SIZE
+
+def _freeze(value):
+    # Les listes (ex. mois sélectionnés) deviennent des tuples pour servir de clé
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _copy(result):
+    # Vue sans copie pour un DataFrame, copie d'une figure Plotly : une modification par l'appelant
+    # (ou par une autre session) ne touche pas le résultat mémorisé
+    if isinstance(result, pd.DataFrame):
+        return result.copy(deep=False)
+    if hasattr(result, "to_plotly_json"):
+        return type(result)(result)
+    return result
+
+def skip_memo():
+    """
+    Empêche la mémorisation du résultat en cours de calcul : à appeler avant de retourner une valeur
+    de repli après une erreur, pour que l'erreur soit de nouveau affichée à l'appel suivant.
+    Les fonctions mémorisées qui ont appelé celle-ci ne mémorisent pas non plus leur résultat.
+    """
+    _state.skip = True
+
+def memoize(*tables):
+    """
+    Mémorise les résultats d'une fonction selon ses paramètres, tant que les tables lues ne changent pas.
+    Les résultats d'une fonction sont tous oubliés dès que la version d'une de ses tables change ;
+    au-delà de la taille maximale, les moins récemment utilisés sont évincés.
+    Un résultat None (aucune donnée, avertissement affiché) n'est pas mémorisé, ni un résultat
+    de repli signalé par skip_memo().
+    Args:
+        tables (str): Tables lues par la fonction.
+    """
+    def decorator(func):
+        # Nom qualifié : deux fonctions de même nom dans des modules différents ont chacune leur cache
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            versions = tuple(table_version(table) for table in tables)
+            key = (_freeze(args), tuple(sorted((k, _freeze(v)) for k, v in kwargs.items())))
+            with _lock:
+                cache = _memo_caches().setdefault(name, {"versions": versions, "entries": OrderedDict(),
+                                                        "hits": 0, "misses": 0})
+                if cache["versions"] != versions:
+                    cache["versions"] = versions
+                    cache["entries"].clear()
+                hit = key in cache["entries"]
+                record_cache(f"memo.{name}", hit)
+                if hit:
+                    cache["entries"].move_to_end(key)
+                    cache["hits"] += 1
+                    return _copy(cache["entries"][key])
+                cache["misses"] += 1
+            outer_skip = getattr(_state, "skip", False)
+            _state.skip = False
+            try:
+                result = func(*args, **kwargs)
+                skip = _state.skip
+            finally:
+                _state.skip = outer_skip or _state.skip
+            if result is None or skip:
+                return result
+            with _lock:
+                if cache["versions"] == versions:
+                    cache["entries"][key] = result
+                    cache["entries"].move_to_end(key)
+                    while len(cache["entries"]) > _get_memo_size():
+                        cache["entries"].popitem(last=False)
+            return _copy(result)
+        return wrapper
+    return decorator
+
+def get_memo_stats():
+    """
+    Retourne, pour chaque fonction mémorisée, le nombre de résultats gardés, de succès et d'échecs du cache.
+    Returns:
+        dict: Nom qualifié de la fonction (module.fonction) -> {size, hits, misses, hit_rate}.
+    """
+    with _lock:
+        stats = {}
+        for name, cache in _memo_caches().items():
+            calls = cache["hits"] + cache["misses"]
+            stats[name] = {"size": len(cache["entries"]), "hits": cache["hits"], "misses": cache["misses"],
+                           "hit_rate": cache["hits"] / calls if calls else 0.0}
+        return stats
@@ -0,0 +1,248 @@
+import collections
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Nombre de durées récentes gardées par fonction pour les percentiles glissants
+WINDOW = 500
+# Export des agrégats : fichier par défaut du bouton d'export ; l'export automatique n'a lieu que si
+# [perf] export_file est donné dans les secrets, au plus toutes les [perf] export_interval secondes
+DEFAULT_EXPORT_FILE = "data/perf_stats.json"
+DEFAULT_EXPORT_INTERVAL = 60.0
+
+_lock = threading.Lock()
+# Mesures de l'exécution en cours du script, propres au thread qui l'exécute
+_run = threading.local()
+
+# Agrégats du processus, toutes sessions confondues. Simple variable de module plutôt qu'un
+# st.cache_resource : le thread de synchronisation, sans ScriptRunContext, y enregistre aussi ses mesures
+_process_stats = {"since": time.time(), "last_export": 0.0, "functions": {}, "caches": {}}
+
+def _aggregates():
+    return _process_stats
+
+def start_rerun():
+    """Commence la mesure d'une exécution du script (à appeler en tête de streamlit_app.py)."""
+    _run.start = time.perf_counter()
+    _run.records = []
+    _run.caches = collections.Counter()
+    _run.stack = []
+
+def _record(name, category, seconds, own_seconds, rows):
+    with _lock:
+        stats = _aggregates()["functions"].setdefault(name, {
+            "category": category, "calls": 0, "total_s": 0.0, "own_s": 0.0, "max_s": 0.0, "rows": 0,
+            "recent": collections.deque(maxlen=WINDOW)})
+        stats["calls"] += 1
+        stats["total_s"] += seconds
+        stats["own_s"] += own_seconds
+        stats["max_s"] = max(stats["max_s"], seconds)
+        stats["rows"] += rows or 0
+        stats["recent"].append(seconds)
+    records = getattr(_run, "records", None)
+    if records is not None:
+        records.append((name, category, seconds, own_seconds, rows))
+
+@contextlib.contextmanager
+def timed(name, category):
+    """
+    Mesure un bloc : durée, durée propre (hors blocs mesurés imbriqués) et lignes traitées.
+    Args:
+        name (str): Nom de la mesure (ex. 'github.update_file').
+        category (str): Regroupement affiché (chargement, écriture, statistiques, stockage, github...).
+    Yields:
+        dict: Mesure en cours ; "rows" peut y être renseigné (voir count_rows).
+    """
+    stack = getattr(_run, "stack", None)
+    if stack is None:
+        stack = _run.stack = []
+    frame = {"rows": None, "children": 0.0}
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1]["children"] += seconds
+        _record(name, category, seconds, seconds - frame["children"], frame["rows"])
+
+def count_rows(rows):
+    """Ajoute des lignes traitées à la mesure en cours (ex. lignes insérées par une écriture)."""
+    stack = getattr(_run, "stack", None)
+    if stack:
+        stack[-1]["rows"] = (stack[-1]["rows"] or 0) + int(rows)
+
+def _result_rows(result):
+    # Lignes retournées par une lecture : DataFrame, ou (page, total) pour les listes paginées
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, tuple) and result and isinstance(result[0], pd.DataFrame):
+        return len(result[0])
+    return None
+
+def instrument(category, name=None):
+    """
+    Mesure chaque appel d'une fonction (durée, nombre d'appels, lignes traitées).
+    Les lignes sont celles comptées pendant l'appel (count_rows), à défaut celles du DataFrame retourné.
+    Args:
+        category (str): Regroupement affiché (chargement, écriture, statistiques, stockage, github...).
+        name (str): Nom de la mesure ; par défaut 'module.fonction'.
+    """
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(label, category) as frame:
+                result = func(*args, **kwargs)
+                if frame["rows"] is None:
+                    frame["rows"] = _result_rows(result)
+                return result
+        return wrapper
+    return decorator
+
+def record_cache(name, hit):
+    """
+    Compte un succès ou un échec d'un cache (tables partagées, vues, index, statistiques mémorisées).
+    Args:
+        name (str): Nom du cache (ex. 'table.ventes').
+        hit (bool): True si le résultat a été servi par le cache.
+    """
+    with _lock:
+        stats = _aggregates()["caches"].setdefault(name, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+    caches = getattr(_run, "caches", None)
+    if caches is not None:
+        caches[(name, hit)] += 1
+
+def _cache_frame(counts):
+    rows = [{"Cache": name, "Succès": hits, "Échecs": misses,
+             "Taux de succès": hits / (hits + misses) if hits + misses else 0.0}
+            for name, (hits, misses) in sorted(counts.items())]
+    return pd.DataFrame(rows, columns=["Cache", "Succès", "Échecs", "Taux de succès"])
+
+def get_rerun_stats():
+    """
+    Retourne les mesures de l'exécution en cours du script.
+    Returns:
+        dict: elapsed_s (durée depuis start_rerun), categories (durée propre par catégorie),
+        calls (une ligne par fonction mesurée) et caches (succès et échecs par cache), en DataFrame.
+    """
+    records = getattr(_run, "records", None) or []
+    calls = pd.DataFrame(records, columns=["Nom", "Catégorie", "Durée (s)", "Durée propre (s)", "Lignes"])
+    caches = getattr(_run, "caches", collections.Counter())
+    counts = {}
+    for (cache, hit), count in caches.items():
+        counts.setdefault(cache, [0, 0])[0 if hit else 1] += count
+    grouped = calls.groupby(["Nom", "Catégorie"], sort=False).agg(
+        Appels=("Durée (s)", "size"), **{"Durée (ms)": ("Durée (s)", "sum"), "Durée propre (ms)": ("Durée propre (s)", "sum")},
+        Lignes=("Lignes", "sum")).reset_index()
+    grouped[["Durée (ms)", "Durée propre (ms)"]] *= 1000
+    grouped["Lignes"] = grouped["Lignes"].astype("int64")
+    categories = (calls.groupby("Catégorie")["Durée propre (s)"].sum() * 1000).rename("Durée propre (ms)")
+    return {
+        "elapsed_s": time.perf_counter() - _run.start if hasattr(_run, "start") else None,
+        "categories": categories.sort_values(ascending=False).reset_index(),
+        "calls": grouped.sort_values("Durée propre (ms)", ascending=False, kind="stable").reset_index(drop=True),
+        "caches": _cache_frame(counts),
+    }
+
+def get_perf_stats():
+    """
+    Retourne les agrégats du processus depuis son démarrage, avec les percentiles des WINDOW derniers appels.
+    Returns:
+        dict: since (horodatage de début), functions et caches en DataFrame.
+    """
+    with _lock:
+        aggregates = _aggregates()
+        functions = {name: dict(stats, recent=np.array(stats["recent"])) for name, stats in aggregates["functions"].items()}
+        caches = {name: [stats["hits"], stats["misses"]] for name, stats in aggregates["caches"].items()}
+        since = aggregates["since"]
+    rows = []
+    for name, stats in sorted(functions.items()):
+        recent = stats["recent"]
+        rows.append({
+            "Nom": name, "Catégorie": stats["category"], "Appels": stats["calls"],
+            "Durée totale (s)": stats["total_s"], "Durée propre (s)": stats["own_s"],
+            "Moyenne (ms)": stats["total_s"] / stats["calls"] * 1000, "Max (ms)": stats["max_s"] * 1000,
+            "p50 (ms)": float(np.percentile(recent, 50)) * 1000, "p95 (ms)": float(np.percentile(recent, 95)) * 1000,
+            "Lignes": stats["rows"],
+        })
+    columns = ["Nom", "Catégorie", "Appels", "Durée totale (s)", "Durée propre (s)", "Moyenne (ms)", "Max (ms)",
+               "p50 (ms)", "p95 (ms)", "Lignes"]
+    return {"since": since, "functions": pd.DataFrame(rows, columns=columns), "caches": _cache_frame(caches)}
+
+def _perf_rows(stats):
+    # Une ligne par fonction puis une ligne par cache (colonnes Succès / Échecs / Taux de succès)
+    caches = stats["caches"].rename(columns={"Cache": "Nom"}).assign(Catégorie="cache")
+    rows = pd.concat([stats["functions"], caches], ignore_index=True)
+    return rows.astype({col: "Int64" for col in ["Appels", "Lignes", "Succès", "Échecs"]})
+
+def perf_stats_csv():
+    """Retourne les agrégats du processus au format CSV (une ligne par fonction puis par cache)."""
+    return _perf_rows(get_perf_stats()).to_csv(index=False)
+
+def _get_perf_setting(key, default):
+    # Lu à chaque exécution : sans fichier de secrets, st.secrets afficherait une erreur sur la page
+    try:
+        if not st.secrets.load_if_toml_exists():
+            return default
+        return st.secrets["perf"][key]
+    except Exception:
+        return default
+
+def export_perf_stats(file_path=None):
+    """
+    Écrit les agrégats du processus dans un fichier JSON, ou CSV si le nom se termine par .csv.
+    Args:
+        file_path (str): Fichier de destination ; par défaut [perf] export_file, sinon DEFAULT_EXPORT_FILE.
+    Returns:
+        str: Chemin du fichier écrit, ou None en cas d'erreur.
+    """
+    file_path = file_path or _get_perf_setting("export_file", DEFAULT_EXPORT_FILE)
+    try:
+        stats = get_perf_stats()
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{file_path}.{os.getpid()}.tmp"
+        if file_path.endswith(".csv"):
+            _perf_rows(stats).to_csv(tmp_file, index=False)
+        else:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump({"since": stats["since"], "exported": time.time(), "pid": os.getpid(),
+                           "functions": stats["functions"].to_dict(orient="records"),
+                           "caches": stats["caches"].to_dict(orient="records")}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, file_path)
+        with _lock:
+            _aggregates()["last_export"] = time.time()
+        return file_path
+    except Exception as e:
+        st.error(f"Erreur lors de l'export des mesures : {e}")
+        return None
+
+def perf_panel_enabled():
+    """Indique si le panneau de mesures est demandé ([perf] panel = true dans les secrets, ou ?debug=1)."""
+    return bool(_get_perf_setting("panel", False)) or st.query_params.get("debug") == "1"
+
+def export_if_due():
+    """
+    Exporte les agrégats dans [perf] export_file si le dernier export date de plus de [perf] export_interval secondes.
+    Returns:
+        str: Chemin du fichier écrit si un export a eu lieu, None sinon.
+    """
+    file_path = _get_perf_setting("export_file", None)
+    if not file_path:
+        return None
+    interval = float(_get_perf_setting("export_interval", DEFAULT_EXPORT_INTERVAL))
+    with _lock:
+        due = time.time() - _aggregates()["last_export"] >= interval
+    return export_perf_stats(file_path) if due else None
@@ -1,93 +1,92 @@
 import pandas as pd
 import streamlit as st
-import os
-from github_utils import push_to_github
+from sync_utils import enqueue_push
+from storage_utils import TABLES, get_table, table_version, next_id, insert_rows, delete_rows, update_rows
+from index_utils import find_produit_ids, index_inserted, index_deleted, index_unchanged
+from upsert_utils import upsert_rows
+from vue_utils import vue_noms_changed, vue_unchanged
+from memo_utils import skip_memo
+from perf_utils import instrument
 
-# Créer le dossier data/ s'il n'existe pas
-os.makedirs("data", exist_ok=True)
-PRODUITS_FILE = "data/produits.csv"
+PRODUITS_FILE = TABLES["produits"]["file"]
+PRODUITS_COLUMNS = TABLES["produits"]["columns"]
 
-@st.cache_data
-def load_produits_cache(_invalidate=False):
+@instrument("chargement")
+def load_produits_cache(columns=None):
     try:
-        return pd.read_csv(PRODUITS_FILE)
-    except FileNotFoundError:
-        return pd.DataFrame(columns=["Produit_ID", "Nom", "Prix (au Kg)"])
+        return get_table("produits", columns)
     except Exception as e:
         st.error(f"Erreur lors du chargement des produits : {e}")
-        return pd.DataFrame(columns=["Produit_ID", "Nom", "Prix (au Kg)"])
+        skip_memo()
+        return pd.DataFrame(columns=columns or PRODUITS_COLUMNS)
 
+@instrument("écriture")
 def save_produit(nom, prix):
     try:
-        produits = load_produits_cache(_invalidate=True)
-        new_id = produits["Produit_ID"].max() + 1 if not produits.empty else 1
         new_produit = pd.DataFrame([{
-            "Produit_ID": new_id,
+            "Produit_ID": next_id("produits"),
             "Nom": nom,
             "Prix (au Kg)": prix
         }])
-        produits = pd.concat([produits, new_produit], ignore_index=True)
-        produits.to_csv(PRODUITS_FILE, index=False)
-        with open(PRODUITS_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/produits.csv", content, f"Ajout/modification du produit {nom}")
-        load_produits_cache.clear()
+        version = table_version("produits")
+        insert_rows("produits", new_produit)
+        index_inserted("produits", version, new_produit)
+        vue_noms_changed("produits", version, new_produit["Produit_ID"].tolist())
+        enqueue_push(PRODUITS_FILE, f"Ajout/modification du produit {nom}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de l’enregistrement du produit : {e}")
         return False
 
+@instrument("écriture")
 def delete_produit(nom):
     try:
-        produits = load_produits_cache(_invalidate=True)
-        if produits[produits["Nom"].str.lower() == nom.lower()].empty:
+        produit_ids = find_produit_ids(nom)
+        if not produit_ids:
             return False
-        produits = produits[produits["Nom"].str.lower() != nom.lower()]
-        produits.to_csv(PRODUITS_FILE, index=False)
-        with open(PRODUITS_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/produits.csv", content, f"Suppression du produit {nom}")
-        load_produits_cache.clear()
+        version = table_version("produits")
+        delete_rows("produits", "Produit_ID", produit_ids)
+        index_deleted("produits", version, (nom,))
+        vue_noms_changed("produits", version, produit_ids)
+        enqueue_push(PRODUITS_FILE, f"Suppression du produit {nom}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de la suppression du produit : {e}")
         return False
 
+@instrument("écriture")
 def modificate_price(nom, nouveau_prix):
     try:
-        produits = load_produits_cache(_invalidate=True)
-        if produits[produits["Nom"].str.lower() == nom.lower()].empty:
+        produit_ids = find_produit_ids(nom)
+        if not produit_ids:
             return False
-        produits.loc[produits["Nom"].str.lower() == nom.lower(), "Prix (au Kg)"] = nouveau_prix
-        produits.to_csv(PRODUITS_FILE, index=False)
-        with open(PRODUITS_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/produits.csv", content, f"Modification du prix du produit {nom}")
-        load_produits_cache.clear()
+        version = table_version("produits")
+        update_rows("produits", "Produit_ID", produit_ids, {"Prix (au Kg)": nouveau_prix})
+        index_unchanged("produits", version)
+        vue_unchanged("produits", version)
+        enqueue_push(PRODUITS_FILE, f"Modification du prix du produit {nom}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de la modification du prix : {e}")
         return False
 
+@instrument("écriture")
 def upload_produits(file):
+    """
+    Fusionne un CSV de produits dans la table sans changer les identifiants existants.
+    Args:
+        file: Fichier CSV téléversé (mêmes colonnes que produits.csv).
+    Returns:
+        dict: {inserted, updated, remap} (voir upsert_rows) ou None en cas d'erreur.
+    """
     try:
-        uploaded_produits = pd.read_csv(file)
-        current_produits = load_produits_cache(_invalidate=True)
-        expected_columns = ["Produit_ID", "Nom", "Prix (au Kg)"]
-        if not all(col in uploaded_produits.columns for col in expected_columns):
-            return False
-        if not current_produits.empty:
-            merged_produits = pd.concat([current_produits, uploaded_produits], ignore_index=True)
-            merged_produits = merged_produits.drop_duplicates(subset=["Nom"], keep="last")
-        else:
-            merged_produits = uploaded_produits
-        merged_produits["Produit_ID"] = range(1, len(merged_produits) + 1)
-        merged_produits.to_csv(PRODUITS_FILE, index=False)
-        with open(PRODUITS_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/produits.csv", content, "Upload de produits.csv")
-        load_produits_cache.clear()
-        return True
+        uploaded_produits = pd.read_csv(file, dtype="string")
+        if not all(col in uploaded_produits.columns for col in PRODUITS_COLUMNS):
+            st.error("Colonnes manquantes dans le fichier CSV.")
+            return None
+        result = upsert_rows("produits", uploaded_produits)
+        enqueue_push(PRODUITS_FILE, "Upload de produits.csv")
+        return result
     except Exception as e:
         st.error(f"Erreur lors du chargement de produits.csv : {e}")
-        return False
\ No newline at end of file
+        return None
@@ -0,0 +1,23 @@
+import importlib
+
+# Tailles de page proposées pour les listes de ventes et de dépenses
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Entrées du menu -> module de la section, importé seulement quand la section est affichée
+# (Plotly n'est chargé que par les Statistiques, PyGithub qu'à la première synchronisation)
+SECTIONS = {
+    "Ventes": "sections.ventes",
+    "Dépenses": "sections.depenses",
+    "Clients": "sections.clients",
+    "Produits": "sections.produits",
+    "Statistiques": "sections.statistiques",
+    "Gestion des données": "sections.donnees",
+}
+
+def render_section(name):
+    """
+    Affiche une section du menu en important son module au premier affichage.
+    Args:
+        name (str): Entrée du menu (clé de SECTIONS).
+    """
+    importlib.import_module(SECTIONS[name]).render()
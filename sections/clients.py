@@ -0,0 +1,54 @@
+import streamlit as st
+from client_fonction import save_client, delete_client, load_clients_cache
+from index_utils import find_client_ids
+
+def render():
+    """Affiche la section "Clients" : liste, ajout et suppression des clients."""
+    st.header("Liste des clients")
+    show_clients = st.checkbox("Afficher la liste des clients")
+    if show_clients:
+        clients = load_clients_cache()
+        if not clients.empty:
+            st.dataframe(clients[["Client_ID", "Nom", "Prénom", "Email", "Téléphone"]])
+            csv = clients.to_csv(index=False)
+            st.download_button(
+                label="Télécharger clients.csv",
+                data=csv,
+                file_name="clients.csv",
+                mime="text/csv"
+            )
+        else:
+            st.write("Aucune donnée client à afficher.")
+    
+    st.header("Ajouter un client")
+    with st.form(key="client_form"):
+        nom = st.text_input("Nom")
+        prenom = st.text_input("Prénom")
+        email = st.text_input("Email (optionnel)")
+        telephone = st.text_input("Téléphone (optionnel)")
+        submit_button = st.form_submit_button("Enregistrer le client")
+        if submit_button:
+            if nom and prenom:
+                if find_client_ids(nom, prenom):
+                    st.error("Un client avec ce nom et prénom existe déjà.")
+                else:
+                    if save_client(nom, prenom, email, telephone):
+                        st.success("Client ajouté avec succès !")
+                    else:
+                        st.error("Erreur lors de l'ajout du client")
+            else:
+                st.error("Veuillez remplir le nom et le prénom.")
+
+    st.header("Supprimer un client")
+    with st.form(key="delete_client_form"):
+        nom_del = st.text_input("Nom du client")
+        prenom_del = st.text_input("Prénom du client")
+        delete_button = st.form_submit_button("Supprimer le client")
+        if delete_button:
+            if nom_del and prenom_del:
+                if delete_client(nom_del, prenom_del):
+                    st.success("Client supprimé avec succès !")
+                else:
+                    st.error("Client non trouvé ou erreur lors de la suppression.")
+            else:
+                st.error("Veuillez entrer le nom et le prénom.")
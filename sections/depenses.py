@@ -0,0 +1,107 @@
+import streamlit as st
+from depenses_fonction import save_depense, delete_depense, get_depenses_affichage, get_depense_details
+from vue_utils import table_csv
+from sections import PAGE_SIZES
+
+def render():
+    """Affiche la section "Dépenses" : liste paginée, saisie et suppression des dépenses."""
+    st.header("Liste des dépenses")
+    show_depenses = st.checkbox("Afficher la liste des dépenses")
+    if show_depenses:
+        try:
+            cols = st.columns([2, 2, 1])
+            periode = cols[0].date_input("Période", value=(), key="depenses_periode")
+            tri = cols[1].selectbox("Trier par", ["Depense_ID", "Date", "Total"], key="depenses_tri")
+            decroissant = cols[2].checkbox("Décroissant", key="depenses_decroissant")
+            cols = st.columns(2)
+            page_size = cols[0].selectbox("Dépenses par page", PAGE_SIZES, key="depenses_page_size")
+            page = cols[1].number_input("Page", min_value=1, step=1, key="depenses_page")
+            start_date, end_date = (periode[0], periode[-1]) if periode else (None, None)
+            depenses, total = get_depenses_affichage(page, page_size, start_date, end_date, tri, not decroissant)
+            if not depenses.empty:
+                nb_pages = (total - 1) // page_size + 1
+                st.caption(f"{total} dépenses, page {min(page, nb_pages)} sur {nb_pages}")
+                st.dataframe(depenses[["Depense_ID", "Date", "Noms", "Total"]], hide_index=True,
+                             column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD"),
+                                            "Total": st.column_config.NumberColumn("Total (€)", format="%.2f")})
+                selected_depenses = st.multiselect("Voir les détails des dépenses", depenses["Depense_ID"].tolist(), key="depenses_details")
+                for depense_id in selected_depenses:
+                    st.subheader(f"Détails de la dépense {depense_id}")
+                    details = get_depense_details(depense_id)
+                    if not details.empty:
+                        st.dataframe(details, column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD")})
+                    else:
+                        st.write("Aucun détail disponible.")
+                st.download_button(
+                    label="Télécharger depenses.csv",
+                    data=table_csv("depenses"),
+                    file_name="depenses.csv",
+                    mime="text/csv"
+                )
+            else:
+                st.write("Aucune donnée dépense à afficher.")
+        except Exception as e:
+            st.error(f"Erreur lors de l'affichage des dépenses : {e}")
+
+    st.header("Ajouter une dépense")
+    if "show_prix_depenses" not in st.session_state:
+        st.session_state.show_prix_depenses = False
+    if "selected_depenses" not in st.session_state:
+        st.session_state.selected_depenses = []
+    if "depense_form_reset" not in st.session_state:
+        st.session_state.depense_form_reset = False
+
+    with st.form(key="depense_form"):
+        date = st.date_input("Date de la dépense")
+        noms_depenses = st.text_input("Noms des dépenses (séparés par des virgules)", placeholder="Engrais, Arrosage, Semences", key="depense_noms")
+        confirm_button = st.form_submit_button("Confirmer la sélection des dépenses")
+        if confirm_button and noms_depenses:
+            temp_selected_depenses = [nom.strip() for nom in noms_depenses.split(",") if nom.strip()]
+            if temp_selected_depenses:
+                st.session_state.show_prix_depenses = True
+                st.session_state.selected_depenses = temp_selected_depenses
+                st.session_state.depense_form_reset = False
+            else:
+                st.error("Veuillez entrer au moins un nom de dépense valide.")
+        elif confirm_button:
+            st.error("Veuillez entrer au moins un nom de dépense.")
+        prix_depenses = []
+        total_depenses = 0.0
+        if st.session_state.show_prix_depenses and not st.session_state.depense_form_reset:
+            st.subheader("Saisir les prix des dépenses")
+            for nom in st.session_state.selected_depenses:
+                prix = st.number_input(f"Prix (€) pour {nom}", min_value=0.0, step=0.1, key=f"prix_{nom}")
+                prix_depenses.append(prix)
+                total_depenses += prix
+                st.write(f"Prix : {prix:.2f} €")
+            st.write(f"**Total des dépenses : {total_depenses:.2f} €**")
+        submit_button = st.form_submit_button("Enregistrer les dépenses")
+        if submit_button and st.session_state.show_prix_depenses:
+            if not st.session_state.selected_depenses or not all(p > 0 for p in prix_depenses):
+                st.error("Veuillez entrer des prix valides pour toutes les dépenses.")
+            else:
+                date_str = date.strftime("%Y-%m-%d")
+                try:
+                    if save_depense(date_str, st.session_state.selected_depenses, prix_depenses):
+                        st.success("Dépenses ajoutées avec succès !")
+                        st.session_state.show_prix_depenses = False
+                        st.session_state.selected_depenses = []
+                        st.session_state.depense_form_reset = True
+                        st.rerun()
+                    else:
+                        st.error("Erreur lors de l'enregistrement des dépenses.")
+                except Exception as e:
+                    st.error(f"Erreur lors de l'enregistrement des dépenses : {e}")
+
+    st.header("Supprimer une dépense")
+    with st.form(key="delete_depense_form"):
+        depense_id = st.number_input("ID de la dépense", min_value=1, step=1)
+        delete_button = st.form_submit_button("Supprimer la dépense")
+        if delete_button:
+            try:
+                if delete_depense(depense_id):
+                    st.success("Dépense supprimée avec succès !")
+                else:
+                    st.error("Dépense non trouvée ou erreur lors de la suppression.")
+            except Exception as e:
+                st.error(f"Erreur lors de la suppression de la dépense : {e}")
@@ -0,0 +1,72 @@
+import os
+import pandas as pd
+import streamlit as st
+from client_fonction import upload_clients
+from produit_fonction import upload_produits
+from ventes_fonction import upload_ventes
+from depenses_fonction import upload_depenses
+from github_utils import pull_from_github
+from storage_utils import TABLES, replace_table
+from vue_utils import table_csv
+
+def render():
+    """Affiche la section "Gestion des données" : téléchargement, récupération depuis GitHub et chargement des CSV."""
+    st.header("Gestion des données")
+    st.subheader("Télécharger les fichiers CSV")
+    for name, table in TABLES.items():
+        file_name = os.path.basename(table["file"])
+        try:
+            st.download_button(
+                label=f"Télécharger {file_name}",
+                data=table_csv(name),
+                file_name=file_name,
+                mime="text/csv"
+            )
+        except FileNotFoundError:
+            st.warning(f"Fichier {file_name} non trouvé.")
+        except Exception as e:
+            st.error(f"Erreur lors de la lecture de {file_name} : {e}")
+
+    st.subheader("Récupérer les données depuis GitHub")
+    if st.button("Remplacer les données locales par celles du dépôt GitHub"):
+        for name, table in TABLES.items():
+            file_name = os.path.basename(table["file"])
+            if pull_from_github(table["file"]):
+                replace_table(name, pd.read_csv(table["file"]))
+                st.success(f"{file_name} récupéré depuis GitHub.")
+
+    st.subheader("Charger des fichiers CSV")
+    uploaded_file = st.file_uploader("Choisir un fichier CSV", type=["csv"])
+    if uploaded_file:
+        file_name = uploaded_file.name
+        if file_name in ("clients.csv", "produits.csv"):
+            # Identifiants existants conservés ; ceux du fichier qui changent sont gardés pour corriger
+            # un ventes.csv de la même source chargé ensuite
+            upload, id_column = (upload_clients, "Client_ID") if file_name == "clients.csv" else (upload_produits, "Produit_ID")
+            result = upload(uploaded_file)
+            if result is not None:
+                st.success(f"{file_name} chargé : {result['inserted']} ajoutés, {result['updated']} mis à jour.")
+                st.session_state.setdefault("id_remaps", {})[id_column] = result["remap"]
+                if not result["remap"].empty:
+                    st.info(f"{len(result['remap'])} identifiant(s) du fichier renuméroté(s), appliqué(s) au prochain chargement de ventes.csv :")
+                    st.dataframe(result["remap"], hide_index=True)
+            else:
+                st.error(f"Erreur lors de la mise à jour de {file_name}.")
+        elif file_name in ("ventes.csv", "depenses.csv"):
+            # Chargement par morceaux : la barre avance avec la lecture du fichier
+            barre = st.progress(0.0, text="Chargement…")
+            def progression(counts):
+                lu = min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0)
+                barre.progress(lu, text=f"{counts['inserted']} ajoutées, {counts['skipped']} déjà présentes, {counts['invalid']} invalides")
+            if file_name == "ventes.csv":
+                counts = upload_ventes(uploaded_file, progression, st.session_state.get("id_remaps"))
+            else:
+                counts = upload_depenses(uploaded_file, progression)
+            barre.empty()
+            if counts is not None:
+                st.success(f"{file_name} chargé : {counts['inserted']} lignes ajoutées, "
+                           f"{counts['skipped']} déjà présentes, {counts['invalid']} invalides.")
+            else:
+                st.error(f"Erreur lors du chargement de {file_name}.")
+        else:
+            st.error("Nom de fichier non reconnu. Utilisez : clients.csv, produits.csv, ventes.csv, ou depenses.csv.")
@@ -0,0 +1,69 @@
+import streamlit as st
+from produit_fonction import save_produit, delete_produit, load_produits_cache, modificate_price
+from index_utils import find_produit_ids
+
+def render():
+    """Affiche la section "Produits" : liste, ajout, suppression et prix des produits."""
+    st.header("Liste des produits")
+    show_produits = st.checkbox("Afficher la liste des produits")
+    if show_produits:
+        produits = load_produits_cache()
+        if not produits.empty:
+            st.dataframe(produits[["Produit_ID", "Nom", "Prix (au Kg)"]])
+            csv = produits.to_csv(index=False)
+            st.download_button(
+                label="Télécharger produits.csv",
+                data=csv,
+                file_name="produits.csv",
+                mime="text/csv"
+            )
+        else:
+            st.write("Aucune donnée produit à afficher.")
+    
+    st.header("Ajouter un produit")
+    with st.form(key="produit_form"):
+        nom_produit = st.text_input("Nom du produit")
+        prix_produit = st.number_input("Prix (€/kg)", min_value=0.0, step=0.1)
+        submit_button = st.form_submit_button("Enregistrer le produit")
+        if submit_button:
+            if nom_produit and prix_produit > 0:
+                if find_produit_ids(nom_produit):
+                    st.error("Un produit avec ce nom existe déjà.")
+                else:
+                    if save_produit(nom_produit, prix_produit):
+                        st.success("Produit ajouté avec succès !")
+                    else:
+                        st.error("Erreur lors de l’ajout du produit")
+            else:
+                st.error("Veuillez remplir le nom et un prix valide.")
+
+    st.header("Supprimer un produit")
+    with st.form(key="delete_produit_form"):
+        produits = load_produits_cache()
+        produit_options = produits["Nom"].tolist() if not produits.empty else []
+        nom_produit_del = st.selectbox("Produit à supprimer", produit_options)
+        delete_button = st.form_submit_button("Supprimer le produit")
+        if delete_button:
+            if nom_produit_del:
+                if delete_produit(nom_produit_del):
+                    st.success("Produit supprimé avec succès !")
+                else:
+                    st.error("Produit non trouvé ou erreur lors de la suppression.")
+            else:
+                st.error("Veuillez sélectionner un produit.")
+
+    st.header("Modifier le prix d’un produit")
+    with st.form(key="modify_price_form"):
+        produits = load_produits_cache()
+        produit_options = produits["Nom"].tolist() if not produits.empty else []
+        nom_produit = st.selectbox("Produit à modifier", produit_options)
+        nouveau_prix = st.number_input("Nouveau prix (€/kg)", min_value=0.0, step=0.1)
+        submit_button = st.form_submit_button("Modifier le prix")
+        if submit_button:
+            if nom_produit and nouveau_prix > 0:
+                if modificate_price(nom_produit, nouveau_prix):
+                    st.success("Prix modifié avec succès !")
+                else:
+                    st.error("Produit non trouvé ou erreur lors de la modification.")
+            else:
+                st.error("Veuillez sélectionner un produit et un prix valide.")
@@ -0,0 +1,153 @@
+import pandas as pd
+import streamlit as st
+from statistiques_fonction import (
+    plot_benefice_evolution,
+    get_dernier_benefice,
+    plot_chiffre_affaires_vs_depenses,
+    plot_chiffre_affaires_per_product,
+    plot_chiffre_affaires_per_client,
+    plot_depenses_per_name,
+    get_mois_disponibles,
+    format_mois,
+    get_chiffre_affaires_total
+)
+from memo_utils import get_memo_stats
+
+def render():
+    """Affiche la section "Statistiques" : bénéfice, chiffre d'affaires et dépenses (graphiques Plotly)."""
+    st.header("Statistiques")
+    st.subheader("Évolution du bénéfice cumulé")
+    try:
+        fig = plot_benefice_evolution()
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("Aucun graphique généré pour le bénéfice.")
+    except Exception as e:
+        st.error(f"Erreur lors de la génération du graphique : {e}")
+    
+    try:
+        dernier_benefice, derniere_date = get_dernier_benefice()
+        if derniere_date:
+            couleur = "green" if dernier_benefice >= 0 else "red"
+            st.markdown(
+                f"<h3 style='color:{couleur}'>Bénéfice au {derniere_date.strftime('%Y-%m-%d')} : {dernier_benefice:.2f} €</h3>",
+                unsafe_allow_html=True
+            )
+            # Affichage du chiffre d'affaires total
+            ca_total = get_chiffre_affaires_total()
+            st.markdown(f"**Chiffre d'affaires total : {ca_total:.2f} €**")
+        else:
+            st.write("Aucune donnée disponible pour calculer le bénéfice.")
+    except Exception as e:
+        st.error(f"Erreur lors du calcul du bénéfice : {e}")
+    
+    st.subheader("Chiffre d'affaires et dépenses par mois")
+    show_bar_plot = st.checkbox("Afficher le graphique des ventes et dépenses")
+    if show_bar_plot:
+        try:
+            # Mois repérés par leur clé numérique (année * 12 + mois - 1), libellés seulement à l'affichage
+            now = pd.Timestamp.now()
+            current_month = now.year * 12 + now.month - 1
+            default_months = [current_month - i for i in range(2, -1, -1)]
+            other_months = [m for m in get_mois_disponibles() if m not in default_months]
+            st.write("Par défaut, les trois derniers mois sont affichés.")
+            additional_months = st.multiselect(
+                "Ajouter des mois antérieurs :",
+                options=other_months,
+                default=[],
+                format_func=format_mois,
+                help="Sélectionnez les mois supplémentaires à inclure dans le graphique."
+            )
+            selected_months = sorted(default_months + additional_months)
+            fig = plot_chiffre_affaires_vs_depenses(selected_months)
+            if fig:
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.warning("Aucun graphique généré pour les ventes et dépenses.")
+        except Exception as e:
+            st.error(f"Erreur lors de la génération du graphique : {e}")
+    
+    st.subheader("Chiffre d'affaires par produit")
+    try:
+        show_produit_plot = st.checkbox("Afficher le graphique du chiffre d'affaires par produit")
+        if show_produit_plot:
+            st.write("Sélectionnez une période (optionnel) :")
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input("Date de début", value=None, key="produit_start")
+            with col2:
+                end_date = st.date_input("Date de fin", value=None, key="produit_end")
+            start_date_str = start_date.strftime("%Y-%m-%d") if start_date else None
+            end_date_str = end_date.strftime("%Y-%m-%d") if end_date else None
+            if start_date and end_date and start_date > end_date:
+                st.error("La date de début doit être antérieure à positieve la date de fin.")
+            else:
+                try:
+                    fig = plot_chiffre_affaires_per_product(start_date_str, end_date_str)
+                    if fig:
+                        st.plotly_chart(fig, use_container_width=True)
+                    else:
+                        st.warning("Aucun tableau généré pour le chiffre d'affaires par produit")
+                except:
+                    pass
+    except Exception as e:
+        st.error(f"Erreur lors de la génération du graphique : {e}")
+    
+    st.subheader("Chiffre d'affaires par client")
+    try:
+        show_client_plot = st.checkbox("Afficher le graphique du chiffre d'affaires par client")
+        if show_client_plot:
+            st.write("Sélectionnez une période (optionnel) :")
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input("Date de début", value=None, key="client_start")
+            with col2:
+                end_date = st.date_input("Date de fin", value=None, key="client_end")
+            start_date_str = start_date.strftime("%Y-%m-%d") if start_date else None
+            end_date_str = end_date.strftime("%Y-%m-%d") if end_date else None
+            if start_date and end_date and start_date > end_date:
+                st.error("La date de début doit être antérieure à la date de fin.")
+            else:
+                try:
+                    fig = plot_chiffre_affaires_per_client(start_date_str, end_date_str)
+                    if fig:
+                        st.plotly_chart(fig, use_container_width=True)
+                    else:
+                        st.warning("Aucun tableau généré pour le chiffre d'affaires par client.")
+                except:
+                    pass
+    except Exception as e:
+        st.error(f"Erreur lors de la génération du graphique : {e}")
+    
+    st.subheader("Dépenses par type de dépense")
+
+    try:
+        show_depense_plot = st.checkbox("Afficher le graphique des dépenses par type")
+        if show_depense_plot:
+            st.write("Sélectionnez une période (optionnel) :")
+            col1, col2 = st.columns(2)
+            with col1:
+                start_date = st.date_input("Date de début", value=None, key="depense_start")
+            with col2:
+                end_date = st.date_input("Date de fin", value=None, key="depense_end")
+            start_date_str = start_date.strftime("%Y-%m-%d") if start_date else None
+            end_date_str = end_date.strftime("%Y-%m-%d") if end_date else None
+            if start_date and end_date and start_date > end_date:
+                st.error("La date de début doit être antérieure à la date de fin.")
+            else:
+                try:
+                    fig = plot_depenses_per_name(start_date_str, end_date_str)
+                    if fig:
+                        st.plotly_chart(fig, use_container_width=True)
+                    else:
+                        st.warning("Aucun tableau généré pour les dépenses par type")
+                except:
+                    pass
+    except Exception as e:
+        st.error(f"Erreur lors de la génération du graphique : {e}")
+    # Efficacité du cache des statistiques (pour régler [stats] cache_size dans les secrets)
+    memo_stats = get_memo_stats()
+    if memo_stats:
+        with st.expander("Cache des statistiques"):
+            st.dataframe(pd.DataFrame.from_dict(memo_stats, orient="index"))
@@ -0,0 +1,147 @@
+import streamlit as st
+from client_fonction import load_clients_cache
+from produit_fonction import load_produits_cache
+from ventes_fonction import save_vente, delete_vente, get_ventes_affichage, get_vente_details, read_ventes_batch, save_ventes_batch, BATCH_COLUMNS
+from vue_utils import table_csv
+from sections import PAGE_SIZES
+
+def render():
+    """Affiche la section "Ventes" : liste paginée, saisie, import du jour et suppression des ventes."""
+    st.header("Liste des ventes")
+    show_ventes = st.checkbox("Afficher la liste des ventes")
+    if show_ventes:
+        try:
+            # Filtres, tri et pagination appliqués côté serveur : seule la page affichée est envoyée au navigateur
+            clients_filtre = load_clients_cache(["Client_ID", "Nom", "Prénom"])
+            noms_filtre = dict(zip(clients_filtre["Client_ID"], clients_filtre["Nom"].astype("string").fillna("") + " " + clients_filtre["Prénom"].astype("string").fillna("")))
+            cols = st.columns([2, 2, 2, 1])
+            periode = cols[0].date_input("Période", value=(), key="ventes_periode")
+            client_filtre = cols[1].selectbox("Client", [None] + list(noms_filtre), key="ventes_client_filtre",
+                                              format_func=lambda client_id: "Tous" if client_id is None else noms_filtre[client_id])
+            tri = cols[2].selectbox("Trier par", ["Vente_ID", "Date", "Client", "Total"], key="ventes_tri")
+            decroissant = cols[3].checkbox("Décroissant", key="ventes_decroissant")
+            cols = st.columns(2)
+            page_size = cols[0].selectbox("Ventes par page", PAGE_SIZES, key="ventes_page_size")
+            page = cols[1].number_input("Page", min_value=1, step=1, key="ventes_page")
+            start_date, end_date = (periode[0], periode[-1]) if periode else (None, None)
+            ventes, total = get_ventes_affichage(page, page_size, start_date, end_date, client_filtre, tri, not decroissant)
+            if not ventes.empty:
+                nb_pages = (total - 1) // page_size + 1
+                st.caption(f"{total} ventes, page {min(page, nb_pages)} sur {nb_pages}")
+                st.dataframe(ventes[["Vente_ID", "Date", "Client", "Produits", "Total"]], hide_index=True,
+                             column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD"),
+                                            "Total": st.column_config.NumberColumn("Prix total (€)", format="%.2f")})
+                selected_ventes = st.multiselect("Voir les détails des ventes", ventes["Vente_ID"].tolist(), key="ventes_details")
+                for vente_id in selected_ventes:
+                    st.subheader(f"Détails de la vente {vente_id}")
+                    details = get_vente_details(vente_id)
+                    if not details.empty:
+                        st.dataframe(details, column_config={"Date": st.column_config.DateColumn(format="YYYY-MM-DD")})
+                    else:
+                        st.write("Aucun détail disponible.")
+                st.download_button(
+                    label="Télécharger ventes.csv",
+                    data=table_csv("ventes"),
+                    file_name="ventes.csv",
+                    mime="text/csv"
+                )
+            else:
+                st.write("Aucune donnée vente à afficher.")
+        except Exception as e:
+            st.error(f"Erreur lors de l'affichage des ventes : {e}")
+
+    st.header("Ajouter une vente")
+    if "show_quantites" not in st.session_state:
+        st.session_state.show_quantites = False
+    if "selected_produits" not in st.session_state:
+        st.session_state.selected_produits = []
+    if "vente_form_reset" not in st.session_state:
+        st.session_state.vente_form_reset = False
+
+    with st.form(key="vente_form"):
+        date = st.date_input("Date de la vente")
+        clients = load_clients_cache()
+        client_options = [f"{row['Nom']} {row['Prénom']}" for _, row in clients.iterrows()]
+        client_selection = st.selectbox("Client", client_options, key="vente_client")
+        produits = load_produits_cache()
+        produit_options = produits["Nom"].tolist()
+        temp_selected_produits = st.multiselect("Produits", produit_options, default=st.session_state.selected_produits, key="vente_produits")
+        confirm_button = st.form_submit_button("Confirmer la sélection des produits")
+        if confirm_button and temp_selected_produits:
+            st.session_state.show_quantites = True
+            st.session_state.selected_produits = temp_selected_produits
+            st.session_state.vente_form_reset = False
+        elif confirm_button:
+            st.error("Veuillez sélectionner au moins un produit.")
+        quantites = []
+        prix_totaux = []
+        total_commande = 0.0
+        if st.session_state.show_quantites and not st.session_state.vente_form_reset:
+            st.subheader("Saisir les quantités")
+            for produit in st.session_state.selected_produits:
+                st.write(f"**{produit}**")
+                quantite = st.number_input(f"Quantité (kg) pour {produit}", min_value=0.0, step=0.1, key=f"quantite_{produit}")
+                prix_unitaire = produits[produits["Nom"] == produit]["Prix (au Kg)"].iloc[0]
+                prix = quantite * prix_unitaire
+                st.write(f"Prix : {prix:.2f} € (Prix unitaire : {prix_unitaire:.2f} €/kg)")
+                quantites.append(quantite)
+                prix_totaux.append(prix)
+                total_commande += prix
+            st.write(f"**Prix total de la commande : {total_commande:.2f} €**")
+        submit_button = st.form_submit_button("Enregistrer la vente")
+        if submit_button and st.session_state.show_quantites:
+            if not st.session_state.selected_produits or not all(q > 0 for q in quantites):
+                st.error("Veuillez sélectionner au moins un produit avec une quantité valide.")
+            else:
+                client_nom, client_prenom = client_selection.split(" ", 1) if " " in client_selection else (client_selection, "")
+                date_str = date.strftime("%Y-%m-%d")
+                try:
+                    if save_vente(date_str, client_nom, client_prenom, st.session_state.selected_produits, quantites, prix_totaux):
+                        st.success("Vente ajoutée avec succès !")
+                        st.session_state.show_quantites = False
+                        st.session_state.selected_produits = []
+                        st.session_state.vente_form_reset = True
+                        st.rerun()
+                    else:
+                        st.error("Erreur lors de l'ajout de la vente")
+                except Exception as e:
+                    st.error(f"Erreur lors de l'enregistrement de la vente : {e}")
+
+    st.header("Importer les ventes du jour")
+    st.caption(f"Export de la caisse, une ligne par produit vendu : {', '.join(BATCH_COLUMNS)} (Ticket et Prix facultatifs).")
+    with st.form(key="batch_ventes_form"):
+        batch_text = st.text_area("Coller les ventes (CSV)", placeholder="Ticket,Date,Nom,Prénom,Produit,Quantité,Prix")
+        batch_file = st.file_uploader("Ou choisir un fichier", type=["csv", "json"], key="batch_ventes_file")
+        batch_button = st.form_submit_button("Importer les ventes")
+        if batch_button:
+            try:
+                if batch_file is not None:
+                    lignes = read_ventes_batch(batch_file, json_format=batch_file.name.endswith(".json"))
+                elif batch_text.strip():
+                    lignes = read_ventes_batch(batch_text, json_format=batch_text.lstrip().startswith("["))
+                else:
+                    lignes = None
+                    st.error("Veuillez coller des ventes ou choisir un fichier.")
+                if lignes is not None:
+                    resultat = save_ventes_batch(lignes)
+                    if resultat is not None:
+                        if resultat["ventes"]:
+                            st.success(f"{resultat['ventes']} ventes ({resultat['lignes']} lignes) enregistrées !")
+                        if not resultat["rejets"].empty:
+                            st.warning(f"{len(resultat['rejets'])} ligne(s) rejetée(s) :")
+                            st.dataframe(resultat["rejets"])
+            except Exception as e:
+                st.error(f"Erreur lors de l'import des ventes : {e}")
+
+    st.header("Supprimer une vente")
+    with st.form(key="delete_vente_form"):
+        vente_id = st.number_input("ID de la vente", min_value=1, step=1)
+        delete_button = st.form_submit_button("Supprimer la vente")
+        if delete_button:
+            try:
+                if delete_vente(vente_id):
+                    st.success("Vente supprimée avec succès !")
+                else:
+                    st.error("Vente non trouvée ou erreur lors de la suppression.")
+            except Exception as e:
+                st.error(f"Erreur lors de la suppression de la vente : {e}")
@@ -1,68 +1,61 @@
 import pandas as pd
 import streamlit as st
+from benefice_utils import get_benefice_journalier, get_dernier_benefice_journal
+from cumul_utils import range_totals, distinct_months, month_totals
+from memo_utils import memoize, skip_memo
 from ventes_fonction import load_ventes_cache
-from depenses_fonction import load_depenses_cache
-import plotly.express as px
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
 from client_fonction import load_clients_cache
 from produit_fonction import load_produits_cache
-from depenses_fonction import load_depenses_cache
+from perf_utils import instrument
 
+# Noms des mois pour les libellés des graphiques
+MOIS = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin", "Juillet", "Août",
+        "Septembre", "Octobre", "Novembre", "Décembre"]
+
+def _px():
+    # Plotly n'est importé qu'au premier graphique construit, pas au démarrage de l'application
+    import plotly.express as px
+    return px
+
+@instrument("statistiques")
+@memoize("ventes", "depenses")
 def get_benefice_par_date():
     """
-    Calcule le bénéfice (ventes - dépenses) par date.
-    Retourne un DataFrame avec les colonnes Date et Benefice.
+    Retourne le bénéfice cumulé (ventes - dépenses) par date, lu dans le journal journalier
+    tenu à jour à chaque vente ou dépense.
+    Retourne un DataFrame avec les colonnes Date et Benefice_Cumule.
     """
-    # Charger les ventes et dépenses
-    ventes = load_ventes_cache(_invalidate=True)
-    depenses = load_depenses_cache(_invalidate=True)
-
-    if ventes.empty and depenses.empty:
-        return pd.DataFrame(columns=["Date", "Benefice_Cumule"])
-
-    # Agréger les ventes par date
-    ventes_par_date = ventes.groupby("Date")["Prix"].sum().reset_index() if not ventes.empty else pd.DataFrame(columns=["Date", "Prix"])
-    ventes_par_date.rename(columns={"Prix": "Ventes"}, inplace=True)
-
-    # Agréger les dépenses par date
-    depenses_par_date = depenses.groupby("Date")["Prix"].sum().reset_index() if not depenses.empty else pd.DataFrame(columns=["Date", "Prix"])
-    depenses_par_date.rename(columns={"Prix": "Dépenses"}, inplace=True)
-
-    # Fusionner les DataFrames sur la date
-    merged = pd.merge(ventes_par_date, depenses_par_date, on="Date", how="outer").fillna(0)
-
-    # Calculer le bénéfice
-    merged["Benefice"] = merged["Ventes"] - merged["Dépenses"]
-
     try:
-        # Convertir la date en datetime
-        merged["Date"] = pd.to_datetime(merged["Date"], format="%Y-%m-%d", errors="coerce")
-        # Supprimer les lignes avec des dates invalides
-        merged = merged.dropna(subset=["Date"])
+        return get_benefice_journalier()[["Date", "Benefice_Cumule"]]
     except Exception as e:
-        st.error(f"Erreur lors de la conversion des dates : {e}")
+        st.error(f"Erreur lors du calcul du bénéfice : {e}")
+        skip_memo()
         return pd.DataFrame(columns=["Date", "Benefice_Cumule"])
 
-    # Trier par date
-    merged = merged.sort_values("Date")
-
-    # Calculer le bénéfice cumulé
-    merged["Benefice_Cumule"] = merged["Benefice"].cumsum()
-
-    return merged[["Date", "Benefice_Cumule"]]
-
+@instrument("statistiques")
+@memoize("ventes", "depenses")
 def get_dernier_benefice():
     """
     Retourne le bénéfice cumulé à la dernière date et la date correspondante.
     """
-    benefice_df = get_benefice_par_date()
-    if benefice_df.empty:
+    try:
+        return get_dernier_benefice_journal()
+    except Exception as e:
+        st.error(f"Erreur lors du calcul du bénéfice : {e}")
+        skip_memo()
         return 0.0, None
-    dernier_benefice = benefice_df.iloc[-1]["Benefice_Cumule"]
-    derniere_date = benefice_df.iloc[-1]["Date"]
-    return dernier_benefice, derniere_date
 
+@instrument("statistiques")
+@memoize("ventes")
+def get_chiffre_affaires_total():
+    """
+    Retourne le chiffre d'affaires total (somme des prix de toutes les ventes).
+    """
+    ventes = load_ventes_cache(columns=["Prix"])
+    return float(ventes["Prix"].sum()) if not ventes.empty else 0.0
+
+@instrument("statistiques")
+@memoize("ventes", "depenses")
 def plot_benefice_evolution():
     """
     Crée un graphique interactif de l'évolution du bénéfice cumulé.
@@ -73,7 +66,7 @@ def plot_benefice_evolution():
         st.warning("Aucune donnée disponible pour afficher le graphique du bénéfice.")
         return None
     
-    fig = px.line(
+    fig = _px().line(
         benefice_df,
         x="Date",
         y="Benefice_Cumule",
@@ -97,62 +90,52 @@ def plot_benefice_evolution():
     
     return fig
 
+def format_mois(key):
+    """
+    Libellé d'un mois pour l'affichage (ex. 'Mars 2025').
+    Args:
+        key (int): Clé numérique du mois (année * 12 + mois - 1).
+    """
+    return f"{MOIS[key % 12]} {key // 12}"
+
+@instrument("statistiques")
+@memoize("ventes", "depenses")
+def get_mois_disponibles():
+    """
+    Retourne les clés des mois ayant au moins une vente ou une dépense, du plus récent au plus ancien.
+    """
+    return sorted(set(distinct_months("ventes")) | set(distinct_months("depenses")), reverse=True)
+
+@instrument("statistiques")
+@memoize("ventes", "depenses")
 def get_chiffre_affaires_et_depenses_par_mois(selected_months=None):
     """
     Calcule le chiffre d'affaires et les dépenses par mois et année.
     Retourne un DataFrame avec les colonnes Mois_Annee, Type (Ventes/Dépenses), Montant.
-    Si selected_months est fourni, filtre sur ces mois (format 'Mois Année', ex. 'Mars 2025').
+    Si selected_months est fourni (clés numériques des mois), seuls ces mois sont lus dans l'index mensuel.
     """
-    ventes = load_ventes_cache(_invalidate=True)
-    depenses = load_depenses_cache(_invalidate=True)
-
-    if ventes.empty and depenses.empty:
-        return pd.DataFrame(columns=["Mois_Annee", "Type", "Montant"])
-
-    # Convertir les dates en datetime
     try:
-        if not ventes.empty:
-            ventes["Date"] = pd.to_datetime(ventes["Date"], format="%Y-%m-%d", errors="coerce")
-            ventes = ventes.dropna(subset=["Date"])
-        if not depenses.empty:
-            depenses["Date"] = pd.to_datetime(depenses["Date"], format="%Y-%m-%d", errors="coerce")
-            depenses = depenses.dropna(subset=["Date"])
+        ventes_par_mois = month_totals("ventes", selected_months or None)
+        depenses_par_mois = month_totals("depenses", selected_months or None)
     except Exception as e:
-        st.error(f"Erreur lors de la conversion des dates : {e}")
+        st.error(f"Erreur lors du calcul des montants par mois : {e}")
+        skip_memo()
+        return pd.DataFrame(columns=["Mois_Annee", "Type", "Montant"])
+
+    data = pd.concat([
+        pd.DataFrame({"Mois": ventes_par_mois.index, "Type": "Ventes", "Montant": ventes_par_mois.to_numpy()}),
+        pd.DataFrame({"Mois": depenses_par_mois.index, "Type": "Dépenses", "Montant": depenses_par_mois.to_numpy()}),
+    ], ignore_index=True)
+    if data.empty:
         return pd.DataFrame(columns=["Mois_Annee", "Type", "Montant"])
 
-    # Extraire Mois et Année
-    if not ventes.empty:
-        ventes["Mois_Annee"] = ventes["Date"].dt.strftime("%B %Y")  # Ex. "Mars 2025"
-        ventes_par_mois = ventes.groupby("Mois_Annee")["Prix"].sum().reset_index()
-        ventes_par_mois["Type"] = "Ventes"
-        ventes_par_mois.rename(columns={"Prix": "Montant"}, inplace=True)
-    else:
-        ventes_par_mois = pd.DataFrame(columns=["Mois_Annee", "Montant", "Type"])
-
-    if not depenses.empty:
-        depenses["Mois_Annee"] = depenses["Date"].dt.strftime("%B %Y")
-        depenses_par_mois = depenses.groupby("Mois_Annee")["Prix"].sum().reset_index()
-        depenses_par_mois["Type"] = "Dépenses"
-        depenses_par_mois.rename(columns={"Prix": "Montant"}, inplace=True)
-    else:
-        depenses_par_mois = pd.DataFrame(columns=["Mois_Annee", "Montant", "Type"])
-
-    # Concaténer les données
-    data = pd.concat([ventes_par_mois, depenses_par_mois], ignore_index=True).fillna(0)
-
-    # Filtrer par mois sélectionnés si fourni
-    if selected_months:
-        data = data[data["Mois_Annee"].isin(selected_months)]
-
-    # Trier par date pour l'ordre chronologique
-    if not data.empty:
-        data["Date"] = pd.to_datetime(data["Mois_Annee"], format="%B %Y")
-        data = data.sort_values("Date")
-        data = data[["Mois_Annee", "Type", "Montant"]]
-
-    return data
+    # Ordre chronologique sur la clé numérique ; les libellés ne sont calculés que pour l'affichage
+    data = data.sort_values("Mois", kind="stable")
+    data["Mois_Annee"] = data["Mois"].map(format_mois)
+    return data[["Mois_Annee", "Type", "Montant"]].reset_index(drop=True)
 
+@instrument("statistiques")
+@memoize("ventes", "depenses")
 def plot_chiffre_affaires_vs_depenses(selected_months=None):
     """
     Crée un bar plot du chiffre d'affaires et des dépenses par mois.
@@ -163,7 +146,7 @@ def plot_chiffre_affaires_vs_depenses(selected_months=None):
         st.warning("Aucune donnée disponible pour afficher le graphique des ventes et dépenses.")
         return None
 
-    fig = px.bar(
+    fig = _px().bar(
         data,
         x="Mois_Annee",
         y="Montant",
@@ -188,55 +171,40 @@ def plot_chiffre_affaires_vs_depenses(selected_months=None):
 
     return fig
 
+@instrument("statistiques")
+@memoize("ventes", "produits")
 def get_chiffre_affaires_par_produit(start_date=None, end_date=None):
     """
-    Calcule le chiffre d'affaires par produit.
+    Calcule le chiffre d'affaires par produit à partir de l'index des sommes cumulées par jour.
     Filtre par période si start_date et end_date sont fournis (format 'YYYY-MM-DD').
     Retourne un DataFrame avec les colonnes Produit, Montant.
     """
-    ventes = load_ventes_cache(_invalidate=True)
-    produits = load_produits_cache(_invalidate=True)
-
-    if ventes.empty or produits.empty:
+    produits = load_produits_cache(columns=["Produit_ID", "Nom"])
+    if produits.empty:
         return pd.DataFrame(columns=["Produit", "Montant"])
 
-    # Convertir les dates
+    # Totaux par Produit_ID sur la période
     try:
-        ventes["Date"] = pd.to_datetime(ventes["Date"], format="%Y-%m-%d", errors="coerce")
-        ventes = ventes.dropna(subset=["Date"])
+        totaux = range_totals("ventes_produit", start_date, end_date)
     except Exception as e:
-        st.error(f"Erreur lors de la conversion des dates : {e}")
+        st.error(f"Erreur dans le filtrage des dates : {e}")
+        skip_memo()
         return pd.DataFrame(columns=["Produit", "Montant"])
-
-    # Filtrer par période si spécifié
-    if start_date and end_date:
-        try:
-            start_date = pd.to_datetime(start_date)
-            end_date = pd.to_datetime(end_date)
-            ventes = ventes[(ventes["Date"] >= start_date) & (ventes["Date"] <= end_date)]
-        except Exception as e:
-            st.error(f"Erreur dans le filtrage des dates : {e}")
-            return pd.DataFrame(columns=["Produit", "Montant"])
-
-    # Fusionner avec produits pour obtenir les noms
-    try:
-        ventes = ventes.merge(
-            produits[["Produit_ID", "Nom"]],
-            on="Produit_ID",
-            how="left"
-        )
-        ventes["Produit"] = ventes["Nom"].fillna("Inconnu")
-    except Exception as e:
-        st.error(f"Erreur lors de la fusion avec les produits : {e}")
+    if totaux.empty:
         return pd.DataFrame(columns=["Produit", "Montant"])
 
+    # Noms des produits (seulement pour les identifiants présents)
+    noms = produits.drop_duplicates("Produit_ID").set_index("Produit_ID")["Nom"].astype("string")
+    libelles = pd.Series(totaux.index.map(noms), index=totaux.index, dtype="string").fillna("Inconnu")
+
     # Agréger par produit
-    data = ventes.groupby("Produit")["Prix"].sum().reset_index()
-    data.rename(columns={"Prix": "Montant"}, inplace=True)
+    data = totaux.groupby(libelles.to_numpy()).sum().rename_axis("Produit").reset_index(name="Montant")
     data = data.sort_values("Montant", ascending=False)
 
     return data[["Produit", "Montant"]]
 
+@instrument("statistiques")
+@memoize("ventes", "produits")
 def plot_chiffre_affaires_per_product(start_date=None, end_date=None):
     """
     Crée un bar plot du chiffre d'affaires par produit.
@@ -247,7 +215,7 @@ def plot_chiffre_affaires_per_product(start_date=None, end_date=None):
         st.warning("Aucune donnée disponible pour afficher le chiffre d'affaires par produit.")
         return None
 
-    fig = px.bar(
+    fig = _px().bar(
         data,
         x="Produit",
         y="Montant",
@@ -270,57 +238,42 @@ def plot_chiffre_affaires_per_product(start_date=None, end_date=None):
 
     return fig
 
+@instrument("statistiques")
+@memoize("ventes", "clients")
 def get_chiffre_affaires_per_client(start_date=None, end_date=None):
     """
-    Calcule le chiffre d'affaires par client.
+    Calcule le chiffre d'affaires par client à partir de l'index des sommes cumulées par jour.
     Filtre par période si start_date et end_date sont fournis (format 'YYYY-MM-DD').
     Retourne un DataFrame avec les colonnes Client, Montant.
     """
-    ventes = load_ventes_cache(_invalidate=True)
-    clients = load_clients_cache(_invalidate=True)
-
-    if ventes.empty or clients.empty:
+    clients = load_clients_cache(columns=["Client_ID", "Nom", "Prénom"])
+    if clients.empty:
         return pd.DataFrame(columns=["Client", "Montant"])
 
-    # Convertir les dates
+    # Totaux par Client_ID sur la période
     try:
-        ventes["Date"] = pd.to_datetime(ventes["Date"], format="%Y-%m-%d", errors="coerce")
-        ventes = ventes.dropna(subset=["Date"])
+        totaux = range_totals("ventes_client", start_date, end_date)
     except Exception as e:
-        st.error(f"Erreur lors de la conversion des dates : {e}")
+        st.error(f"Erreur dans le filtrage des dates : {e}")
+        skip_memo()
         return pd.DataFrame(columns=["Client", "Montant"])
-
-    # Filtrer par période si spécifié
-    if start_date and end_date:
-        try:
-            start_date = pd.to_datetime(start_date)
-            end_date = pd.to_datetime(end_date)
-            ventes = ventes[(ventes["Date"] >= start_date) & (ventes["Date"] <= end_date)]
-        except Exception as e:
-            st.error(f"Erreur dans le filtrage des dates : {e}")
-            return pd.DataFrame(columns=["Client", "Montant"])
-
-    # Fusionner avec clients pour obtenir les noms
-    try:
-        clients["Client"] = clients["Nom"].fillna("") + " " + clients["Prénom"].fillna("")
-        clients["Client"] = clients["Client"].str.strip()
-        ventes = ventes.merge(
-            clients[["Client_ID", "Client"]],
-            on="Client_ID",
-            how="left"
-        )
-        ventes["Client"] = ventes["Client"].fillna("Inconnu")
-    except Exception as e:
-        st.error(f"Erreur lors de la fusion avec les clients : {e}")
+    if totaux.empty:
         return pd.DataFrame(columns=["Client", "Montant"])
 
+    # Noms des clients (seulement pour les identifiants présents)
+    clients = clients.drop_duplicates("Client_ID")
+    noms = clients["Nom"].astype("string").fillna("") + " " + clients["Prénom"].astype("string").fillna("")
+    noms = pd.Series(noms.str.strip().to_numpy(), index=clients["Client_ID"].to_numpy())
+    libelles = pd.Series(totaux.index.map(noms), index=totaux.index, dtype="string").fillna("Inconnu")
+
     # Agréger par client
-    data = ventes.groupby("Client")["Prix"].sum().reset_index()
-    data.rename(columns={"Prix": "Montant"}, inplace=True)
+    data = totaux.groupby(libelles.to_numpy()).sum().rename_axis("Client").reset_index(name="Montant")
     data = data.sort_values("Montant", ascending=False)
 
     return data[["Client", "Montant"]]
 
+@instrument("statistiques")
+@memoize("ventes", "clients")
 def plot_chiffre_affaires_per_client(start_date=None, end_date=None):
     """
     Crée un bar plot du chiffre d'affaires par client.
@@ -331,7 +284,7 @@ def plot_chiffre_affaires_per_client(start_date=None, end_date=None):
         st.warning("Aucune donnée disponible pour afficher le chiffre d'affaires par client.")
         return None
 
-    fig = px.bar(
+    fig = _px().bar(
         data,
         x="Client",
         y="Montant",
@@ -354,42 +307,33 @@ def plot_chiffre_affaires_per_client(start_date=None, end_date=None):
 
     return fig
 
+@instrument("statistiques")
+@memoize("depenses")
 def get_depenses_per_name(start_date=None, end_date=None):
     """
-    Calcule les dépenses par nom.
+    Calcule les dépenses par nom à partir de l'index des sommes cumulées par jour.
     Filtre par période si start_date et end_date sont fournis (format 'YYYY-MM-DD').
     Retourne un DataFrame avec les colonnes Nom, Montant.
     """
-    depenses = load_depenses_cache(_invalidate=True)
-
-    if depenses.empty:
-        return pd.DataFrame(columns=["Nom", "Montant"])
-
-    # Convertir les dates
     try:
-        depenses["Date"] = pd.to_datetime(depenses["Date"], format="%Y-%m-%d", errors="coerce")
-        depenses = depenses.dropna(subset=["Date"])
+        totaux = range_totals("depenses_nom", start_date, end_date)
     except Exception as e:
-        st.error(f"Erreur lors de la conversion des dates : {e}")
+        st.error(f"Erreur dans le filtrage des dates : {e}")
+        skip_memo()
+        return pd.DataFrame(columns=["Nom", "Montant"])
+
+    # Les dépenses sans nom ne sont pas comptées, comme avec un regroupement par nom
+    totaux = totaux[totaux.index.notna()]
+    if totaux.empty:
         return pd.DataFrame(columns=["Nom", "Montant"])
 
-    # Filtrer par période si spécifié
-    if start_date and end_date:
-        try:
-            start_date = pd.to_datetime(start_date)
-            end_date = pd.to_datetime(end_date)
-            depenses = depenses[(depenses["Date"] >= start_date) & (depenses["Date"] <= end_date)]
-        except Exception as e:
-            st.error(f"Erreur dans le filtrage des dates : {e}")
-            return pd.DataFrame(columns=["Nom", "Montant"])
-
-    # Agréger par nom
-    data = depenses.groupby("Nom")["Prix"].sum().reset_index()
-    data.rename(columns={"Prix": "Montant"}, inplace=True)
+    data = totaux.rename_axis("Nom").reset_index(name="Montant")
     data = data.sort_values("Montant", ascending=False)
 
     return data[["Nom", "Montant"]]
 
+@instrument("statistiques")
+@memoize("depenses")
 def plot_depenses_per_name(start_date=None, end_date=None):
     """
     Crée un bar plot des dépenses par nom.
@@ -400,7 +344,7 @@ def plot_depenses_per_name(start_date=None, end_date=None):
         st.warning("Aucune donnée disponible pour afficher les dépenses par nom.")
         return None
 
-    fig = px.bar(
+    fig = _px().bar(
         data,
         x="Nom",
         y="Montant",
@@ -0,0 +1,725 @@
+import contextlib
+import glob
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from csv_utils import FALLBACK_ENCODING, restore_from_gzip, can_append, append_rows, bom_encoding, is_utf8, decode_csv
+from journal_utils import JOURNAL_MAX_BYTES, journal_path, read_journal, has_journal, append_journal, discard_journal, replay_journal
+from perf_utils import instrument, count_rows, record_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    from pyarrow.fs import LocalFileSystem
+except ImportError:  # dépendance optionnelle, seulement pour le moteur "arrow"
+    pa = None
+
+DATA_DIR = "data"
+SQLITE_FILE = "data/maraichage.db"
+# Attente maximale (secondes) d'un verrou SQLite tenu par un autre processus (ex. import initial d'un gros CSV)
+SQLITE_TIMEOUT = 120
+ARROW_DIR = "data/arrow"
+ARROW_MAX_SEGMENTS = 32
+# Nombre de lignes lues à la fois lors du chargement d'un CSV
+UPLOAD_CHUNK_SIZE = 50_000
+# Ajout CSV journalisé derrière des modifications en attente (pour garder l'ordre) jusqu'à ce nombre
+# de lignes ; au-delà, le journal est d'abord replié puis les lignes sont écrites en fin de fichier
+JOURNAL_INSERT_MAX_ROWS = 1000
+# Numéros de version des tables, partagés entre processus
+VERSIONS_DIR = "data/.versions"
+
+# Description des tables : fichier CSV (format d'import/export et de synchronisation),
+# colonnes, types SQLite, types pandas, identifiant et index SQLite
+TABLES = {
+    "clients": {
+        "file": "data/clients.csv",
+        "columns": ["Client_ID", "Nom", "Prénom", "Email", "Téléphone"],
+        "types": ["INTEGER", "TEXT", "TEXT", "TEXT", "TEXT"],
+        "dtypes": {"Client_ID": "int32", "Nom": "category", "Prénom": "category", "Email": "string", "Téléphone": "string"},
+        "id": "Client_ID",
+        "indexes": [["Client_ID"]],
+    },
+    "produits": {
+        "file": "data/produits.csv",
+        "columns": ["Produit_ID", "Nom", "Prix (au Kg)"],
+        "types": ["INTEGER", "TEXT", "REAL"],
+        "dtypes": {"Produit_ID": "int32", "Nom": "category", "Prix (au Kg)": "float64"},
+        "id": "Produit_ID",
+        "indexes": [["Produit_ID"]],
+    },
+    "ventes": {
+        "file": "data/ventes.csv",
+        "columns": ["Vente_ID", "Date", "Client_ID", "Produit_ID", "Quantité", "Prix"],
+        "types": ["INTEGER", "TEXT", "INTEGER", "INTEGER", "REAL", "REAL"],
+        "dtypes": {"Vente_ID": "int32", "Date": "datetime64[ns]", "Client_ID": "int32", "Produit_ID": "int32",
+                   "Quantité": "float64", "Prix": "float64"},
+        "id": "Vente_ID",
+        "indexes": [["Vente_ID"], ["Date"], ["Client_ID"], ["Produit_ID"]],
+    },
+    "depenses": {
+        "file": "data/depenses.csv",
+        "columns": ["Depense_ID", "Date", "Nom", "Prix"],
+        "types": ["INTEGER", "TEXT", "TEXT", "REAL"],
+        "dtypes": {"Depense_ID": "int32", "Date": "datetime64[ns]", "Nom": "category", "Prix": "float64"},
+        "id": "Depense_ID",
+        "indexes": [["Depense_ID"], ["Date"]],
+    },
+}
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def apply_schema(name, df):
+    """
+    Convertit les colonnes d'une table vers leurs types déclarés dans TABLES
+    (identifiants int32, dates datetime64, montants float64, noms en category).
+    Une colonne d'identifiants contenant des valeurs manquantes reste en flottants.
+    """
+    df = df.copy(deep=False)
+    for col, dtype in TABLES[name]["dtypes"].items():
+        if col not in df.columns:
+            continue
+        if dtype.startswith("datetime64"):
+            df[col] = pd.to_datetime(df[col], format="ISO8601", errors="coerce")
+        elif dtype == "int32":
+            values = pd.to_numeric(df[col], errors="coerce")
+            df[col] = values.astype("int32") if values.notna().all() else values
+        elif dtype == "float64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        elif dtype == "string":
+            df[col] = df[col].astype("string")
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def _text_rows(name, df):
+    # Lignes prêtes pour un stockage texte (CSV, SQLite) : types de TABLES, dates en YYYY-MM-DD
+    df = apply_schema(name, df)
+    for col, dtype in TABLES[name]["dtypes"].items():
+        if col in df.columns and dtype.startswith("datetime64"):
+            df[col] = df[col].dt.strftime("%Y-%m-%d")
+    return df
+
+def to_csv_content(df):
+    """Sérialise une table au format CSV d'échange (dates au format YYYY-MM-DD)."""
+    return df.to_csv(index=False, date_format="%Y-%m-%d")
+
+def _read_csv_file(name, columns=None):
+    # Contenu du CSV et des modifications journalisées depuis son dernier repli
+    table = TABLES[name]
+    restore_from_gzip(table["file"])
+    entries = read_journal(table["file"])
+    usecols = None if entries else columns
+    try:
+        try:
+            df = pd.read_csv(table["file"], usecols=usecols, encoding=bom_encoding(table["file"]) or "utf-8")
+        except UnicodeDecodeError:
+            df = pd.read_csv(table["file"], usecols=usecols, encoding=FALLBACK_ENCODING, encoding_errors="replace")
+    except FileNotFoundError:
+        df = pd.DataFrame(columns=table["columns"] if entries else columns or table["columns"])
+    if entries:
+        df = replay_journal(df, entries, table["columns"])
+        if columns:
+            df = df[list(columns)]
+    return df
+
+def _write_csv_file(name, df):
+    # Réécriture complète et atomique du CSV ; le journal, désormais inclus, est abandonné
+    file_path = TABLES[name]["file"]
+    df.to_csv(file_path + ".tmp", index=False)
+    os.replace(file_path + ".tmp", file_path)
+    discard_journal(file_path)
+
+class CsvStorage:
+    """
+    Stockage historique : chaque table est un fichier CSV. Les ajouts sont écrits en fin de fichier ;
+    les modifications et suppressions en fin d'un journal (data/<table>.csv.journal), rejoué à la
+    lecture et replié dans le CSV quand il dépasse JOURNAL_MAX_BYTES ou avant une synchronisation.
+    Tant que le journal n'est pas replié, un petit ajout y est écrit à la suite des modifications.
+    Un CSV dans un autre encodage que l'UTF-8 (UTF-16 d'origine) est réécrit en UTF-8 avant sa
+    première modification.
+    """
+    def __init__(self):
+        # Tables dont le CSV a été vérifié (ou réécrit) en UTF-8 par ce processus
+        self.utf8_tables = set()
+
+    def _ensure_utf8(self, name):
+        # Appelé sous le verrou d'écriture de la table ; le fichier entier n'est décodé qu'une fois par processus
+        if name in self.utf8_tables:
+            return
+        file_path = TABLES[name]["file"]
+        restore_from_gzip(file_path)
+        if bom_encoding(file_path) is not None or not is_utf8(file_path):
+            _write_csv_file(name, self.read(name)[TABLES[name]["columns"]])
+        self.utf8_tables.add(name)
+
+    def read(self, name, columns=None):
+        return _read_csv_file(name, columns)
+
+    def _journal(self, name, entry):
+        self._ensure_utf8(name)
+        if append_journal(TABLES[name]["file"], entry) > JOURNAL_MAX_BYTES:
+            self._compact(name)
+
+    def _compact(self, name):
+        _write_csv_file(name, self.read(name)[TABLES[name]["columns"]])
+
+    def insert(self, name, rows):
+        table = TABLES[name]
+        rows = _text_rows(name, rows)[table["columns"]]
+        self._ensure_utf8(name)
+        if os.path.exists(journal_path(table["file"])):
+            if len(rows) <= JOURNAL_INSERT_MAX_ROWS:
+                self._journal(name, {"op": "insert", "rows": rows})
+                return
+            self._compact(name)
+        if can_append(table["file"], table["columns"]):
+            append_rows(table["file"], rows, table["columns"])
+        else:
+            current = self.read(name)[table["columns"]]
+            _write_csv_file(name, pd.concat([current, rows], ignore_index=True) if not current.empty else rows)
+
+    def delete(self, name, column, values):
+        self._journal(name, {"op": "delete", "column": column, "values": list(values)})
+
+    def update(self, name, column, values, changes):
+        self._journal(name, {"op": "update", "column": column, "values": list(values), "changes": changes})
+
+    def replace(self, name, df):
+        _write_csv_file(name, _text_rows(name, df))
+
+    def export(self, name):
+        # Le journal est replié avant l'export : le CSV synchronisé est complet
+        with _store_lock, _table_lock(name, exclusive=True):
+            self._ensure_utf8(name)
+            if has_journal(TABLES[name]["file"]):
+                self._compact(name)
+            with open(TABLES[name]["file"], "r", encoding="utf-8") as f:
+                return f.read()
+
+class SqliteStorage:
+    """
+    Stockage SQLite indexé : chaque écriture est une transaction courte sur les seules
+    lignes concernées. Les CSV ne sont régénérés qu'à l'export (synchronisation, téléchargement).
+    """
+    def __init__(self, path=SQLITE_FILE):
+        self.path = path
+        self.local = threading.local()
+        with self._connect() as conn:
+            # Création et import initial dans une seule transaction en écriture : un autre processus
+            # qui démarre en même temps attend la fin de l'import puis le trouve dans _imports
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("CREATE TABLE IF NOT EXISTS _imports (name TEXT PRIMARY KEY)")
+            for name, table in TABLES.items():
+                cols = ", ".join(f"{_quote(c)} {t}" for c, t in zip(table["columns"], table["types"]))
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(name)} ({cols})")
+                for index_cols in table["indexes"]:
+                    index_name = f"idx_{name}_{'_'.join(index_cols)}"
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote(index_name)} ON {_quote(name)} "
+                                 f"({', '.join(_quote(c) for c in index_cols)})")
+                # Import initial depuis le CSV (une seule fois, pour ne pas ressusciter des lignes supprimées)
+                if conn.execute("SELECT 1 FROM _imports WHERE name = ?", (name,)).fetchone() is None:
+                    try:
+                        df = _read_csv_file(name)
+                    except Exception:
+                        df = pd.DataFrame(columns=table["columns"])
+                    self._insert_rows(conn, name, df)
+                    conn.execute("INSERT INTO _imports (name) VALUES (?)", (name,))
+
+    def _connect(self):
+        # Une connexion par thread (la file de synchronisation exporte depuis son propre thread)
+        if not hasattr(self.local, "conn"):
+            self.local.conn = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT)
+            self.local.conn.execute("PRAGMA journal_mode=WAL")
+        return self.local.conn
+
+    def _insert_rows(self, conn, name, rows):
+        columns = TABLES[name]["columns"]
+        rows = _text_rows(name, rows[columns])
+        rows = rows.astype(object).where(rows.notna(), None)
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(
+            f"INSERT INTO {_quote(name)} ({', '.join(_quote(c) for c in columns)}) VALUES ({placeholders})",
+            rows.itertuples(index=False, name=None)
+        )
+
+    def read(self, name, columns=None):
+        columns = ", ".join(_quote(c) for c in columns or TABLES[name]["columns"])
+        return pd.read_sql_query(f"SELECT {columns} FROM {_quote(name)} ORDER BY rowid", self._connect())
+
+    def insert(self, name, rows):
+        with self._connect() as conn:
+            self._insert_rows(conn, name, rows)
+
+    def delete(self, name, column, values):
+        values = [v.item() if hasattr(v, "item") else v for v in values]
+        with self._connect() as conn:
+            cursor = conn.executemany(f"DELETE FROM {_quote(name)} WHERE {_quote(column)} = ?", [(v,) for v in values])
+            return cursor.rowcount
+
+    def update(self, name, column, values, changes):
+        values = [v.item() if hasattr(v, "item") else v for v in values]
+        assignments = ", ".join(f"{_quote(col)} = ?" for col in changes)
+        params = [tuple(changes.values()) + (v,) for v in values]
+        with self._connect() as conn:
+            cursor = conn.executemany(f"UPDATE {_quote(name)} SET {assignments} WHERE {_quote(column)} = ?", params)
+            return cursor.rowcount
+
+    def replace(self, name, df):
+        with self._connect() as conn:
+            conn.execute(f"DELETE FROM {_quote(name)}")
+            self._insert_rows(conn, name, df)
+
+    def export(self, name):
+        content = to_csv_content(self.read(name))
+        file_path = TABLES[name]["file"]
+        with open(file_path + ".tmp", "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(file_path + ".tmp", file_path)
+        return content
+
+class ArrowStorage:
+    """
+    Stockage colonnaire Arrow IPC, typé selon TABLES, lu en mémoire mappée et par colonnes.
+    Chaque table est un dossier de segments non compressés : un ajout écrit un petit
+    segment, les suppressions et modifications réécrivent la table en un seul segment.
+    Nécessite pyarrow.
+    """
+    def __init__(self, path=ARROW_DIR):
+        if pa is None:
+            raise ImportError("Le moteur de stockage 'arrow' nécessite pyarrow (pip install pyarrow).")
+        self.path = path
+        self.lock = threading.Lock()
+        for name in TABLES:
+            table_dir = self._table_dir(name)
+            if not os.path.isdir(table_dir):
+                # Import initial depuis le CSV
+                os.makedirs(table_dir)
+                try:
+                    df = _read_csv_file(name)
+                except Exception:
+                    df = pd.DataFrame(columns=TABLES[name]["columns"])
+                self._write_segment(name, df, 0)
+
+    def _table_dir(self, name):
+        return os.path.join(self.path, name)
+
+    def _segments(self, name):
+        return sorted(glob.glob(os.path.join(self._table_dir(name), "*.arrow")))
+
+    def _schema(self, name):
+        fields = []
+        for col in TABLES[name]["columns"]:
+            dtype = TABLES[name]["dtypes"][col]
+            if dtype == "int32":
+                fields.append(pa.field(col, pa.int32()))
+            elif dtype.startswith("datetime64"):
+                fields.append(pa.field(col, pa.timestamp("ns")))
+            elif dtype == "float64":
+                fields.append(pa.field(col, pa.float64()))
+            elif dtype == "category":
+                fields.append(pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(col, pa.string()))
+        return pa.schema(fields)
+
+    def _write_segment(self, name, df, number):
+        df = apply_schema(name, df[TABLES[name]["columns"]])
+        for col, dtype in TABLES[name]["dtypes"].items():
+            if dtype == "category":
+                # Dictionnaire de chaînes, quel que soit le type lu dans le CSV
+                df[col] = df[col].astype("string").astype("category")
+        table = pa.Table.from_pandas(df, schema=self._schema(name), preserve_index=False)
+        path = os.path.join(self._table_dir(name), f"{number:06d}.arrow")
+        feather.write_feather(table, path + ".tmp", compression="uncompressed")
+        os.replace(path + ".tmp", path)
+        return path
+
+    def _rewrite(self, name, df):
+        old_segments = self._segments(name)
+        number = int(os.path.basename(old_segments[-1])[:-6]) + 1 if old_segments else 0
+        self._write_segment(name, df, number)
+        for path in old_segments:
+            os.remove(path)
+
+    def _dataset(self, name):
+        # Segments lus en mémoire mappée, None si la table n'en a aucun
+        segments = self._segments(name)
+        if not segments:
+            return None
+        return ds.dataset(segments, schema=self._schema(name), format="ipc", filesystem=LocalFileSystem(use_mmap=True))
+
+    def read(self, name, columns=None, filter=None):
+        """
+        Lit la table ; seules les colonnes demandées et les lignes retenues par le filtre
+        (expression pyarrow.compute) sont chargées puis converties en DataFrame.
+        """
+        dataset = self._dataset(name)
+        if dataset is None:
+            return apply_schema(name, pd.DataFrame(columns=columns or TABLES[name]["columns"]))
+        return dataset.to_table(columns=columns, filter=filter).unify_dictionaries().to_pandas()
+
+    def insert(self, name, rows):
+        with self.lock:
+            segments = self._segments(name)
+            if len(segments) >= ARROW_MAX_SEGMENTS:
+                self._rewrite(name, pd.concat([self.read(name), apply_schema(name, rows)], ignore_index=True))
+            else:
+                number = int(os.path.basename(segments[-1])[:-6]) + 1 if segments else 0
+                self._write_segment(name, rows, number)
+
+    def delete(self, name, column, values):
+        with self.lock:
+            dataset = self._dataset(name)
+            if dataset is None:
+                return 0
+            # Les lignes supprimées sont écartées par Arrow, avant la conversion en DataFrame
+            deleted = pc.field(column).isin(list(values))
+            count = dataset.count_rows(filter=deleted)
+            if count:
+                self._rewrite(name, self.read(name, filter=~deleted))
+            return count
+
+    def update(self, name, column, values, changes):
+        with self.lock:
+            current = self.read(name)
+            mask = current[column].isin(values)
+            for col, value in changes.items():
+                current.loc[mask, col] = value
+            self._rewrite(name, current)
+            return int(mask.sum())
+
+    def replace(self, name, df):
+        with self.lock:
+            self._rewrite(name, df)
+
+    def export(self, name):
+        # Sous le verrou, comme les écritures : pas de lecture d'un segment en cours de réécriture
+        with self.lock:
+            content = to_csv_content(self.read(name))
+            file_path = TABLES[name]["file"]
+            with open(file_path + ".tmp", "w", encoding="utf-8", newline="") as f:
+                f.write(content)
+            os.replace(file_path + ".tmp", file_path)
+        return content
+
+STORAGE_BACKENDS = {"csv": CsvStorage, "sqlite": SqliteStorage, "arrow": ArrowStorage}
+
+@st.cache_resource(show_spinner=False)
+def get_storage():
+    """
+    Retourne le moteur de stockage choisi dans les secrets ([storage] backend = "csv", "sqlite" ou "arrow").
+    Le CSV reste le moteur par défaut.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    try:
+        backend = st.secrets["storage"]["backend"] if st.secrets.load_if_toml_exists() else "csv"
+    except Exception:
+        backend = "csv"
+    return STORAGE_BACKENDS[backend]()
+
+@st.cache_resource(show_spinner=False)
+def _table_store():
+    # Tables partagées par toutes les sessions du processus : nom -> {"version", "df"},
+    # et colonnes lues seules (sans la table entière) : (nom, colonnes) -> {"version", "df"}
+    return {}
+
+def _projections(name):
+    # Clés des colonnes de la table lues seules
+    return [key for key in _table_store() if isinstance(key, tuple) and key[0] == name]
+
+_store_lock = threading.Lock()
+_ids_lock = threading.Lock()
+
+class VersionConflict(Exception):
+    """La table a été modifiée (par une autre session ou un autre serveur) depuis sa lecture."""
+
+@contextlib.contextmanager
+def _table_lock(name, exclusive):
+    # Verrou entre processus (plusieurs serveurs Streamlit sur le même dossier data/) :
+    # exclusif pour une écriture, partagé pour une relecture
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    with open(os.path.join(VERSIONS_DIR, name + ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def table_version(name):
+    """
+    Numéro de version de la table, incrémenté à chaque écriture (sert de clé aux index et caches).
+    Il est lu dans un petit fichier sous data/.versions/, commun à tous les processus :
+    une écriture faite par un autre serveur invalide donc aussi les caches de celui-ci.
+    """
+    try:
+        with open(os.path.join(VERSIONS_DIR, name), "r") as f:
+            return int(f.read() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+def _set_table_version(name, version):
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    path = os.path.join(VERSIONS_DIR, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_path, path)
+
+def conform_rows(df, rows):
+    """
+    Aligne les types de nouvelles lignes sur ceux d'une table en mémoire.
+    Returns:
+        tuple: (table, éventuellement avec de nouvelles catégories ; lignes converties).
+    """
+    rows = rows[df.columns].copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            new_categories = pd.Index(rows[col].dropna().unique()).difference(df[col].cat.categories)
+            if len(new_categories):
+                df[col] = df[col].cat.add_categories(new_categories)
+            rows[col] = pd.Categorical(rows[col], categories=df[col].cat.categories)
+        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+            rows[col] = pd.to_datetime(rows[col], format="ISO8601", errors="coerce")
+        else:
+            try:
+                rows[col] = rows[col].astype(df[col].dtype)
+            except (TypeError, ValueError):
+                pass
+    return df, rows
+
+def _write(name, write, update_cached=None, expected_version=None):
+    # Écrit dans le stockage, incrémente la version et met à jour la table partagée sur place
+    # si elle correspondait à la version précédente (sinon elle sera relue à la demande).
+    # Avec expected_version, l'écriture n'a lieu que si la table n'a pas changé depuis (sinon VersionConflict)
+    with _store_lock, _table_lock(name, exclusive=True):
+        old_version = table_version(name)
+        if expected_version is not None and old_version != expected_version:
+            raise VersionConflict(f"La table {name} a été modifiée (version {old_version}, attendue {expected_version}).")
+        result = write()
+        _set_table_version(name, old_version + 1)
+        entry = _table_store().get(name)
+        if entry is not None:
+            if update_cached is not None and entry["version"] == old_version:
+                entry["df"] = update_cached(entry["df"])
+                entry["version"] = old_version + 1
+            else:
+                del _table_store()[name]
+        # Les colonnes lues seules ne sont pas mises à jour : relues à la demande
+        for key in _projections(name):
+            del _table_store()[key]
+    return result
+
+def get_table(name, columns=None):
+    """
+    Retourne une vue de la table partagée entre les sessions, relue seulement si sa version a changé.
+    La vue ne copie pas les données (copy-on-write, activé au démarrage de streamlit_app.py) :
+    la modifier ne modifie pas la table partagée.
+    Si seules quelques colonnes sont demandées et que la table entière n'est pas en mémoire,
+    seules ces colonnes sont lues (et gardées pour les appels suivants qui n'en demandent pas d'autres).
+    """
+    version = table_version(name)
+    store = _table_store()
+    entry = store.get(name)
+    if columns and (entry is None or entry["version"] != version):
+        with _store_lock:
+            entry = next((store[key] for key in _projections(name)
+                          if store[key]["version"] == version and set(columns) <= set(key[1])), entry)
+    record_cache(f"table.{name}", entry is not None and entry["version"] == version)
+    if entry is None or entry["version"] != version:
+        # Version et données lues ensemble, sans écriture concurrente d'un autre processus
+        with _table_lock(name, exclusive=False):
+            version = table_version(name)
+            df = read_table(name, list(columns) if columns else None)
+        with _store_lock:
+            if table_version(name) == version:
+                if columns:
+                    store[(name, tuple(columns))] = {"version": version, "df": df}
+                else:
+                    # La table entière sert désormais toutes les demandes
+                    for key in _projections(name):
+                        del store[key]
+                    store[name] = {"version": version, "df": df}
+    else:
+        df = entry["df"]
+    view = df[list(columns)] if columns else df
+    return view.copy(deep=False)
+
+@instrument("stockage")
+def read_table(name, columns=None):
+    """
+    Lit la table depuis le stockage, limitée aux colonnes demandées si fournies,
+    et la convertit une fois pour toutes vers les types déclarés dans TABLES.
+    """
+    return apply_schema(name, get_storage().read(name, columns))
+
+@contextlib.contextmanager
+def _id_sequence(name):
+    # Compteur d'identifiants de la table, lu et écrit sous un verrou court (le temps d'une
+    # lecture et d'une écriture du fichier), commun aux sessions et aux processus
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    with _ids_lock, open(os.path.join(VERSIONS_DIR, name + ".seq"), "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            try:
+                current = int(f.read())
+            except ValueError:
+                # Compteur absent (ou illisible) : repris depuis le plus grand identifiant de la table
+                id_col = TABLES[name]["id"]
+                ids = get_table(name, [id_col])[id_col]
+                current = int(ids.max()) if ids.notna().any() else 0
+            state = {"current": current}
+            yield state
+            if state["current"] != current:
+                f.seek(0)
+                f.truncate()
+                f.write(str(state["current"]))
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def next_id(name, count=1):
+    """
+    Réserve count identifiants consécutifs de la table et retourne le premier.
+    Deux sessions (ou deux serveurs) n'obtiennent jamais le même identifiant.
+    """
+    with _id_sequence(name) as sequence:
+        sequence["current"] += count
+        return sequence["current"] - count + 1
+
+def _raise_id_sequence(name, df):
+    # Après un chargement ou un remplacement : le compteur ne redescend jamais, mais rattrape
+    # les identifiants plus grands apportés par le fichier
+    id_col = TABLES[name]["id"]
+    ids = pd.to_numeric(df[id_col], errors="coerce") if id_col in df.columns else pd.Series(dtype="float64")
+    if ids.notna().any():
+        with _id_sequence(name) as sequence:
+            sequence["current"] = max(sequence["current"], int(ids.max()))
+
+@instrument("stockage")
+def insert_rows(name, rows):
+    """Ajoute des lignes (DataFrame) à la table."""
+    count_rows(len(rows))
+    def extend(df):
+        df, new_rows = conform_rows(df.copy(deep=False), rows)
+        return pd.concat([df, new_rows], ignore_index=True)
+    _write(name, lambda: get_storage().insert(name, rows), extend)
+
+@instrument("stockage")
+def delete_rows(name, column, values):
+    """Supprime les lignes dont la colonne vaut une des valeurs. Retourne le nombre de lignes supprimées."""
+    # Compté sur la table partagée : le stockage peut se contenter de journaliser la suppression
+    count = int(get_table(name, [column])[column].isin(values).sum())
+    count_rows(count)
+    _write(name, lambda: get_storage().delete(name, column, values),
+           lambda df: df[~df[column].isin(values)].reset_index(drop=True))
+    return count
+
+@instrument("stockage")
+def update_rows(name, column, values, changes):
+    """Modifie les lignes dont la colonne vaut une des valeurs (changes : colonne -> nouvelle valeur)."""
+    def apply_changes(df):
+        df = df.copy(deep=False)
+        mask = df[column].isin(values)
+        for col, value in changes.items():
+            df.loc[mask, col] = value
+        return df
+    return _write(name, lambda: get_storage().update(name, column, values, changes), apply_changes)
+
+@instrument("stockage")
+def replace_table(name, df, expected_version=None):
+    """
+    Remplace tout le contenu de la table (upload d'un CSV).
+    Si expected_version est donné, le remplacement est refusé (VersionConflict) quand la table
+    a changé depuis cette version : le contenu, calculé depuis une lecture, serait périmé.
+    """
+    count_rows(len(df))
+    _write(name, lambda: get_storage().replace(name, df), expected_version=expected_version)
+    _raise_id_sequence(name, df)
+
+def _key_hashes(df, key_columns):
+    # Empreinte d'une clé indépendante des types de stockage (int32, flottants, catégories)
+    keys = pd.DataFrame({
+        col: df[col].astype("float64") if pd.api.types.is_numeric_dtype(df[col])
+        else df[col] if pd.api.types.is_datetime64_any_dtype(df[col])
+        else df[col].astype("string")
+        for col in key_columns
+    })
+    return pd.util.hash_pandas_object(keys, index=False)
+
+@instrument("stockage")
+def upload_new_rows(name, file, key_columns, progress=None, chunk_size=UPLOAD_CHUNK_SIZE, transform=None):
+    """
+    Charge un CSV par morceaux et n'ajoute à la table que les lignes dont la clé n'existe pas encore.
+    Les clés existantes sont gardées sous forme d'empreintes 64 bits dans un ensemble : ni la table
+    ni le fichier ne sont copiés en entier. Une ligne dont une colonne de la clé est vide ou
+    invalide (ex. date illisible) est comptée comme invalide et ignorée.
+    Args:
+        name (str): Nom de la table.
+        file: Fichier CSV (chemin ou fichier téléversé) avec toutes les colonnes de la table.
+        key_columns (list): Colonnes identifiant une ligne.
+        progress (callable): Appelé après chaque morceau avec les compteurs courants.
+        chunk_size (int): Nombre de lignes par morceau.
+        transform (callable): Appliqué à chaque morceau typé avant le dédoublonnage.
+    Returns:
+        dict: {inserted, skipped, invalid} nombres de lignes ajoutées, déjà présentes et invalides.
+    """
+    columns = TABLES[name]["columns"]
+    counts = {"inserted": 0, "skipped": 0, "invalid": 0}
+    existing = get_table(name, key_columns).dropna()
+    seen = set(_key_hashes(existing, key_columns).tolist())
+    for chunk in pd.read_csv(file, chunksize=chunk_size, dtype="string"):
+        missing = [col for col in columns if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans le fichier CSV : {', '.join(missing)}")
+        chunk = apply_schema(name, chunk[columns])
+        if transform is not None:
+            chunk = transform(chunk)
+        valid = chunk[key_columns].notna().all(axis=1).to_numpy()
+        counts["invalid"] += int((~valid).sum())
+        chunk = chunk[valid]
+        hashes = _key_hashes(chunk, key_columns)
+        # Nouvelle clé : absente de la table et pas déjà vue plus haut dans le fichier
+        known = np.fromiter(map(seen.__contains__, hashes.tolist()), dtype=bool, count=len(hashes))
+        new = ~hashes.duplicated().to_numpy() & ~known
+        counts["skipped"] += int((~new).sum())
+        if new.any():
+            insert_rows(name, chunk[new].reset_index(drop=True))
+            _raise_id_sequence(name, chunk[new])
+            seen.update(hashes[new].tolist())
+            counts["inserted"] += int(new.sum())
+        if progress is not None:
+            progress(counts)
+    count_rows(sum(counts.values()))
+    return counts
+
+@instrument("stockage")
+def export_csv(file_path, storage=None):
+    """
+    Met à jour le CSV d'une table depuis le stockage et retourne son contenu.
+    Utilisé pour la synchronisation GitHub et les téléchargements.
+    Le thread de synchronisation passe le stockage résolu par un script (get_storage est un
+    st.cache_resource, qui ne s'appelle pas hors d'un script).
+    """
+    for name, table in TABLES.items():
+        if table["file"] == file_path:
+            return (storage or get_storage()).export(name)
+    with open(file_path, "rb") as f:
+        return decode_csv(f.read())
@@ -0,0 +1,260 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import uuid
+import streamlit as st
+from github_utils import _get_client, _push_files
+from storage_utils import get_storage, export_csv
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus
+    fcntl = None
+
+# File d'attente persistante des fichiers à pousser vers GitHub
+PENDING_FILE = "data/.sync_pending.json"
+DEFAULT_DEBOUNCE = 5.0  # secondes sans nouvelle écriture avant de pousser
+MAX_WAIT_FACTOR = 10    # un fichier modifié en continu est poussé au plus tard après 10 fenêtres
+RETRY_BASE = 5.0
+RETRY_MAX = 300.0
+POLL_INTERVAL = 1.0
+# Durée (secondes) pendant laquelle un fichier pris en charge n'est pas repris par un autre processus
+CLAIM_LEASE = 600.0
+
+_lock = threading.Lock()
+_status = {"last_sync": None, "last_error": None}
+# Stockage et client GitHub utilisés par le thread de synchronisation. Ce sont des st.cache_resource,
+# qui ne s'appellent pas depuis un thread sans ScriptRunContext : ils sont résolus par les scripts
+_worker_deps = {}
+
+@contextlib.contextmanager
+def _pending_lock():
+    # La file est lue puis réécrite par chaque session : verrou entre threads et entre processus
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(PENDING_FILE), exist_ok=True)
+        with open(PENDING_FILE + ".lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def _get_debounce():
+    try:
+        if not st.secrets.load_if_toml_exists():
+            return DEFAULT_DEBOUNCE
+        return float(st.secrets["sync"]["debounce"])
+    except Exception:
+        return DEFAULT_DEBOUNCE
+
+def _load_pending():
+    try:
+        with open(PENDING_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_pending(pending):
+    os.makedirs(os.path.dirname(PENDING_FILE), exist_ok=True)
+    tmp_file = f"{PENDING_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(pending, f, ensure_ascii=False)
+    os.replace(tmp_file, PENDING_FILE)
+
+def _commit_message(file_path, messages):
+    if len(messages) == 1:
+        return messages[0]
+    details = "\n".join(f"- {m}" for m in messages)
+    return f"{len(messages)} modifications de {os.path.basename(file_path)}\n\n{details}"
+
+def enqueue_push(file_path, commit_message):
+    """
+    Ajoute un fichier à la file de synchronisation GitHub et rend la main immédiatement.
+    Les écritures successives d'un même fichier pendant la fenêtre de regroupement
+    sont poussées en un seul commit, avec le contenu de la table au moment du push.
+    Args:
+        file_path (str): Chemin du fichier (ex. 'data/clients.csv').
+        commit_message (str): Message décrivant la modification.
+    Returns:
+        bool: True si la modification a été mise en file.
+    """
+    now = time.time()
+    debounce = _get_debounce()
+    with _pending_lock():
+        pending = _load_pending()
+        entry = pending.get(file_path, {"messages": [], "first": now, "attempts": 0, "next_try": 0})
+        entry["messages"].append(commit_message)
+        entry["due"] = min(now + debounce, entry["first"] + debounce * MAX_WAIT_FACTOR)
+        pending[file_path] = entry
+        _save_pending(pending)
+    start_sync_worker(github=True)
+    return True
+
+def _pid_alive(pid):
+    # Sous Windows, os.kill arrêterait le processus : seul le bail compte
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+def _claimed_by_other(entry, token, now):
+    # Fichier en cours d'envoi par un autre appel (thread ou processus) dont le bail court encore
+    claim = entry.get("claim")
+    if not claim or claim["token"] == token or claim["until"] <= now:
+        return False
+    return claim["pid"] == os.getpid() or _pid_alive(claim["pid"])
+
+def _batch_message(ready):
+    if len(ready) == 1:
+        file_path, entry = next(iter(ready.items()))
+        return _commit_message(file_path, entry["messages"])
+    return "Synchronisation de " + ", ".join(os.path.basename(p) for p in ready) + "\n\n" + \
+        "\n".join(f"- {m}" for entry in ready.values() for m in entry["messages"])
+
+def process_pending(push_fn=_push_files, export_fn=export_csv, now=None):
+    """
+    Pousse les fichiers dont la fenêtre de regroupement est écoulée.
+    Les fichiers prêts en même temps partent dans un seul commit. Chaque fichier est exporté
+    séparément et, si le commit groupé est refusé, poussé seul : un fichier en échec ne bloque
+    pas les autres. Un échec est retenté plus tard, fichier par fichier, avec un délai exponentiel.
+    Args:
+        push_fn: Fonction (files, commit_message) qui lève une exception en cas d'échec,
+            files étant un dict chemin -> contenu.
+        export_fn: Fonction (file_path) qui retourne le contenu CSV à pousser.
+        now (float): Horodatage courant (pour les tests).
+    Returns:
+        int: Nombre de fichiers poussés.
+    """
+    now = time.time() if now is None else now
+    token = uuid.uuid4().hex
+    # Les fichiers prêts sont pris en charge sous le verrou : un autre appel (thread de synchronisation,
+    # autre processus) ne les exporte ni ne les pousse tant que le bail court
+    with _pending_lock():
+        pending = _load_pending()
+        ready = {path: entry for path, entry in pending.items()
+                 if entry["due"] <= now and entry["next_try"] <= now and not _claimed_by_other(entry, token, now)}
+        for entry in ready.values():
+            entry["claim"] = {"token": token, "pid": os.getpid(), "until": now + CLAIM_LEASE,
+                              "count": len(entry["messages"])}
+        if ready:
+            _save_pending(pending)
+    if not ready:
+        return 0
+    # Chaque fichier est exporté séparément : un fichier illisible ne retient pas les autres
+    files, errors = {}, {}
+    for file_path in ready:
+        try:
+            files[file_path] = export_fn(file_path)
+        except Exception as e:
+            errors[file_path] = e
+    pushed = []
+    if files:
+        try:
+            push_fn(files, _batch_message({path: ready[path] for path in files}))
+            pushed = list(files)
+        except Exception as e:
+            if len(files) == 1:
+                errors.update({path: e for path in files})
+            else:
+                # Commit groupé refusé : chaque fichier est poussé seul, pour isoler celui qui échoue
+                for file_path, content in files.items():
+                    try:
+                        push_fn({file_path: content}, _commit_message(file_path, ready[file_path]["messages"]))
+                        pushed.append(file_path)
+                    except Exception as e:
+                        errors[file_path] = e
+    with _pending_lock():
+        pending = _load_pending()
+        # Seuls les fichiers encore pris en charge par cet appel sont mis à jour : après l'expiration
+        # du bail, un autre appel a pu les reprendre (il les poussera de nouveau, sans perte)
+        mine = {path for path in ready
+                if path in pending and pending[path].get("claim", {}).get("token") == token}
+        for file_path in mine:
+            del pending[file_path]["claim"]
+        for file_path in mine.intersection(pushed):
+            # Ne retirer que les messages pris en charge : une écriture a pu arriver entre-temps
+            current = pending[file_path]
+            current["messages"] = current["messages"][ready[file_path]["claim"]["count"]:]
+            if current["messages"]:
+                current["first"] = now
+                current["attempts"] = 0
+                current["next_try"] = 0
+            else:
+                del pending[file_path]
+        for file_path in mine.intersection(errors):
+            # Échec : nouvel essai plus tard, avec un délai exponentiel
+            if file_path in pending:
+                current = pending[file_path]
+                current["attempts"] += 1
+                current["next_try"] = now + min(RETRY_MAX, RETRY_BASE * 2 ** (current["attempts"] - 1))
+        _save_pending(pending)
+    if pushed:
+        _status["last_sync"] = now
+    _status["last_error"] = "; ".join(f"{path} : {e}" for path, e in errors.items()) or None
+    return len(pushed)
+
+def _worker_push(files, commit_message):
+    client = _worker_deps.get("client")
+    if client is None:
+        raise RuntimeError("client GitHub non disponible (vérifier [github] dans les secrets)")
+    _push_files(files, commit_message, client)
+
+def _worker_export(file_path):
+    return export_csv(file_path, _worker_deps["storage"])
+
+def _worker_loop():
+    while True:
+        try:
+            process_pending(_worker_push, _worker_export)
+        except Exception as e:
+            _status["last_error"] = str(e)
+        time.sleep(POLL_INTERVAL)
+
+@st.cache_resource
+def _start_worker_thread():
+    # Un seul thread par processus ; il reprend aussi la file laissée par un redémarrage
+    worker = threading.Thread(target=_worker_loop, name="github-sync", daemon=True)
+    worker.start()
+    return worker
+
+def start_sync_worker(github=False):
+    """
+    Démarre le thread de synchronisation (une fois par processus) et lui transmet le stockage
+    et le client GitHub, résolus ici sur le thread du script.
+    Le client GitHub (et PyGithub) n'est chargé qu'au premier fichier à pousser.
+    Args:
+        github (bool): Résoudre le client GitHub même si la file est vide (appel depuis enqueue_push).
+    """
+    _worker_deps["storage"] = get_storage()
+    if github or "client" in _worker_deps or _load_pending():
+        try:
+            _worker_deps["client"] = _get_client()
+        except Exception as e:
+            _status["last_error"] = f"Client GitHub indisponible : {e}"
+    return _start_worker_thread()
+
+def get_sync_status():
+    """
+    Retourne l'état de la synchronisation GitHub.
+    Returns:
+        dict: pending (nombre de fichiers en attente), last_sync, last_error, next_try.
+    """
+    with _pending_lock():
+        pending = _load_pending()
+    next_try = max((entry["next_try"] for entry in pending.values()), default=0)
+    return {
+        "pending": len(pending),
+        "last_sync": _status["last_sync"],
+        "last_error": _status["last_error"],
+        "next_try": next_try if next_try > time.time() else None,
+    }
@@ -0,0 +1,49 @@
+import os
+import sys
+
+# Les modules de l'application sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import threading
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.runtime.fragment import MemoryFragmentStorage
+from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+from streamlit.runtime.scriptrunner import ScriptRunContext, add_script_run_ctx
+from streamlit.runtime.state import SafeSessionState, SessionState
+
+# Comme au démarrage de l'application (streamlit_app.py)
+pd.set_option("mode.copy_on_write", True)
+
+def _script_run_ctx():
+    # Contexte minimal d'exécution de script : sans lui, st.cache_resource ne garde rien
+    return ScriptRunContext(session_id="tests", _enqueue=lambda msg: None, query_string="",
+                            session_state=SafeSessionState(SessionState(), lambda: None),
+                            uploaded_file_mgr=MemoryUploadedFileManager("/upload"), main_script_path="",
+                            page_script_hash="", user_info={"email": "test@example.com"},
+                            fragment_storage=MemoryFragmentStorage())
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # Application isolée : dossier de données temporaire, moteur CSV par défaut (pas de secrets),
+    # caches du processus vidés et pas de thread de synchronisation ; le test s'exécute comme un script
+    import sync_utils
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    monkeypatch.setattr(sync_utils, "start_sync_worker", lambda github=False: None)
+    st.cache_resource.clear()
+    add_script_run_ctx(threading.current_thread(), _script_run_ctx())
+    yield tmp_path
+    add_script_run_ctx(threading.current_thread(), None)
+    st.cache_resource.clear()
+
+@pytest.fixture
+def farm(data_dir):
+    # Deux clients, deux produits et une vente (Vente_ID 5)
+    pd.DataFrame({"Client_ID": [1, 2], "Nom": ["Dupont", "Martin"], "Prénom": ["Jean", "Paul"],
+                  "Email": ["", ""], "Téléphone": ["", ""]}).to_csv("data/clients.csv", index=False)
+    pd.DataFrame({"Produit_ID": [1, 2], "Nom": ["Tomate", "Courgette"],
+                  "Prix (au Kg)": [3.0, 2.0]}).to_csv("data/produits.csv", index=False)
+    pd.DataFrame({"Vente_ID": [5], "Date": ["2024-04-30"], "Client_ID": [1], "Produit_ID": [1],
+                  "Quantité": [1.0], "Prix": [3.0]}).to_csv("data/ventes.csv", index=False)
+    return data_dir
@@ -0,0 +1,198 @@
+import base64
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BRANCH = "master"
+REPO = "o/r"
+
+def blob_sha(data):
+    """SHA d'un blob, calculé comme par git."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+class FakeGitHub:
+    """
+    Faux serveur de l'API GitHub, limité à ce qu'utilise github_utils : API contents
+    (lecture, création, mise à jour) et API Git Data (blobs, arbres, commits, références).
+    Les mises à jour de branche qui ne sont pas en avance rapide sont refusées (422), comme sur GitHub.
+    """
+    def __init__(self):
+        self.blobs = {}
+        self.trees = {"t0": {}}
+        self.commits = {"c0": {"tree": "t0", "parents": [], "message": "Initial"}}
+        self.refs = {f"heads/{BRANCH}": "c0"}
+        self.log = []
+        # Appelé une fois avant la prochaine mise à jour de branche (ex. pour simuler un push concurrent)
+        self.before_ref_update = None
+        self.lock = threading.RLock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def head(self):
+        return self.refs[f"heads/{BRANCH}"]
+
+    def head_tree(self):
+        """Fichiers de la branche : chemin -> SHA du blob."""
+        return dict(self.trees[self.commits[self.head()]["tree"]])
+
+    def head_message(self):
+        return self.commits[self.head()]["message"]
+
+    def read(self, path):
+        return self.blobs[self.head_tree()[path]]
+
+    def requests(self, method=None):
+        return [(m, p) for m, p in self.log if method is None or m == method]
+
+    def commit_files(self, files, message):
+        """Commit fait par un autre client (fichiers : chemin -> contenu en octets)."""
+        with self.lock:
+            tree = self.head_tree()
+            for path, data in files.items():
+                self.blobs[blob_sha(data)] = data
+                tree[path] = blob_sha(data)
+            return self._commit(tree, message, [self.head()], move=True)
+
+    def _commit(self, tree, message, parents, move):
+        tree_sha = f"t{len(self.trees)}"
+        self.trees[tree_sha] = tree
+        commit_sha = f"c{len(self.commits)}"
+        self.commits[commit_sha] = {"tree": tree_sha, "parents": parents, "message": message}
+        if move:
+            self.refs[f"heads/{BRANCH}"] = commit_sha
+        return commit_sha
+
+    def _handler(self):
+        fake = self
+        prefix = f"/repos/{REPO}"
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send(self, code, obj):
+                body = json.dumps(obj).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("X-RateLimit-Remaining", "4999")
+                self.send_header("X-RateLimit-Limit", "5000")
+                self.send_header("X-RateLimit-Reset", "0")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def payload(self):
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def route(self, method):
+                path = self.path.split("?")[0]
+                fake.log.append((method, path[len(prefix):]))
+                with fake.lock:
+                    return getattr(self, "handle_" + method.lower())(path[len(prefix):])
+
+            def do_GET(self):
+                self.route("GET")
+
+            def do_PUT(self):
+                self.route("PUT")
+
+            def do_POST(self):
+                self.route("POST")
+
+            def do_PATCH(self):
+                self.route("PATCH")
+
+            def handle_get(self, path):
+                if path == "":
+                    return self.send(200, {"full_name": REPO, "name": "r", "url": fake.url + prefix})
+                m = re.fullmatch(r"/contents/(.+)", path)
+                if m:
+                    tree = fake.head_tree()
+                    if m.group(1) not in tree:
+                        return self.send(404, {"message": "Not Found"})
+                    sha = tree[m.group(1)]
+                    data = fake.blobs[sha]
+                    return self.send(200, {"type": "file", "path": m.group(1), "name": m.group(1), "sha": sha,
+                                           "content": base64.b64encode(data).decode(), "encoding": "base64",
+                                           "size": len(data)})
+                m = re.fullmatch(r"/git/refs?/(.+)", path)
+                if m:
+                    return self.send(200, {"ref": "refs/" + m.group(1), "url": f"{fake.url}{prefix}/git/refs/{m.group(1)}",
+                                           "object": {"sha": fake.refs[m.group(1)], "type": "commit"}})
+                m = re.fullmatch(r"/git/commits/(.+)", path)
+                if m:
+                    commit = fake.commits[m.group(1)]
+                    return self.send(200, {"sha": m.group(1), "tree": {"sha": commit["tree"]}, "message": commit["message"]})
+                m = re.fullmatch(r"/git/trees/(.+)", path)
+                if m:
+                    return self.send(200, {"sha": m.group(1), "tree": [
+                        {"path": p, "mode": "100644", "type": "blob", "sha": s, "size": len(fake.blobs[s])}
+                        for p, s in fake.trees[m.group(1)].items()]})
+                m = re.fullmatch(r"/git/blobs/(.+)", path)
+                if m:
+                    data = fake.blobs[m.group(1)]
+                    return self.send(200, {"sha": m.group(1), "content": base64.b64encode(data).decode(),
+                                           "encoding": "base64", "size": len(data)})
+                self.send(404, {"message": "Not Found"})
+
+            def handle_put(self, path):
+                m = re.fullmatch(r"/contents/(.+)", path)
+                if not m:
+                    return self.send(404, {"message": "Not Found"})
+                body = self.payload()
+                tree = fake.head_tree()
+                if body.get("sha") != tree.get(m.group(1)):
+                    return self.send(409, {"message": "sha does not match"})
+                data = base64.b64decode(body["content"])
+                fake.blobs[blob_sha(data)] = data
+                tree[m.group(1)] = blob_sha(data)
+                commit_sha = fake._commit(tree, body["message"], [fake.head()], move=True)
+                self.send(200, {"content": {"path": m.group(1), "name": m.group(1), "sha": blob_sha(data)},
+                                "commit": {"sha": commit_sha}})
+
+            def handle_post(self, path):
+                body = self.payload()
+                if path == "/git/blobs":
+                    data = base64.b64decode(body["content"]) if body.get("encoding") == "base64" else body["content"].encode()
+                    fake.blobs[blob_sha(data)] = data
+                    return self.send(201, {"sha": blob_sha(data)})
+                if path == "/git/trees":
+                    tree = dict(fake.trees[body["base_tree"]]) if body.get("base_tree") else {}
+                    for element in body["tree"]:
+                        if element.get("sha") is None:
+                            tree.pop(element["path"], None)
+                        else:
+                            tree[element["path"]] = element["sha"]
+                    tree_sha = f"t{len(fake.trees)}"
+                    fake.trees[tree_sha] = tree
+                    return self.send(201, {"sha": tree_sha, "tree": []})
+                if path == "/git/commits":
+                    commit_sha = fake._commit(fake.trees[body["tree"]], body["message"], body["parents"], move=False)
+                    return self.send(201, {"sha": commit_sha, "tree": {"sha": body["tree"]}})
+                self.send(404, {"message": "Not Found"})
+
+            def handle_patch(self, path):
+                m = re.fullmatch(r"/git/refs/(.+)", path)
+                if not m:
+                    return self.send(404, {"message": "Not Found"})
+                body = self.payload()
+                if fake.before_ref_update is not None:
+                    hook, fake.before_ref_update = fake.before_ref_update, None
+                    hook()
+                if not body.get("force") and fake.refs[m.group(1)] not in fake.commits[body["sha"]]["parents"]:
+                    return self.send(422, {"message": "Update is not a fast forward"})
+                fake.refs[m.group(1)] = body["sha"]
+                self.send(200, {"ref": "refs/" + m.group(1), "object": {"sha": body["sha"], "type": "commit"}})
+
+        return Handler
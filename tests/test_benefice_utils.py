@@ -0,0 +1,92 @@
+import os
+import pandas as pd
+import pytest
+import benefice_utils
+import storage_utils
+from journal_utils import journal_path, read_journal
+
+def ledger(rows):
+    # Journal (Date, Ventes, Dépenses, Lignes) avec son cumul
+    df = pd.DataFrame(rows, columns=["Date", "Ventes", "Dépenses", "Lignes"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df = df.set_index("Date").astype("float64")
+    df["Benefice_Cumule"] = (df["Ventes"] - df["Dépenses"]).cumsum()
+    return df
+
+def deltas(rows, column="Ventes"):
+    return benefice_utils._par_date(pd.DataFrame(rows, columns=["Date", "Prix"]), column)
+
+def check(result, expected_rows):
+    expected = ledger(expected_rows)
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_freq=False)
+
+BASE = [("2024-01-02", 10.0, 0.0, 1), ("2024-01-05", 0.0, 4.0, 1), ("2024-01-09", 6.0, 0.0, 2)]
+
+def test_sale_on_new_date():
+    result = benefice_utils._apply(ledger(BASE), deltas([("2024-01-12", 3.0)]))
+    check(result, BASE + [("2024-01-12", 3.0, 0.0, 1)])
+
+def test_sale_on_existing_date():
+    result = benefice_utils._apply(ledger(BASE), deltas([("2024-01-05", 2.5), ("2024-01-05", 1.0)]))
+    check(result, [BASE[0], ("2024-01-05", 3.5, 4.0, 3), BASE[2]])
+
+def test_price_change_moves_only_the_difference():
+    # Ligne remplacée par la même ligne à un autre prix : retrait puis ajout
+    result = benefice_utils._apply(ledger(BASE), deltas([("2024-01-02", 10.0)]) * -1)
+    result = benefice_utils._apply(result, deltas([("2024-01-02", 12.0)]))
+    check(result, [("2024-01-02", 12.0, 0.0, 1)] + BASE[1:])
+
+def test_deleting_last_line_of_a_date_removes_it():
+    result = benefice_utils._apply(ledger(BASE), deltas([("2024-01-05", 4.0)], "Dépenses") * -1)
+    check(result, [BASE[0], BASE[2]])
+    assert result["Benefice_Cumule"].tolist() == [10.0, 16.0]
+
+def test_out_of_order_date_shifts_later_cumulative():
+    result = benefice_utils._apply(ledger(BASE), deltas([("2024-01-03", 5.0)], "Dépenses"))
+    check(result, [BASE[0], ("2024-01-03", 0.0, 5.0, 1)] + BASE[1:])
+    assert result["Benefice_Cumule"].tolist() == [10.0, 5.0, 1.0, 7.0]
+    # Avant la première date : le cumul part de zéro
+    result = benefice_utils._apply(result, deltas([("2023-12-31", 1.0)]))
+    assert result["Benefice_Cumule"].tolist() == [1.0, 11.0, 6.0, 2.0, 8.0]
+
+def test_dates_are_read_like_apply_schema():
+    result = deltas([("2024-01-02T10:30:00", 1.0), ("2024-01-02", 2.0), ("pas une date", 5.0)])
+    assert result.index.tolist() == [pd.Timestamp("2024-01-02")]
+    assert result["Ventes"].tolist() == [3.0]
+
+def vente(vente_id, date, prix):
+    return pd.DataFrame({"Vente_ID": [vente_id], "Date": [date], "Client_ID": [1], "Produit_ID": [1],
+                         "Quantité": [1.0], "Prix": [prix]})
+
+def add_vente(vente_id, date, prix):
+    version = storage_utils.table_version("ventes")
+    rows = vente(vente_id, date, prix)
+    storage_utils.insert_rows("ventes", rows)
+    benefice_utils.benefice_rows_added("ventes", version, rows)
+
+def test_writes_are_appended_and_reloaded(data_dir):
+    add_vente(1, "2024-01-02", 10.0)
+    benefice_utils.get_benefice_journalier()
+    with open(benefice_utils.LEDGER_FILE, encoding="utf-8") as f:
+        snapshot = f.read()
+    add_vente(2, "2024-01-05", 4.0)
+    add_vente(3, "2024-01-03", 1.0)
+    # Le fichier n'est pas réécrit : les écarts sont ajoutés à son journal
+    with open(benefice_utils.LEDGER_FILE, encoding="utf-8") as f:
+        assert f.read() == snapshot
+    assert len(read_journal(benefice_utils.LEDGER_FILE)) == 2
+    expected = benefice_utils._build_ledger()
+    pd.testing.assert_frame_equal(benefice_utils._get_entry()["ledger"], expected, check_freq=False)
+    # Nouveau processus : fichier et journal relus sans reconstruction
+    benefice_utils._ledgers().clear()
+    entry = benefice_utils._load(benefice_utils._current_versions())
+    pd.testing.assert_frame_equal(entry["ledger"], expected, check_freq=False)
+
+def test_large_journal_is_folded_into_the_file(data_dir, monkeypatch):
+    monkeypatch.setattr(benefice_utils, "JOURNAL_MAX_BYTES", 1)
+    add_vente(1, "2024-01-02", 10.0)
+    benefice_utils.get_benefice_journalier()
+    add_vente(2, "2024-01-05", 4.0)
+    assert not os.path.exists(journal_path(benefice_utils.LEDGER_FILE))
+    benefice_utils._ledgers().clear()
+    assert benefice_utils.get_dernier_benefice_journal() == (14.0, pd.Timestamp("2024-01-05"))
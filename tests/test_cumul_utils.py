@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+import cumul_utils
+import storage_utils
+
+@pytest.fixture
+def depenses(data_dir):
+    pd.DataFrame({"Depense_ID": [1, 2, 3, 4, 5],
+                  "Date": ["2024-01-02", "2024-01-02", "2024-01-05", "2024-01-09", "2024-02-01"],
+                  "Nom": ["Eau", "Graines", "Eau", "Outils", "Eau"],
+                  "Prix": [1.0, 10.0, 2.0, 20.0, 4.0]}).to_csv("data/depenses.csv", index=False)
+
+def totals(start=None, end=None):
+    return cumul_utils.range_totals("depenses_nom", start, end).to_dict()
+
+def test_whole_table_without_bounds(depenses):
+    assert totals() == pytest.approx({"Eau": 7.0, "Graines": 10.0, "Outils": 20.0})
+
+def test_bounds_are_inclusive(depenses):
+    assert totals("2024-01-02", "2024-01-02") == pytest.approx({"Eau": 1.0, "Graines": 10.0})
+    assert totals("2024-01-05", "2024-01-09") == pytest.approx({"Eau": 2.0, "Outils": 20.0})
+    assert totals("2024-01-09", "2024-02-01") == pytest.approx({"Outils": 20.0, "Eau": 4.0})
+
+def test_days_outside_bounds_are_excluded(depenses):
+    assert totals("2024-01-03", "2024-01-08") == pytest.approx({"Eau": 2.0})
+    assert totals("2024-01-06", "2024-01-08") == {}
+
+def test_ranges_before_first_or_after_last_date(depenses):
+    assert totals("2023-01-01", "2024-01-01") == {}
+    assert totals("2024-02-02", "2025-01-01") == {}
+    # Bornes débordantes : ramenées aux dates de la table
+    assert totals("2023-01-01", "2024-01-02") == pytest.approx({"Eau": 1.0, "Graines": 10.0})
+    assert totals("2024-02-01", "2030-01-01") == pytest.approx({"Eau": 4.0})
+
+def test_empty_range_and_empty_table(depenses):
+    assert totals("2024-01-09", "2024-01-05") == {}
+    storage_utils.replace_table("depenses", pd.DataFrame(columns=["Depense_ID", "Date", "Nom", "Prix"]))
+    assert totals() == {}
+    assert totals("2024-01-01", "2024-12-31") == {}
+
+def test_index_size_follows_present_key_days(data_dir):
+    # Trois ans, mille clients, une vente par client : un couple (clé, jour) par ligne, pas jours x clés
+    days = pd.date_range("2021-01-01", periods=1000, freq="D")
+    pd.DataFrame({"Vente_ID": range(1000), "Date": days.strftime("%Y-%m-%d"), "Client_ID": range(1000),
+                  "Produit_ID": 1, "Quantité": 1.0, "Prix": 1.0}).to_csv("data/ventes.csv", index=False)
+    entry = cumul_utils._get_range_index("ventes_client")
+    assert len(entry["cells"]) == 1000 and len(entry["sums"]) == 1001
+    assert cumul_utils.range_totals("ventes_client", "2021-01-10", "2021-01-12").to_dict() == {9: 1.0, 10: 1.0, 11: 1.0}
@@ -0,0 +1,116 @@
+import github
+import pytest
+import github_utils
+from fake_github import FakeGitHub, REPO
+
+@pytest.fixture
+def server():
+    fake = FakeGitHub().start()
+    yield fake
+    fake.stop()
+
+class _UnthrottledGithub(github.Github):
+    # PyGithub espace ses requêtes (1 s entre deux écritures) : inutile face au faux serveur
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, seconds_between_requests=0, seconds_between_writes=0, **kwargs)
+
+@pytest.fixture
+def client(server, monkeypatch):
+    monkeypatch.setattr(github, "Github", _UnthrottledGithub)
+    # SHA connus et fichiers compressés remis à zéro : chaque test part d'un processus neuf
+    monkeypatch.setattr(github_utils, "_blob_shas", {})
+    monkeypatch.setattr(github_utils, "_compressed_paths", set())
+    monkeypatch.setattr(github_utils, "_stats", {"requests_made": 0, "requests_saved": 0})
+    client = github_utils._Client({"token": "t", "repo": REPO, "api_url": server.url})
+    yield client
+    client.pool.shutdown()
+
+def test_single_small_file_uses_contents_api(server, client):
+    github_utils._push_files({"data/clients.csv": "Client_ID\n1\n"}, "Ajout de client", client)
+    assert server.requests("PUT") == [("PUT", "/contents/data/clients.csv")]
+    assert server.read("data/clients.csv") == b"Client_ID\n1\n"
+    # Fichier inconnu du processus : version compressée cherchée, puis SHA lu
+    first_reads = [("GET", "/contents/data/clients.csv.gz"), ("GET", "/contents/data/clients.csv")]
+    assert server.requests("GET") == first_reads
+    assert github_utils.get_github_stats()["requests_saved"] == 0
+    # SHA retenu : la mise à jour suivante ne relit rien, et les deux lectures évitées sont comptées
+    github_utils._push_files({"data/clients.csv": "Client_ID\n1\n2\n"}, "Ajout de client", client)
+    assert server.requests("GET") == first_reads
+    assert github_utils.get_github_stats()["requests_saved"] == 2
+    assert server.read("data/clients.csv") == b"Client_ID\n1\n2\n"
+
+def test_stale_sha_is_reread_once(server, client):
+    github_utils._push_files({"data/clients.csv": "a\n"}, "m1", client)
+    server.commit_files({"data/clients.csv": b"autre version\n"}, "externe")
+    github_utils._push_files({"data/clients.csv": "b\n"}, "m2", client)
+    assert server.read("data/clients.csv") == b"b\n"
+
+def test_multiple_files_go_through_blob_tree_commit_ref(server, client):
+    files = {"data/ventes.csv": "Vente_ID\n1\n", "data/clients.csv": "Client_ID\n1\n", "data/produits.csv": "Produit_ID\n1\n"}
+    github_utils._push_files(files, "Synchronisation", client)
+    writes = [request for request in server.log if request[0] != "GET"]
+    assert writes[:3] == [("POST", "/git/blobs")] * 3
+    assert writes[3:] == [("POST", "/git/trees"), ("POST", "/git/commits"), ("PATCH", "/git/refs/heads/master")]
+    assert {path: server.read(path).decode() for path in files} == files
+    assert server.head_message() == "Synchronisation"
+    assert len(server.commits) == 2
+    # Fichiers désormais connus non compressés : l'arbre n'est pas relu au commit suivant
+    tree_reads = [request for request in server.requests("GET") if request[1].startswith("/git/trees")]
+    assert tree_reads
+    assert github_utils.get_github_stats()["requests_saved"] == 0
+    github_utils._push_files({path: content + "2\n" for path, content in files.items()}, "Synchronisation", client)
+    assert [request for request in server.requests("GET") if request[1].startswith("/git/trees")] == tree_reads
+    assert github_utils.get_github_stats()["requests_saved"] == 1
+
+def test_ref_update_conflict_is_retried_on_new_parent(server, client):
+    # Un autre client pousse pendant notre commit : la branche a avancé, GitHub répond 422
+    server.before_ref_update = lambda: server.commit_files({"data/autre.csv": b"x\n"}, "externe")
+    github_utils._push_files({"data/ventes.csv": "1\n", "data/depenses.csv": "2\n"}, "Synchronisation", client)
+    assert server.requests("PATCH") == [("PATCH", "/git/refs/heads/master")] * 2
+    assert set(server.head_tree()) == {"data/autre.csv", "data/ventes.csv", "data/depenses.csv"}
+    assert server.head_message() == "Synchronisation"
+
+def test_upload_pool_and_thread_clients_are_reused(server, client, monkeypatch):
+    created = []
+    make_repo = github_utils._make_repo
+    monkeypatch.setattr(github_utils, "_make_repo", lambda settings: created.append(1) or make_repo(settings))
+    files = {f"data/f{i}.csv": f"{i}\n" for i in range(github_utils.MAX_UPLOAD_WORKERS)}
+    github_utils._push_files(files, "premier", client)
+    first = len(created)
+    assert 1 <= first <= github_utils.MAX_UPLOAD_WORKERS
+    for round_number in range(3):
+        github_utils._push_files({path: f"{round_number}\n" for path in files}, f"commit {round_number}", client)
+    assert len(created) <= github_utils.MAX_UPLOAD_WORKERS
+    assert server.read("data/f0.csv") == b"2\n"
+
+def test_pull_file_reads_through_git_data_api(server, client):
+    server.commit_files({"data/ventes.csv": "Vente_ID\n1\n".encode("utf-16")}, "fichier d'origine")
+    assert github_utils._pull_file("data/ventes.csv", client) == "Vente_ID\n1\n"
+    assert github_utils._pull_file("data/absent.csv", client) is None
+
+def restart(monkeypatch):
+    # Nouveau processus : SHA connus et fichiers compressés oubliés
+    monkeypatch.setattr(github_utils, "_blob_shas", {})
+    monkeypatch.setattr(github_utils, "_compressed_paths", set())
+    monkeypatch.setattr(github_utils, "_stats", {"requests_made": 0, "requests_saved": 0})
+
+def test_shrunk_file_after_restart_replaces_compressed_version(server, client, monkeypatch):
+    monkeypatch.setattr(github_utils, "LARGE_FILE_THRESHOLD", 20)
+    github_utils._push_files({"data/ventes.csv": "Vente_ID\n" + "1\n" * 20}, "gros fichier", client)
+    assert set(server.head_tree()) == {"data/ventes.csv.gz"}
+    restart(monkeypatch)
+    github_utils._push_files({"data/ventes.csv": "Vente_ID\n1\n"}, "fichier réduit", client)
+    assert set(server.head_tree()) == {"data/ventes.csv"}
+    assert github_utils._pull_file("data/ventes.csv", client) == "Vente_ID\n1\n"
+
+def test_shrunk_files_after_restart_are_cleaned_in_one_commit(server, client, monkeypatch):
+    monkeypatch.setattr(github_utils, "LARGE_FILE_THRESHOLD", 20)
+    github_utils._push_files({"data/ventes.csv": "Vente_ID\n" + "1\n" * 20, "data/clients.csv": "1\n"}, "m1", client)
+    restart(monkeypatch)
+    github_utils._push_files({"data/ventes.csv": "Vente_ID\n1\n", "data/clients.csv": "2\n"}, "m2", client)
+    assert set(server.head_tree()) == {"data/ventes.csv", "data/clients.csv"}
+    # Versions désormais connues : l'arbre n'est plus relu
+    tree_reads = len([request for request in server.log if request[1].startswith("/git/trees/")])
+    github_utils._push_files({"data/ventes.csv": "Vente_ID\n2\n", "data/clients.csv": "3\n"}, "m3", client)
+    assert len([request for request in server.log if request[1].startswith("/git/trees/")]) == tree_reads
+    assert server.read("data/ventes.csv") == b"Vente_ID\n2\n"
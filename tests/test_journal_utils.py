@@ -0,0 +1,71 @@
+import os
+import pandas as pd
+import storage_utils
+from journal_utils import append_journal, has_journal, journal_path, read_journal, replay_journal
+
+DEPENSES = "data/depenses.csv"
+COLUMNS = storage_utils.TABLES["depenses"]["columns"]
+
+def write_depenses():
+    pd.DataFrame({"Depense_ID": [1, 2, 3], "Date": ["2024-01-02", "2024-02-03", "2024-03-04"],
+                  "Nom": ["Graines", "Eau", "Outils"], "Prix": [10.0, 4.5, 20.0]}).to_csv(DEPENSES, index=False)
+
+def new_rows(*ids):
+    return pd.DataFrame({"Depense_ID": list(ids), "Date": "2024-04-05", "Nom": "Plants", "Prix": 7.0})
+
+def test_replay_applies_inserts_updates_and_deletes_in_order(data_dir):
+    write_depenses()
+    append_journal(DEPENSES, {"op": "insert", "rows": new_rows(4, 5)})
+    # La modification vise aussi une ligne ajoutée par le journal
+    append_journal(DEPENSES, {"op": "update", "column": "Depense_ID", "values": [2, 4], "changes": {"Prix": 1.0}})
+    append_journal(DEPENSES, {"op": "delete", "column": "Depense_ID", "values": [1]})
+    append_journal(DEPENSES, {"op": "delete", "column": "Depense_ID", "values": [5]})
+    append_journal(DEPENSES, {"op": "insert", "rows": new_rows(6)})
+    entries = read_journal(DEPENSES)
+    assert [entry["op"] for entry in entries] == ["insert", "update", "delete", "delete", "insert"]
+    df = replay_journal(pd.read_csv(DEPENSES), entries, COLUMNS)
+    assert df["Depense_ID"].astype(int).tolist() == [2, 3, 4, 6]
+    assert df["Prix"].astype(float).tolist() == [1.0, 20.0, 1.0, 7.0]
+    # Même résultat par le moteur CSV
+    read = storage_utils.CsvStorage().read("depenses")
+    assert read["Depense_ID"].astype(int).tolist() == [2, 3, 4, 6]
+
+def test_journal_of_another_snapshot_is_ignored(data_dir):
+    write_depenses()
+    append_journal(DEPENSES, {"op": "delete", "column": "Depense_ID", "values": [1]})
+    assert has_journal(DEPENSES)
+    # CSV remplacé sans passer par le moteur (restauration, copie) : le journal ne s'applique plus
+    pd.read_csv(DEPENSES).iloc[:2].to_csv(DEPENSES, index=False)
+    assert read_journal(DEPENSES) == []
+    assert storage_utils.CsvStorage().read("depenses")["Depense_ID"].tolist() == [1, 2]
+    # Nouvelle écriture : nouveau journal, l'ancienne suppression n'est pas reprise
+    append_journal(DEPENSES, {"op": "delete", "column": "Depense_ID", "values": [2]})
+    assert [entry["values"] for entry in read_journal(DEPENSES)] == [[2]]
+
+def test_truncated_last_line_is_dropped(data_dir):
+    write_depenses()
+    append_journal(DEPENSES, {"op": "delete", "column": "Depense_ID", "values": [1]})
+    append_journal(DEPENSES, {"op": "update", "column": "Depense_ID", "values": [2], "changes": {"Prix": 3.0}})
+    # Écriture interrompue au milieu de la ligne suivante
+    with open(journal_path(DEPENSES), "a", encoding="utf-8") as f:
+        f.write('{"op": "delete", "column": "Depense_ID", "val')
+    assert [entry["op"] for entry in read_journal(DEPENSES)] == ["delete", "update"]
+    df = storage_utils.CsvStorage().read("depenses")
+    assert df["Depense_ID"].tolist() == [2, 3] and df["Prix"].tolist() == [3.0, 20.0]
+    # L'écriture suivante retire la fin interrompue avant d'ajouter sa ligne
+    append_journal(DEPENSES, {"op": "delete", "column": "Depense_ID", "values": [3]})
+    assert [entry["op"] for entry in read_journal(DEPENSES)] == ["delete", "update", "delete"]
+
+def test_export_compacts_and_removes_the_journal(data_dir):
+    write_depenses()
+    storage = storage_utils.CsvStorage()
+    storage.update("depenses", "Depense_ID", [2], {"Nom": "Arrosage"})
+    storage.delete("depenses", "Depense_ID", [3])
+    storage.insert("depenses", new_rows(4))
+    assert os.path.exists(journal_path(DEPENSES))
+    content = storage.export("depenses")
+    assert not os.path.exists(journal_path(DEPENSES))
+    assert content.splitlines() == ["Depense_ID,Date,Nom,Prix", "1,2024-01-02,Graines,10.0",
+                                    "2,2024-02-03,Arrosage,4.5", "4,2024-04-05,Plants,7.0"]
+    with open(DEPENSES, encoding="utf-8") as f:
+        assert f.read() == content
@@ -0,0 +1,82 @@
+import pandas as pd
+import pytest
+import memo_utils
+import storage_utils
+from memo_utils import memoize, skip_memo, get_memo_stats
+
+DEPENSES = pd.DataFrame({"Depense_ID": [1, 2], "Date": ["2024-01-02", "2024-02-03"],
+                         "Nom": ["Graines", "Eau"], "Prix": [10.0, 4.5]})
+
+@pytest.fixture
+def depenses(data_dir):
+    storage_utils.replace_table("depenses", DEPENSES)
+    return data_dir
+
+def _counted(calls, module=__name__):
+    # Fonction mémorisée qui enregistre chacun de ses calculs
+    def total(factor):
+        calls.append(factor)
+        return storage_utils.get_table("depenses")["Prix"].sum() * factor
+    total.__module__ = module
+    return memoize("depenses")(total)
+
+def test_lru_evicts_least_recently_used(depenses, monkeypatch):
+    monkeypatch.setattr(memo_utils, "_get_memo_size", lambda: 2)
+    calls = []
+    total = _counted(calls)
+    assert [total(1), total(2), total(1), total(3)] == [14.5, 29.0, 14.5, 43.5]
+    assert calls == [1, 2, 3]
+    # 2 est le moins récemment utilisé : évincé à l'arrivée de 3, alors que 1 est gardé
+    total(1)
+    total(2)
+    assert calls == [1, 2, 3, 2]
+    stats = get_memo_stats()[f"{__name__}.{total.__qualname__}"]
+    assert stats["size"] == 2 and stats["hits"] == 2 and stats["misses"] == 4
+
+def test_write_to_table_invalidates_results(depenses):
+    calls = []
+    total = _counted(calls)
+    assert total(1) == total(1) == 14.5
+    storage_utils.insert_rows("depenses", pd.DataFrame({"Depense_ID": [3], "Date": ["2024-03-04"],
+                                                        "Nom": ["Outils"], "Prix": [20.0]}))
+    assert total(1) == 34.5
+    assert total(1) == 34.5
+    assert calls == [1, 1]
+
+def test_same_name_in_other_module_has_its_own_cache(depenses):
+    calls_a, calls_b = [], []
+    total_a = _counted(calls_a, "module_a")
+    total_b = _counted(calls_b, "module_b")
+    total_a(1)
+    total_b(1)
+    assert calls_a == [1] and calls_b == [1]
+    assert {"module_a._counted.<locals>.total", "module_b._counted.<locals>.total"} <= set(get_memo_stats())
+
+def test_fallback_after_error_is_not_memoized(depenses):
+    calls = []
+
+    @memoize("depenses")
+    def inner():
+        calls.append("inner")
+        skip_memo()
+        return pd.DataFrame(columns=["Prix"])
+
+    @memoize("depenses")
+    def outer():
+        calls.append("outer")
+        return len(inner())
+
+    assert outer() == 0
+    assert outer() == 0
+    # Ni la valeur de repli ni le résultat qui en dépend ne sont gardés
+    assert calls == ["outer", "inner", "outer", "inner"]
+
+def test_each_caller_gets_its_own_figure(farm):
+    from statistiques_fonction import plot_chiffre_affaires_per_product
+    fig = plot_chiffre_affaires_per_product()
+    fig.update_layout(title="Modifié par une session")
+    other = plot_chiffre_affaires_per_product()
+    assert get_memo_stats()["statistiques_fonction.plot_chiffre_affaires_per_product"]["hits"] == 1
+    assert other is not fig
+    assert other.layout.title.text == "Chiffre d'affaires par produit (€)"
+    assert list(other.data[0].y) == [3.0]
@@ -0,0 +1,165 @@
+import io
+import multiprocessing
+import threading
+import pandas as pd
+import pytest
+import storage_utils
+import upsert_utils
+
+@pytest.fixture
+def storage(data_dir, monkeypatch):
+    # Moteur CSV dans un dossier temporaire, lectures enregistrées
+    pd.DataFrame({"Depense_ID": [1, 2], "Date": ["2024-01-02", "2024-02-03"],
+                  "Nom": ["Graines", "Eau"], "Prix": [10.0, 4.5]}).to_csv("data/depenses.csv", index=False)
+    storage = storage_utils.CsvStorage()
+    monkeypatch.setattr(storage_utils, "get_storage", lambda: storage)
+    reads = []
+    read = storage.read
+    monkeypatch.setattr(storage, "read", lambda name, columns=None: reads.append(columns) or read(name, columns))
+    return reads
+
+def test_projection_reads_only_requested_columns(storage):
+    df = storage_utils.get_table("depenses", ["Date", "Prix"])
+    assert list(df.columns) == ["Date", "Prix"]
+    assert df["Prix"].tolist() == [10.0, 4.5]
+    # Sous-ensemble des colonnes déjà lues : servi sans relecture
+    assert storage_utils.get_table("depenses", ["Prix"])["Prix"].sum() == 14.5
+    assert storage == [["Date", "Prix"]]
+    storage_utils.get_table("depenses", ["Depense_ID"])
+    assert storage == [["Date", "Prix"], ["Depense_ID"]]
+
+def test_full_table_serves_projections(storage):
+    storage_utils.get_table("depenses")
+    assert list(storage_utils.get_table("depenses", ["Nom"]).columns) == ["Nom"]
+    assert storage == [None]
+    assert storage_utils._projections("depenses") == []
+
+def test_write_drops_projections(storage):
+    storage_utils.get_table("depenses", ["Prix"])
+    rows = pd.DataFrame({"Depense_ID": [3], "Date": ["2024-03-04"], "Nom": ["Outils"], "Prix": [20.0]})
+    storage_utils.insert_rows("depenses", rows)
+    assert storage_utils._projections("depenses") == []
+    assert storage_utils.get_table("depenses", ["Prix"])["Prix"].tolist() == [10.0, 4.5, 20.0]
+    assert storage == [["Prix"], ["Prix"]]
+
+def test_concurrent_sqlite_first_use_imports_once(tmp_path, monkeypatch):
+    # Quatre serveurs démarrent en même temps sur la même base : un seul importe le CSV
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    count = 20000
+    pd.DataFrame({"Vente_ID": range(1, count + 1), "Date": "2024-01-02", "Client_ID": 1, "Produit_ID": 1,
+                  "Quantité": 1.0, "Prix": 2.0}).to_csv("data/ventes.csv", index=False)
+    barrier = threading.Barrier(4)
+    results = []
+    def start():
+        barrier.wait()
+        try:
+            results.append(len(storage_utils.SqliteStorage().read("ventes")))
+        except Exception as e:
+            results.append(e)
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [count] * 4
+
+def _reserve(args):
+    # Processus serveur : réserve des blocs d'identifiants et retourne les identifiants obtenus
+    barrier, sizes = args
+    barrier.wait()
+    ids = []
+    for size in sizes:
+        first = storage_utils.next_id("ventes", size)
+        ids.extend(range(first, first + size))
+    return ids
+
+def test_next_id_has_no_duplicates_across_processes_and_threads(data_dir):
+    pd.DataFrame({"Vente_ID": [1, 7], "Date": "2024-01-02", "Client_ID": 1, "Produit_ID": 1,
+                  "Quantité": 1.0, "Prix": 2.0}).to_csv("data/ventes.csv", index=False)
+    sizes = [1, 3, 1, 2] * 10
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Manager().Barrier(4)
+    with ctx.Pool(4) as pool:
+        ids = [i for result in pool.map(_reserve, [(barrier, sizes)] * 4) for i in result]
+    thread_barrier = threading.Barrier(4)
+    thread_ids = []
+    threads = [threading.Thread(target=lambda: thread_ids.extend(_reserve((thread_barrier, sizes))))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids += thread_ids
+    # Compteur repris après le plus grand identifiant de la table, sans trou ni doublon
+    assert sorted(ids) == list(range(8, 8 + 8 * sum(sizes)))
+
+def test_stale_expected_version_raises_and_retry_succeeds(data_dir, monkeypatch):
+    clients = pd.DataFrame({"Client_ID": [1], "Nom": ["Dupont"], "Prénom": ["Jean"], "Email": [""], "Téléphone": [""]})
+    storage_utils.replace_table("clients", clients)
+    version = storage_utils.table_version("clients")
+    storage_utils.insert_rows("clients", clients.assign(Client_ID=2, Nom="Martin"))
+    with pytest.raises(storage_utils.VersionConflict):
+        storage_utils.replace_table("clients", clients, expected_version=version)
+    assert storage_utils.get_table("clients")["Nom"].tolist() == ["Dupont", "Martin"]
+
+    # Une autre session écrit pendant la fusion : le premier remplacement est refusé, le second réussit
+    replace_table = upsert_utils.replace_table
+    attempts = []
+    def concurrent_replace(name, df, expected_version=None):
+        if not attempts:
+            storage_utils.insert_rows("clients", clients.assign(Client_ID=3, Nom="Roux"))
+        attempts.append(expected_version)
+        replace_table(name, df, expected_version=expected_version)
+    monkeypatch.setattr(upsert_utils, "replace_table", concurrent_replace)
+    result = upsert_utils.upsert_rows("clients", clients.assign(Client_ID=9, Nom="Petit"))
+    assert len(attempts) == 2 and attempts[1] == attempts[0] + 1
+    assert result["inserted"] == 1
+    assert storage_utils.get_table("clients")["Nom"].tolist() == ["Dupont", "Martin", "Roux", "Petit"]
+
+def test_upload_dedups_across_chunks_and_counts_invalid_rows(farm):
+    progress = []
+    # Morceaux de deux lignes : chaque doublon est dans un autre morceau que sa première occurrence
+    content = ("Depense_ID,Date,Nom,Prix\n"
+               "1,2024-01-02,Graines,10.0\n"   # morceau 1
+               "2,2024-01-03,Eau,4.0\n"
+               "3,2024-01-04,Outils,20.0\n"    # morceau 2
+               ",2024-01-05,Sans identifiant,1.0\n"
+               "3,2024-01-04,Outils,20.0\n"    # morceau 3 : doublon d'une ligne du morceau précédent
+               "4,pas une date,Plants,2.0\n"
+               "1,2024-01-02,Graines,10.0\n")  # morceau 4 : déjà dans la table après le morceau 1
+    counts = storage_utils.upload_new_rows("depenses", io.StringIO(content), ["Depense_ID", "Date", "Nom"],
+                                           progress=lambda c: progress.append(dict(c)), chunk_size=2)
+    assert counts == {"inserted": 3, "skipped": 2, "invalid": 2}
+    assert [c["inserted"] for c in progress] == [2, 3, 3, 3]
+    assert storage_utils.get_table("depenses")["Depense_ID"].tolist() == [1, 2, 3]
+    # Nouveau chargement du même fichier : tout est déjà présent
+    counts = storage_utils.upload_new_rows("depenses", io.StringIO(content), ["Depense_ID", "Date", "Nom"], chunk_size=3)
+    assert counts == {"inserted": 0, "skipped": 5, "invalid": 2}
+
+def test_arrow_read_pushes_projection_and_filter_down(data_dir):
+    pc = pytest.importorskip("pyarrow.compute")
+    storage = storage_utils.ArrowStorage()
+    storage.insert("depenses", pd.DataFrame({"Depense_ID": [1, 2], "Date": ["2024-01-02", "2024-02-03"],
+                                             "Nom": ["Graines", "Eau"], "Prix": [10.0, 4.5]}))
+    storage.insert("depenses", pd.DataFrame({"Depense_ID": [3, None], "Date": ["2024-03-04", "2024-03-05"],
+                                             "Nom": ["Outils", "Sans identifiant"], "Prix": [20.0, 1.0]}))
+    df = storage.read("depenses", ["Nom", "Prix"], filter=pc.field("Prix") > 5)
+    assert list(df.columns) == ["Nom", "Prix"]
+    assert df["Nom"].tolist() == ["Graines", "Outils"]
+    # Suppression filtrée par Arrow : les lignes sans identifiant sont gardées, comme avec les autres moteurs
+    assert storage.delete("depenses", "Depense_ID", [1, 3, 99]) == 2
+    assert storage.read("depenses", ["Nom"])["Nom"].tolist() == ["Eau", "Sans identifiant"]
+    assert storage.delete("depenses", "Depense_ID", [99]) == 0
+
+def test_arrow_export_waits_for_writes(data_dir):
+    pytest.importorskip("pyarrow")
+    storage = storage_utils.ArrowStorage()
+    exported = []
+    with storage.lock:
+        thread = threading.Thread(target=lambda: exported.append(storage.export("depenses")))
+        thread.start()
+        thread.join(0.2)
+        assert exported == []
+    thread.join()
+    assert exported == ["Depense_ID,Date,Nom,Prix\n"]
@@ -0,0 +1,164 @@
+import types
+import pytest
+import sync_utils
+
+VENTES = "data/ventes.csv"
+CLIENTS = "data/clients.csv"
+
+class FakePush:
+    """push_fn enregistrant les commits ; échoue tant que failures > 0 ou si un fichier refusé est inclus."""
+    def __init__(self, failures=0, rejected=()):
+        self.calls = []
+        self.failures = failures
+        self.rejected = set(rejected)
+
+    def __call__(self, files, commit_message):
+        self.calls.append((dict(files), commit_message))
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("GitHub indisponible")
+        if self.rejected & set(files):
+            raise RuntimeError("fichier refusé")
+
+def export(file_path):
+    return f"contenu de {file_path}"
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    # File dans un dossier temporaire, fenêtre de 5 s, horloge manuelle et pas de thread
+    now = {"t": 1000.0}
+    monkeypatch.setattr(sync_utils, "PENDING_FILE", str(tmp_path / "pending.json"))
+    monkeypatch.setattr(sync_utils, "_get_debounce", lambda: 5.0)
+    monkeypatch.setattr(sync_utils, "start_sync_worker", lambda github=False: None)
+    monkeypatch.setattr(sync_utils, "time", types.SimpleNamespace(time=lambda: now["t"], sleep=lambda s: None))
+    monkeypatch.setattr(sync_utils, "_status", {"last_sync": None, "last_error": None})
+    return now
+
+def process(clock, push, export_fn=export):
+    return sync_utils.process_pending(push, export_fn, now=clock["t"])
+
+def test_push_waits_for_debounce_window(clock):
+    push = FakePush()
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    clock["t"] += 4
+    assert process(clock, push) == 0
+    clock["t"] += 1
+    assert process(clock, push) == 1
+    assert push.calls == [({VENTES: export(VENTES)}, "Ajout de la vente ID 1")]
+    assert sync_utils.get_sync_status()["pending"] == 0
+
+def test_writes_of_a_file_are_coalesced(clock):
+    push = FakePush()
+    for vente_id in range(1, 4):
+        sync_utils.enqueue_push(VENTES, f"Ajout de la vente ID {vente_id}")
+        clock["t"] += 1
+    clock["t"] += 5
+    assert process(clock, push) == 1
+    (files, message), = push.calls
+    assert list(files) == [VENTES]
+    assert message.startswith("3 modifications de ventes.csv")
+    assert "- Ajout de la vente ID 3" in message
+
+def test_files_ready_together_share_one_commit(clock):
+    push = FakePush()
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    sync_utils.enqueue_push(CLIENTS, "Ajout/modification de client Dupont Jean")
+    clock["t"] += 5
+    assert process(clock, push) == 2
+    (files, message), = push.calls
+    assert set(files) == {VENTES, CLIENTS}
+    assert message.startswith("Synchronisation de ventes.csv, clients.csv")
+
+def test_continuous_writes_are_pushed_after_max_wait(clock):
+    push = FakePush()
+    start = clock["t"]
+    while not push.calls:
+        sync_utils.enqueue_push(VENTES, "Ajout d'une vente")
+        clock["t"] += 4
+        process(clock, push)
+    assert clock["t"] - start <= 5.0 * sync_utils.MAX_WAIT_FACTOR + 4
+
+def test_failed_push_is_retried_with_exponential_backoff(clock):
+    push = FakePush(failures=2)
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    clock["t"] += 5
+    assert process(clock, push) == 0
+    assert sync_utils.get_sync_status()["last_error"]
+    clock["t"] += sync_utils.RETRY_BASE - 1
+    process(clock, push)
+    assert len(push.calls) == 1
+    clock["t"] += 1
+    assert process(clock, push) == 0
+    assert len(push.calls) == 2
+    # Deuxième échec : délai doublé
+    clock["t"] += 2 * sync_utils.RETRY_BASE - 1
+    process(clock, push)
+    assert len(push.calls) == 2
+    clock["t"] += 1
+    assert process(clock, push) == 1
+    status = sync_utils.get_sync_status()
+    assert status["pending"] == 0 and status["last_error"] is None
+
+def test_export_failure_does_not_block_other_files(clock):
+    push = FakePush()
+    def export_fn(file_path):
+        if file_path == CLIENTS:
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+        return export(file_path)
+    sync_utils.enqueue_push(CLIENTS, "Ajout/modification de client Dupont Jean")
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    clock["t"] += 5
+    assert process(clock, push, export_fn) == 1
+    assert [list(files) for files, _ in push.calls] == [[VENTES]]
+    pending = sync_utils._load_pending()
+    assert list(pending) == [CLIENTS]
+    assert pending[CLIENTS]["attempts"] == 1
+
+def test_rejected_file_does_not_block_other_files(clock):
+    push = FakePush(rejected=[CLIENTS])
+    sync_utils.enqueue_push(CLIENTS, "Ajout/modification de client Dupont Jean")
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    clock["t"] += 5
+    assert process(clock, push) == 1
+    # Commit groupé refusé, puis chaque fichier seul
+    assert [sorted(files) for files, _ in push.calls] == [sorted([CLIENTS, VENTES]), [CLIENTS], [VENTES]]
+    assert list(sync_utils._load_pending()) == [CLIENTS]
+
+def test_write_during_push_stays_queued(clock):
+    def push(files, commit_message):
+        sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 2")
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    clock["t"] += 5
+    assert sync_utils.process_pending(push, export, now=clock["t"]) == 1
+    assert sync_utils._load_pending()[VENTES]["messages"] == ["Ajout de la vente ID 2"]
+
+def test_claimed_file_is_not_pushed_twice(clock):
+    second = FakePush()
+    def first(files, commit_message):
+        # Pendant l'envoi : nouvelle écriture, puis passage d'un autre appel (autre thread ou processus)
+        sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 2")
+        clock["t"] += 5
+        assert process(clock, second) == 0
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    clock["t"] += 5
+    assert sync_utils.process_pending(first, export, now=clock["t"]) == 1
+    assert second.calls == []
+    # Seul le message pris en charge est retiré : l'écriture arrivée pendant l'envoi part ensuite
+    assert sync_utils._load_pending()[VENTES]["messages"] == ["Ajout de la vente ID 2"]
+    clock["t"] += 5
+    assert process(clock, second) == 1
+    assert second.calls == [({VENTES: export(VENTES)}, "Ajout de la vente ID 2")]
+    assert sync_utils.get_sync_status()["pending"] == 0
+
+def test_expired_claim_is_taken_over(clock):
+    sync_utils.enqueue_push(VENTES, "Ajout de la vente ID 1")
+    clock["t"] += 5
+    pending = sync_utils._load_pending()
+    # Envoi abandonné (processus arrêté au milieu) : le fichier est repris après le bail
+    pending[VENTES]["claim"] = {"token": "ancien", "pid": 0, "until": clock["t"] + 10, "count": 1}
+    sync_utils._save_pending(pending)
+    push = FakePush()
+    assert process(clock, push) == 0
+    clock["t"] += 10
+    assert process(clock, push) == 1
+    assert sync_utils.get_sync_status()["pending"] == 0
@@ -0,0 +1,48 @@
+import io
+import pandas as pd
+import storage_utils
+from client_fonction import upload_clients
+from produit_fonction import upload_produits
+from ventes_fonction import upload_ventes
+
+def remap_pairs(remap):
+    return sorted(map(tuple, remap[["Ancien_ID", "Nouveau_ID"]].to_numpy().tolist()))
+
+def test_upsert_by_name_then_remap_sale_ids(farm):
+    clients = upload_clients(io.StringIO(
+        "Client_ID,Nom,Prénom,Email,Téléphone\n"
+        "1,Martin,Paul,,\n"              # nom connu sous l'identifiant 2
+        "2,Roux,Anne,,\n"                # nouveau client : identifiant suivant
+        "5, dupont ,JEAN,j@x.fr,\n"))    # nom connu (casse et espaces ignorés) : mis à jour
+    assert (clients["inserted"], clients["updated"]) == (1, 2)
+    assert remap_pairs(clients["remap"]) == [(1, 2), (2, 3), (5, 1)]
+    table = storage_utils.get_table("clients")
+    assert table["Client_ID"].tolist() == [1, 2, 3]
+    assert table["Nom"].tolist() == [" dupont ", "Martin", "Roux"]
+    assert table.loc[table["Client_ID"] == 1, "Email"].tolist() == ["j@x.fr"]
+
+    produits = upload_produits(io.StringIO("Produit_ID,Nom,Prix (au Kg)\n10,tomate,4.0\n2,Salade,1.0\n"))
+    assert (produits["inserted"], produits["updated"]) == (1, 1)
+    assert remap_pairs(produits["remap"]) == [(2, 3), (10, 1)]
+    table = storage_utils.get_table("produits")
+    assert table["Prix (au Kg)"].tolist() == [4.0, 2.0, 1.0]
+
+    remaps = {"Client_ID": clients["remap"], "Produit_ID": produits["remap"]}
+    counts = upload_ventes(io.StringIO(
+        "Vente_ID,Date,Client_ID,Produit_ID,Quantité,Prix\n"
+        "20,2024-05-01,1,10,1,4.0\n"
+        "20,2024-05-01,1,2,2,2.0\n"
+        "21,2024-05-02,5,10,1,4.0\n"
+        "22,2024-05-03,7,1,1,4.0\n"),   # identifiants absents des correspondances : gardés tels quels
+        remaps=remaps)
+    assert counts == {"inserted": 4, "skipped": 0, "invalid": 0}
+    ventes = storage_utils.get_table("ventes").set_index("Vente_ID").loc[[20, 21, 22]]
+    assert ventes["Client_ID"].tolist() == [2, 2, 1, 7]
+    assert ventes["Produit_ID"].tolist() == [1, 3, 1, 1]
+
+def test_sales_upload_without_remaps_keeps_file_ids(farm):
+    counts = upload_ventes(io.StringIO("Vente_ID,Date,Client_ID,Produit_ID,Quantité,Prix\n20,2024-05-01,1,10,1,4.0\n"),
+                           remaps={"Client_ID": pd.DataFrame(columns=["Ancien_ID", "Nouveau_ID"])})
+    assert counts["inserted"] == 1
+    vente = storage_utils.get_table("ventes").set_index("Vente_ID").loc[20]
+    assert (vente["Client_ID"], vente["Produit_ID"]) == (1, 10)
@@ -0,0 +1,49 @@
+import pandas as pd
+import storage_utils
+import ventes_fonction
+
+def batch(*rows):
+    return pd.DataFrame(rows, columns=["Date", "Nom", "Prénom", "Produit", "Quantité"])
+
+def test_batch_rejects_invalid_rows_and_numbers_accepted_sales_contiguously(farm):
+    result = ventes_fonction.save_ventes_batch(batch(
+        ("2024-05-01", "Dupont", "Jean", "Tomate", "2"),
+        ("2024-05-01", "Dupont", "Jean", "courgette ", "1"),
+        ("2024-05-01", "Inconnu", "Zoé", "Tomate", "1"),      # client inconnu : vente entière rejetée
+        ("2024-05-01", "Inconnu", "Zoé", "Courgette", "1"),
+        ("2024-13-45", "Martin", "Paul", "Tomate", "1"),      # date invalide
+        ("2024-05-02", "Martin", "Paul", "Licorne", "1"),     # produit inconnu : ligne seule rejetée
+        ("2024-05-02", "Martin", "Paul", "Tomate", "-1"),     # quantité invalide
+        ("2024-05-02", "Martin", "Paul", "Courgette", "1.5"),
+    ))
+    assert (result["ventes"], result["lignes"]) == (2, 3)
+    assert result["rejets"].index.tolist() == [2, 3, 4, 5, 6]
+    assert result["rejets"]["Erreur"].tolist() == ["Client non trouvé", "Client non trouvé", "Date invalide",
+                                                   "Produit non trouvé", "Quantité invalide"]
+    ventes = storage_utils.get_table("ventes")
+    new = ventes[ventes["Vente_ID"] > 5]
+    # Identifiants consécutifs après le plus grand existant, dans l'ordre des tickets
+    assert new["Vente_ID"].tolist() == [6, 6, 7]
+    assert new["Client_ID"].tolist() == [1, 1, 2]
+    assert new["Produit_ID"].tolist() == [1, 2, 2]
+    # Prix absent : quantité x prix au kg
+    assert new["Prix"].tolist() == [6.0, 2.0, 3.0]
+    assert storage_utils.next_id("ventes") == 8
+
+def test_batch_without_valid_rows_writes_nothing(farm):
+    version = storage_utils.table_version("ventes")
+    result = ventes_fonction.save_ventes_batch(batch(
+        ("2024-05-01", "Inconnu", "Zoé", "Tomate", "1"),
+        ("pas une date", "Dupont", "Jean", "Tomate", "1"),
+        ("2024-05-01", "Martin", "Paul", "Tomate", "0"),
+    ))
+    assert (result["ventes"], result["lignes"]) == (0, 0)
+    assert result["rejets"]["Erreur"].tolist() == ["Client non trouvé", "Date invalide", "Quantité invalide"]
+    assert storage_utils.table_version("ventes") == version
+    assert storage_utils.get_table("ventes")["Vente_ID"].tolist() == [5]
+    # Aucun identifiant consommé
+    assert storage_utils.next_id("ventes") == 6
+
+def test_batch_with_missing_columns_is_refused(farm):
+    assert ventes_fonction.save_ventes_batch(pd.DataFrame({"Date": ["2024-05-01"], "Nom": ["Dupont"]})) is None
+    assert storage_utils.get_table("ventes")["Vente_ID"].tolist() == [5]
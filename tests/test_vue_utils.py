@@ -0,0 +1,19 @@
+import pandas as pd
+import storage_utils
+import vue_utils
+from journal_utils import has_journal
+
+def test_table_csv_is_built_once_per_version_without_writing_files(data_dir):
+    pd.DataFrame({"Depense_ID": [1, 2], "Date": ["2024-01-02", "2024-02-03"],
+                  "Nom": ["Graines", "Eau"], "Prix": [10.0, 4.5]}).to_csv("data/depenses.csv", index=False)
+    storage_utils.update_rows("depenses", "Depense_ID", [2], {"Prix": 5.0})
+    assert has_journal("data/depenses.csv")
+    content = vue_utils.table_csv("depenses")
+    assert content.decode("utf-8").splitlines() == ["Depense_ID,Date,Nom,Prix", "1,2024-01-02,Graines,10.0",
+                                                    "2,2024-02-03,Eau,5.0"]
+    assert vue_utils.table_csv("depenses") is content
+    # Le journal n'est pas replié pour un affichage de la page
+    assert has_journal("data/depenses.csv")
+    storage_utils.insert_rows("depenses", pd.DataFrame({"Depense_ID": [3], "Date": ["2024-03-04"],
+                                                        "Nom": ["Outils"], "Prix": [20.0]}))
+    assert vue_utils.table_csv("depenses").decode("utf-8").endswith("3,2024-03-04,Outils,20.0\n")
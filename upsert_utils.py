@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from storage_utils import TABLES, VersionConflict, get_table, table_version, next_id, replace_table
+from index_utils import INDEXED_TABLES
+
+# Colonnes de la table de correspondance des identifiants produite par un upsert
+REMAP_COLUMNS = ["Ancien_ID", "Nouveau_ID"]
+# Nombre d'essais quand la table est modifiée par une autre session pendant la fusion
+UPSERT_ATTEMPTS = 5
+
+def _normalized_keys(df, key_columns):
+    # Même normalisation que les recherches par nom (index_utils.normalize), colonne par colonne
+    return pd.DataFrame({col: df[col].astype("string").fillna("").str.strip().str.lower() for col in key_columns})
+
+def _upsert(name, uploaded):
+    key_columns, id_column = INDEXED_TABLES[name]
+    columns = TABLES[name]["columns"]
+    version = table_version(name)
+    current = get_table(name)
+    uploaded_keys = _normalized_keys(uploaded, key_columns)
+    last = ~uploaded_keys.duplicated(keep="last").to_numpy()
+    rows, keys = uploaded[last].reset_index(drop=True), uploaded_keys[last].reset_index(drop=True)
+
+    existing = _normalized_keys(current, key_columns)
+    existing[id_column] = current[id_column].to_numpy()
+    existing["position"] = np.arange(len(current))
+    existing = existing.drop_duplicates(key_columns)
+    matched = keys.merge(existing, on=key_columns, how="left")
+    is_new = matched["position"].isna().to_numpy()
+
+    final_ids = matched[id_column].to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    if is_new.any():
+        final_ids[is_new] = next_id(name, int(is_new.sum())) + np.arange(int(is_new.sum()))
+    rows = rows[columns].assign(**{id_column: final_ids.astype("int64")})
+
+    # Lignes existantes remplacées sur place, nouvelles lignes ajoutées à la fin
+    table = current[columns].astype(object)
+    positions = matched["position"][~is_new].astype("int64").to_numpy()
+    table.iloc[positions, :] = rows[~is_new].to_numpy(dtype=object)
+    table = pd.concat([table, rows[is_new].astype(object)], ignore_index=True)
+    replace_table(name, table, expected_version=version)
+
+    # Correspondance des identifiants du fichier, y compris des lignes en double écartées
+    final = keys.assign(Nouveau_ID=final_ids.astype("int64"))
+    remap = uploaded_keys.assign(Ancien_ID=pd.to_numeric(uploaded[id_column], errors="coerce").to_numpy())
+    remap = remap.merge(final, on=key_columns, how="left")[REMAP_COLUMNS].dropna()
+    remap = remap[remap["Ancien_ID"] != remap["Nouveau_ID"]].astype("int64").drop_duplicates().reset_index(drop=True)
+    return {"inserted": int(is_new.sum()), "updated": int((~is_new).sum()), "remap": remap}
+
+def upsert_rows(name, uploaded):
+    """
+    Fusionne des lignes téléversées dans une table de noms (clients ou produits) en gardant les identifiants.
+    Les lignes sont rapprochées par jointure de hachage sur le nom normalisé : une ligne connue met à jour
+    la ligne existante (premier identifiant du nom), une ligne nouvelle reçoit un identifiant à la suite.
+    Si un nom apparaît plusieurs fois dans le fichier, la dernière ligne l'emporte.
+    La table n'est remplacée que si elle n'a pas changé depuis sa lecture ; sinon la fusion est
+    recommencée sur la nouvelle version (jusqu'à UPSERT_ATTEMPTS fois).
+    Args:
+        name (str): 'clients' ou 'produits'.
+        uploaded (pd.DataFrame): Lignes téléversées, avec toutes les colonnes de la table.
+    Returns:
+        dict: {inserted, updated, remap} avec remap la correspondance (Ancien_ID, Nouveau_ID) des
+        identifiants du fichier qui ne sont pas ceux retenus dans la table.
+    """
+    for attempt in range(UPSERT_ATTEMPTS):
+        try:
+            return _upsert(name, uploaded.reset_index(drop=True))
+        except VersionConflict:
+            if attempt == UPSERT_ATTEMPTS - 1:
+                raise
+
+def apply_id_remap(df, column, remap):
+    """
+    Remplace dans une colonne les identifiants d'un fichier par ceux retenus dans la table (voir upsert_rows).
+    Args:
+        df (pd.DataFrame): Lignes à corriger (ex. ventes référençant les clients du fichier).
+        column (str): Colonne d'identifiants (ex. 'Client_ID').
+        remap (pd.DataFrame): Correspondance (Ancien_ID, Nouveau_ID).
+    Returns:
+        pd.DataFrame: Copie des lignes avec les identifiants remplacés.
+    """
+    if remap is None or remap.empty:
+        return df
+    remap = remap.drop_duplicates("Ancien_ID", keep="last")
+    positions = pd.Index(remap["Ancien_ID"]).get_indexer(df[column])
+    found = positions >= 0
+    values = df[column].to_numpy(copy=True)
+    values[found] = remap["Nouveau_ID"].to_numpy()[positions[found]]
+    df = df.copy(deep=False)
+    df[column] = values
+    return df
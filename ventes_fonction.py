@@ -1,85 +1,83 @@
+import io
 import pandas as pd
 import streamlit as st
-from client_fonction import load_clients_cache
-from produit_fonction import load_produits_cache
-import os
-from github_utils import push_to_github
+from sync_utils import enqueue_push
+from storage_utils import TABLES, get_table, table_version, next_id, insert_rows, delete_rows, upload_new_rows
+from index_utils import find_client_ids, find_produit_ids
+from upsert_utils import apply_id_remap
+from vue_utils import get_ventes_resume, page_rows, get_lignes_vente, vue_ventes_inserted, vue_ventes_deleted
+from benefice_utils import benefice_rows_added, benefice_rows_removed
+from memo_utils import skip_memo
+from perf_utils import instrument
 
-# Créer le dossier data/ s'il n’existe pas
-os.makedirs("data", exist_ok=True)
-VENTES_FILE = "data/ventes.csv"
+VENTES_FILE = TABLES["ventes"]["file"]
+VENTES_COLUMNS = TABLES["ventes"]["columns"]
+# Format d'export de la caisse : une ligne par produit vendu. Ticket regroupe les lignes d'une même
+# vente (à défaut, une vente par date et par client) ; Prix vaut Quantité x prix au kg s'il manque ;
+# le client peut être donné en une colonne Client « Nom Prénom » au lieu de Nom et Prénom.
+BATCH_COLUMNS = ["Ticket", "Date", "Nom", "Prénom", "Produit", "Quantité", "Prix"]
 
-@st.cache_data
-def load_ventes_cache(_invalidate=False):
+@instrument("chargement")
+def load_ventes_cache(columns=None):
     try:
-        return pd.read_csv(VENTES_FILE)
-    except FileNotFoundError:
-        return pd.DataFrame(columns=["Vente_ID", "Date", "Client_ID", "Produit_ID", "Quantité", "Prix"])
+        return get_table("ventes", columns)
     except Exception as e:
         st.error(f"Erreur lors du chargement des ventes : {e}")
-        return pd.DataFrame(columns=["Vente_ID", "Date", "Client_ID", "Produit_ID", "Quantité", "Prix"])
+        skip_memo()
+        return pd.DataFrame(columns=columns or VENTES_COLUMNS)
 
-def get_ventes_affichage():
-    ventes = load_ventes_cache(_invalidate=True)
-    clients = load_clients_cache(_invalidate=True)
-    produits = load_produits_cache(_invalidate=True)
-    if ventes.empty:
-        return pd.DataFrame(columns=["Vente_ID", "Date", "Client", "Produits", "Total"])
-    
-    # Joindre les clients et produits
-    ventes = ventes.merge(clients[["Client_ID", "Nom", "Prénom"]], on="Client_ID", how="left")
-    ventes = ventes.merge(produits[["Produit_ID", "Nom"]], left_on="Produit_ID", right_on="Produit_ID", how="left")
-    ventes["Client"] = ventes["Nom_x"] + " " + ventes["Prénom"]
-    
-    # Regrouper par Vente_ID pour afficher une ligne par vente
-    grouped = ventes.groupby(["Vente_ID", "Date", "Client"]).agg({
-        "Nom_y": lambda x: ", ".join(x.dropna()),
-        "Prix": "sum"
-    }).reset_index()
-    grouped = grouped.rename(columns={"Nom_y": "Produits", "Prix": "Total"})
-    return grouped[["Vente_ID", "Date", "Client", "Produits", "Total"]]
+@instrument("chargement")
+def get_ventes_affichage(page=1, page_size=None, start_date=None, end_date=None, client_id=None,
+                         sort_by="Vente_ID", ascending=True):
+    """
+    Retourne une page de la liste des ventes (une ligne par vente), filtrée et triée côté serveur.
+    Args:
+        page (int): Numéro de la page, à partir de 1.
+        page_size (int): Nombre de ventes par page ; toutes les ventes si None.
+        start_date, end_date: Période des ventes (bornes incluses) ; toutes les dates si absentes.
+        client_id (int): Ne garder que les ventes de ce client ; tous les clients si None.
+        sort_by (str): Colonne de tri (Vente_ID, Date, Client ou Total).
+        ascending (bool): Ordre croissant ou décroissant.
+    Returns:
+        tuple: (pd.DataFrame de la page, nombre total de ventes correspondant aux filtres).
+    """
+    # Lu dans la vue maintenue à chaque écriture, sans jointure ni regroupement
+    try:
+        ventes = get_ventes_resume(start_date, end_date, client_id)
+        # La vue est déjà triée par Vente_ID
+        if sort_by == "Vente_ID" and ascending:
+            sort_by = None
+        return page_rows(ventes, page, page_size, sort_by, ascending)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des ventes : {e}")
+        return pd.DataFrame(columns=["Vente_ID", "Date", "Client", "Produits", "Total"]), 0
 
+@instrument("chargement")
 def get_vente_details(vente_id):
-    ventes = load_ventes_cache(_invalidate=True)
-    clients = load_clients_cache(_invalidate=True)
-    produits = load_produits_cache(_invalidate=True)
-    vente_details = ventes[ventes["Vente_ID"] == vente_id]
-    if vente_details.empty:
+    details = get_lignes_vente(vente_id)
+    if details.empty:
         return pd.DataFrame()
-    
-    # Joindre les clients et produits pour les détails
-    vente_details = vente_details.merge(clients[["Client_ID", "Nom", "Prénom"]], on="Client_ID", how="left")
-    vente_details = vente_details.merge(produits[["Produit_ID", "Nom"]], left_on="Produit_ID", right_on="Produit_ID", how="left")
-    vente_details["Client"] = vente_details["Nom_x"] + " " + vente_details["Prénom"]
-    return vente_details[["Date", "Client", "Nom_y", "Quantité", "Prix"]].rename(columns={"Nom_y": "Produit"})
+    return details
 
+@instrument("écriture")
 def save_vente(date, client_nom, client_prenom, produits, quantites, prix_totaux):
     try:
-        ventes = load_ventes_cache(_invalidate=True)
-        clients = load_clients_cache(_invalidate=True)
-        produits_df = load_produits_cache(_invalidate=True)
-        
         # Vérifier le client
-        client = clients[(clients["Nom"].str.lower() == client_nom.lower()) & 
-                        (clients["Prénom"].str.lower() == client_prenom.lower())]
-        if client.empty:
+        client_ids = find_client_ids(client_nom, client_prenom)
+        if not client_ids:
             st.error("Client non trouvé.")
             return False
-        client_id = client["Client_ID"].iloc[0]
-        
-        # Générer un nouvel ID de vente
-        new_vente_id = int(ventes["Vente_ID"].max() + 1 if not ventes.empty else 1)
+        client_id = client_ids[0]
         
         # Créer une ligne par produit
         new_ventes = []
         for nom_produit, quantite, prix in zip(produits, quantites, prix_totaux):
-            produit_row = produits_df[produits_df["Nom"] == nom_produit]
-            if produit_row.empty:
+            produit_ids = find_produit_ids(nom_produit)
+            if not produit_ids:
                 st.error(f"Produit {nom_produit} non trouvé.")
                 continue
-            produit_id = produit_row["Produit_ID"].iloc[0]
+            produit_id = produit_ids[0]
             new_ventes.append({
-                "Vente_ID": new_vente_id,
                 "Date": date,
                 "Client_ID": client_id,
                 "Produit_ID": produit_id,
@@ -91,56 +89,164 @@ def save_vente(date, client_nom, client_prenom, produits, quantites, prix_totaux
             st.error("Aucun produit valide pour cette vente.")
             return False
         
-        # Ajouter les nouvelles lignes
+        # Générer un nouvel ID de vente depuis le compteur
+        new_vente_id = next_id("ventes")
         new_ventes_df = pd.DataFrame(new_ventes)
-        ventes = pd.concat([ventes, new_ventes_df], ignore_index=True)
-        ventes.to_csv(VENTES_FILE, index=False)
+        new_ventes_df["Vente_ID"] = new_vente_id
+        
+        # Ajouter les nouvelles lignes, sans réécrire la table
+        version = table_version("ventes")
+        insert_rows("ventes", new_ventes_df)
+        vue_ventes_inserted(version, new_ventes_df)
+        benefice_rows_added("ventes", version, new_ventes_df)
         
         # Synchroniser avec GitHub
-        with open(VENTES_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/ventes.csv", content, f"Ajout de la vente ID {new_vente_id}")
-        load_ventes_cache.clear()
+        enqueue_push(VENTES_FILE, f"Ajout de la vente ID {new_vente_id}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de l’enregistrement de la vente : {e}")
         return False
 
+@instrument("chargement")
+def read_ventes_batch(data, json_format=False):
+    """
+    Lit des ventes au format d'export de la caisse (voir BATCH_COLUMNS).
+    Args:
+        data: Fichier téléversé ou texte collé.
+        json_format (bool): Liste d'objets JSON au lieu d'un CSV.
+    Returns:
+        pd.DataFrame: Lignes lues, toutes les valeurs en texte.
+    """
+    if isinstance(data, str):
+        data = io.StringIO(data)
+    if json_format:
+        return pd.read_json(data, orient="records", dtype=False).astype("string")
+    return pd.read_csv(data, dtype="string", skipinitialspace=True)
+
+def _batch_keys(table, key_columns, id_column, values):
+    # Jointure sur les noms normalisés (comme index_utils) : le premier identifiant d'un nom l'emporte
+    df = get_table(table, [id_column] + key_columns)
+    keys = pd.DataFrame({col: df[col].astype("string").fillna("").str.strip().str.lower() for col in key_columns})
+    keys[id_column] = df[id_column].astype("Int64").to_numpy()
+    keys = keys.drop_duplicates(key_columns)
+    wanted = pd.DataFrame({col: value.fillna("").str.strip().str.lower() for col, value in zip(key_columns, values)})
+    return wanted.merge(keys, on=key_columns, how="left")[id_column]
+
+@instrument("écriture")
+def save_ventes_batch(ventes):
+    """
+    Enregistre en une seule écriture (et une seule synchronisation) les ventes d'une journée.
+    Les lignes sont validées ensemble : une ligne au produit inconnu ou à la quantité invalide est
+    rejetée seule, une vente au client inconnu ou à la date invalide est rejetée entière.
+    Args:
+        ventes (pd.DataFrame | list): Lignes au format d'export de la caisse (voir BATCH_COLUMNS).
+    Returns:
+        dict: {ventes, lignes, rejets} avec le nombre de ventes et de lignes enregistrées et les lignes
+        rejetées (colonne Erreur), ou None en cas d'erreur.
+    """
+    try:
+        rows = pd.DataFrame(ventes).astype("string").reset_index(drop=True)
+        if "Client" in rows.columns and "Nom" not in rows.columns:
+            noms = rows["Client"].str.strip().str.split(" ", n=1, expand=True).reindex(columns=[0, 1])
+            rows["Nom"], rows["Prénom"] = noms[0], noms[1].fillna("")
+        missing = [col for col in ["Date", "Nom", "Produit", "Quantité"] if col not in rows.columns]
+        if missing:
+            st.error(f"Colonnes manquantes : {', '.join(missing)}.")
+            return None
+        if "Prénom" not in rows.columns:
+            rows["Prénom"] = ""
+        columns = list(rows.columns)
+        if "Ticket" not in rows.columns:
+            rows["Ticket"] = rows["Date"].fillna("") + "|" + rows["Nom"].fillna("") + "|" + rows["Prénom"].fillna("")
+
+        dates = pd.to_datetime(rows["Date"], format="ISO8601", errors="coerce")
+        client_ids = _batch_keys("clients", ["Nom", "Prénom"], "Client_ID", [rows["Nom"], rows["Prénom"]])
+        produit_ids = _batch_keys("produits", ["Nom"], "Produit_ID", [rows["Produit"]])
+        quantites = pd.to_numeric(rows["Quantité"], errors="coerce")
+        prix_kg = get_table("produits", ["Produit_ID", "Prix (au Kg)"]).drop_duplicates("Produit_ID")
+        prix_kg = pd.Series(prix_kg["Prix (au Kg)"].astype("float64").to_numpy(), index=prix_kg["Produit_ID"].astype("Int64"))
+        prix = pd.to_numeric(rows["Prix"], errors="coerce") if "Prix" in rows.columns else pd.Series(float("nan"), index=rows.index)
+        prix = prix.fillna(quantites * produit_ids.map(prix_kg))
+
+        # Erreurs de ligne, puis erreurs de vente propagées à toutes les lignes du ticket
+        erreurs = pd.Series(pd.NA, index=rows.index, dtype="string")
+        erreurs[~(prix >= 0)] = "Prix invalide"
+        erreurs[~(quantites > 0)] = "Quantité invalide"
+        erreurs[produit_ids.isna()] = "Produit non trouvé"
+        ticket_erreurs = pd.Series(pd.NA, index=rows.index, dtype="string")
+        ticket_erreurs[client_ids.isna()] = "Client non trouvé"
+        ticket_erreurs[dates.isna()] = "Date invalide"
+        ticket_erreurs = ticket_erreurs.groupby(rows["Ticket"].fillna(""), sort=False).transform("first")
+        erreurs = ticket_erreurs.fillna(erreurs)
+        valid = erreurs.isna().to_numpy()
+        rejets = rows.loc[~valid, columns].assign(Erreur=erreurs[~valid])
+        if not valid.any():
+            st.error("Aucune vente valide à enregistrer.")
+            return {"ventes": 0, "lignes": 0, "rejets": rejets}
+
+        # Identifiants consécutifs, dans l'ordre d'apparition des tickets
+        codes, tickets = pd.factorize(rows["Ticket"].fillna("")[valid])
+        first_id = next_id("ventes", len(tickets))
+        new_ventes_df = pd.DataFrame({
+            "Vente_ID": first_id + codes,
+            "Date": dates[valid].dt.strftime("%Y-%m-%d").to_numpy(),
+            "Client_ID": client_ids[valid].astype("int64").to_numpy(),
+            "Produit_ID": produit_ids[valid].astype("int64").to_numpy(),
+            "Quantité": quantites[valid].to_numpy(),
+            "Prix": prix[valid].to_numpy(),
+        })[VENTES_COLUMNS]
+
+        version = table_version("ventes")
+        insert_rows("ventes", new_ventes_df)
+        vue_ventes_inserted(version, new_ventes_df)
+        benefice_rows_added("ventes", version, new_ventes_df)
+        last_id = first_id + len(tickets) - 1
+        enqueue_push(VENTES_FILE, f"Ajout des ventes ID {first_id} à {last_id}")
+        return {"ventes": len(tickets), "lignes": len(new_ventes_df), "rejets": rejets}
+    except Exception as e:
+        st.error(f"Erreur lors de l’enregistrement des ventes : {e}")
+        return None
+
+@instrument("écriture")
 def delete_vente(vente_id):
     try:
-        ventes = load_ventes_cache(_invalidate=True)
-        if ventes[ventes["Vente_ID"] == vente_id].empty:
+        lignes = get_lignes_vente(vente_id)
+        if lignes.empty:
             st.error("Vente non trouvée.")
             return False
-        ventes = ventes[ventes["Vente_ID"] != vente_id]
-        ventes.to_csv(VENTES_FILE, index=False)
-        with open(VENTES_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/ventes.csv", content, f"Suppression de la vente ID {vente_id}")
-        load_ventes_cache.clear()
+        version = table_version("ventes")
+        delete_rows("ventes", "Vente_ID", [vente_id])
+        vue_ventes_deleted(version, [vente_id])
+        benefice_rows_removed("ventes", version, lignes)
+        enqueue_push(VENTES_FILE, f"Suppression de la vente ID {vente_id}")
         return True
     except Exception as e:
         st.error(f"Erreur lors de la suppression de la vente : {e}")
         return False
 
-def upload_ventes(file):
+@instrument("écriture")
+def upload_ventes(file, progress=None, remaps=None):
+    """
+    Ajoute les ventes d'un CSV (même format que ventes.csv), lu par morceaux.
+    Une ligne dont la clé (Vente_ID, Produit_ID, Client_ID, Date) existe déjà est ignorée.
+    Args:
+        file: Fichier CSV téléversé.
+        progress (callable): Appelé après chaque morceau avec les compteurs courants.
+        remaps (dict): Colonne ('Client_ID', 'Produit_ID') -> correspondance des identifiants produite
+            par le chargement de clients.csv ou produits.csv venant de la même source.
+    Returns:
+        dict: {inserted, skipped, invalid} ou None en cas d'erreur.
+    """
+    def remap_ids(chunk):
+        for column, remap in (remaps or {}).items():
+            chunk = apply_id_remap(chunk, column, remap)
+        return chunk
     try:
-        uploaded_ventes = pd.read_csv(file)
-        current_ventes = load_ventes_cache(_invalidate=True)
-        expected_cols = ["Vente_ID", "Date", "Client_ID", "Produit_ID", "Quantité", "Prix"]
-        if not all(col in uploaded_ventes.columns for col in expected_cols):
-            st.error("Colonnes manquantes dans le fichier CSV.")
-            return False
-        if not current_ventes.empty:
-            merged_ventes = pd.concat([current_ventes, uploaded_ventes], ignore_index=True)
-            merged_ventes = merged_ventes.drop_duplicates(subset=["Vente_ID", "Produit_ID", "Client_ID", "Date"], keep="last")
-        else:
-            merged_ventes = uploaded_ventes
-        merged_ventes.to_csv(VENTES_FILE, index=False)
-        with open(VENTES_FILE, "r") as f:
-            content = f.read()
-        push_to_github("data/ventes.csv", content, "Upload de ventes.csv")
-        load_ventes_cache.clear()
-        return True
+        counts = upload_new_rows("ventes", file, ["Vente_ID", "Produit_ID", "Client_ID", "Date"], progress,
+                                 transform=remap_ids if remaps else None)
+        if counts["inserted"]:
+            enqueue_push(VENTES_FILE, "Upload de ventes.csv")
+        return counts
     except Exception as e:
-        st.error(f"Erreur lors du chargement de ventes.csv : {e}")
\ No newline at end of file
+        st.error(f"Erreur lors du chargement de ventes.csv : {e}")
+        return None
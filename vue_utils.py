@@ -0,0 +1,212 @@
+import threading
+import pandas as pd
+import streamlit as st
+from storage_utils import get_table, table_version, conform_rows, to_csv_content
+from perf_utils import instrument, record_cache
+
+# Tables dont dépend la vue des ventes avec les noms des clients et des produits
+VUE_TABLES = ("ventes", "clients", "produits")
+RESUME_COLUMNS = ["Vente_ID", "Date", "Client", "Produits", "Total"]
+DETAIL_COLUMNS = ["Date", "Client", "Produit", "Quantité", "Prix"]
+
+_lock = threading.Lock()
+
+@st.cache_resource(show_spinner=False)
+def _vues():
+    return {}
+
+@st.cache_resource(show_spinner=False)
+def _csv_telechargements():
+    # Contenu CSV proposé au téléchargement : nom de la table -> (version, octets)
+    return {}
+
+def _noms_clients():
+    clients = get_table("clients", ["Client_ID", "Nom", "Prénom"]).drop_duplicates("Client_ID")
+    labels = clients["Nom"].astype("string") + " " + clients["Prénom"].astype("string")
+    return pd.Series(labels.to_numpy(), index=clients["Client_ID"].to_numpy())
+
+def _noms_produits():
+    produits = get_table("produits", ["Produit_ID", "Nom"]).drop_duplicates("Produit_ID")
+    return pd.Series(produits["Nom"].astype("string").to_numpy(), index=produits["Produit_ID"].to_numpy())
+
+def _lignes(ventes, noms_clients, noms_produits):
+    # Une ligne par produit vendu, indexée (et triée) par Vente_ID pour les recherches de détail
+    lignes = ventes.copy(deep=False)
+    lignes["Client"] = lignes["Client_ID"].map(noms_clients).astype("string")
+    lignes["Produit"] = lignes["Produit_ID"].map(noms_produits).astype("string")
+    return lignes.set_index("Vente_ID").sort_index(kind="stable")
+
+def _resume(lignes):
+    # Une ligne par vente ; les produits sans nom (supprimés) sont ignorés dans la liste
+    groupes = lignes.groupby(level="Vente_ID", sort=True)
+    resume = pd.DataFrame({
+        "Date": groupes["Date"].first(),
+        "Client_ID": groupes["Client_ID"].first(),
+        "Client": groupes["Client"].first(),
+        "Total": groupes["Prix"].sum(),
+    })
+    produits = lignes["Produit"].dropna().groupby(level="Vente_ID").agg(", ".join)
+    resume["Produits"] = produits.reindex(resume.index, fill_value="")
+    resume.index.name = "Vente_ID"
+    return resume
+
+@instrument("index")
+def _build():
+    versions = {name: table_version(name) for name in VUE_TABLES}
+    lignes = _lignes(get_table("ventes"), _noms_clients(), _noms_produits())
+    return {"versions": versions, "lignes": lignes, "resume": _resume(lignes)}
+
+def _get_vue():
+    current = {name: table_version(name) for name in VUE_TABLES}
+    with _lock:
+        entry = _vues().get("ventes")
+        hit = entry is not None and entry["versions"] == current
+        record_cache("vue.ventes", hit)
+        if hit:
+            return entry
+    # Construction complète seulement si une écriture n'a pas pu être appliquée sur place
+    entry = _build()
+    with _lock:
+        if entry["versions"] == {name: table_version(name) for name in VUE_TABLES}:
+            _vues()["ventes"] = entry
+    return entry
+
+def _update_vue(name, old_version, apply):
+    # Même règle que pour les index de noms : la vue n'est modifiée sur place que si elle
+    # reflétait exactement l'état précédant l'écriture, sinon elle sera reconstruite à la demande
+    new_version = table_version(name)
+    with _lock:
+        entry = _vues().get("ventes")
+        if entry is None:
+            return
+        others_current = all(entry["versions"][other] == table_version(other) for other in VUE_TABLES if other != name)
+        if entry["versions"][name] == old_version and new_version == old_version + 1 and others_current:
+            apply(entry)
+            entry["versions"][name] = new_version
+        else:
+            del _vues()["ventes"]
+
+def _refresh_resume(entry, vente_ids):
+    resume = entry["resume"].drop(vente_ids, errors="ignore")
+    lignes = entry["lignes"]
+    part = _resume(lignes[lignes.index.isin(vente_ids)])
+    resume = pd.concat([resume, part]) if not resume.empty else part
+    entry["resume"] = resume if resume.index.is_monotonic_increasing else resume.sort_index(kind="stable")
+
+def filter_dates(rows, start_date=None, end_date=None):
+    """
+    Garde les lignes dont la colonne Date est comprise entre deux bornes incluses.
+    Args:
+        rows (pd.DataFrame): Lignes avec une colonne Date (datetime64).
+        start_date, end_date: Bornes de la période ; ignorée si absente.
+    Returns:
+        pd.DataFrame: Lignes de la période.
+    """
+    mask = rows["Date"].notna()
+    if start_date:
+        mask &= rows["Date"] >= pd.Timestamp(start_date).normalize()
+    if end_date:
+        mask &= rows["Date"] < pd.Timestamp(end_date).normalize() + pd.Timedelta(days=1)
+    return rows[mask]
+
+def page_rows(rows, page=1, page_size=None, sort_by=None, ascending=True):
+    """
+    Trie des lignes puis n'en retourne qu'une page.
+    Args:
+        rows (pd.DataFrame): Lignes à paginer.
+        page (int): Numéro de la page, à partir de 1 ; ramené à la dernière page si trop grand.
+        page_size (int): Nombre de lignes par page ; toutes les lignes si None.
+        sort_by (str): Colonne de tri (tri stable, valeurs manquantes en dernier) ; ordre actuel si None.
+        ascending (bool): Ordre croissant ou décroissant.
+    Returns:
+        tuple: (pd.DataFrame de la page, nombre total de lignes).
+    """
+    total = len(rows)
+    if sort_by is not None:
+        rows = rows.sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+    if page_size:
+        last_page = max((total - 1) // page_size + 1, 1)
+        start = (min(max(int(page), 1), last_page) - 1) * page_size
+        rows = rows.iloc[start:start + page_size]
+    return rows.reset_index(drop=True), total
+
+def get_ventes_resume(start_date=None, end_date=None, client_id=None):
+    """
+    Retourne une ligne par vente (Vente_ID, Date, Client, Produits, Total), lue dans la vue maintenue.
+    Comme avant, les ventes sans client ou sans date valide ne sont pas listées.
+    Args:
+        start_date, end_date: Période des ventes (bornes incluses) ; toutes les dates si absentes.
+        client_id (int): Ne garder que les ventes de ce client ; tous les clients si None.
+    """
+    resume = _get_vue()["resume"]
+    resume = filter_dates(resume[resume["Client"].notna()], start_date, end_date)
+    if client_id is not None:
+        resume = resume[resume["Client_ID"] == client_id]
+    return resume.reset_index()[RESUME_COLUMNS]
+
+def get_lignes_vente(vente_id):
+    """Retourne les lignes (Date, Client, Produit, Quantité, Prix) d'une vente, via l'index Vente_ID."""
+    lignes = _get_vue()["lignes"]
+    start, stop = lignes.index.searchsorted(vente_id, "left"), lignes.index.searchsorted(vente_id, "right")
+    return lignes.iloc[start:stop][DETAIL_COLUMNS].reset_index(drop=True)
+
+def vue_ventes_inserted(old_version, rows):
+    """Ajoute à la vue les lignes de vente insérées (rows : DataFrame)."""
+    def apply(entry):
+        _, rows_conformes = conform_rows(get_table("ventes"), rows)
+        new_lignes = _lignes(rows_conformes, _noms_clients(), _noms_produits())
+        lignes = pd.concat([entry["lignes"], new_lignes]) if not entry["lignes"].empty else new_lignes
+        entry["lignes"] = lignes if lignes.index.is_monotonic_increasing else lignes.sort_index(kind="stable")
+        _refresh_resume(entry, new_lignes.index.unique())
+    _update_vue("ventes", old_version, apply)
+
+def vue_ventes_deleted(old_version, vente_ids):
+    """Retire de la vue les ventes supprimées."""
+    def apply(entry):
+        entry["lignes"] = entry["lignes"].drop(vente_ids, errors="ignore")
+        entry["resume"] = entry["resume"].drop(vente_ids, errors="ignore")
+    _update_vue("ventes", old_version, apply)
+
+def vue_noms_changed(name, old_version, ids):
+    """
+    Met à jour les noms affichés après l'ajout ou la suppression de clients ou de produits.
+    Args:
+        name (str): 'clients' ou 'produits'.
+        old_version (int): Version de la table avant l'écriture.
+        ids (list): Identifiants ajoutés ou supprimés.
+    """
+    id_column, label_column, noms = (("Client_ID", "Client", _noms_clients) if name == "clients"
+                                     else ("Produit_ID", "Produit", _noms_produits))
+    def apply(entry):
+        lignes = entry["lignes"]
+        mask = lignes[id_column].isin(ids)
+        if not mask.any():
+            return
+        lignes = lignes.copy(deep=False)
+        lignes.loc[mask, label_column] = lignes.loc[mask, id_column].map(noms()).astype("string")
+        entry["lignes"] = lignes
+        _refresh_resume(entry, lignes.index[mask].unique())
+    _update_vue(name, old_version, apply)
+
+def vue_unchanged(name, old_version):
+    """Signale une écriture qui ne touche pas aux colonnes de la vue (ex. changement de prix)."""
+    _update_vue(name, old_version, lambda entry: None)
+
+def table_csv(name):
+    """
+    Retourne le contenu CSV d'une table pour un bouton de téléchargement.
+    Il est produit depuis la table partagée une fois par version, sans réécrire data/*.csv.
+    Args:
+        name (str): Nom de la table (clé de TABLES).
+    Returns:
+        bytes: Contenu CSV (UTF-8).
+    """
+    version = table_version(name)
+    entry = _csv_telechargements().get(name)
+    record_cache(f"csv.{name}", entry is not None and entry[0] == version)
+    if entry is None or entry[0] != version:
+        # Une écriture entre la lecture de la version et celle de la table ne fait que forcer une nouvelle sérialisation
+        entry = (version, to_csv_content(get_table(name)).encode("utf-8"))
+        with _lock:
+            _csv_telechargements()[name] = entry
+    return entry[1]